@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite - Tennis Stats Analyzer
+Tempo e picco di memoria di download/parsing, cleaning, metodi di ATPAnalyzer
+e grafici di ATPVisualizer su dataset sintetici (10k, 100k, 1M, 10M match),
+tempo di import del pacchetto, con storico dei risultati e confronto tra
+esecuzioni.
+
+Uso:
+    python benchmark.py run --tiers 10k,100k
+    python benchmark.py run --tiers 1M --stages clean,analyzer --no-memory
+    python benchmark.py compare --threshold 0.15
+"""
+import argparse
+import contextlib
+import functools
+import http.server
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Aggiungere src al path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from tennis_analyzer.logger import setup_logger
+from tennis_analyzer.downloader import ATPDataDownloader
+from tennis_analyzer.cleaner import ATPDataCleaner
+from tennis_analyzer.analyzer import ATPAnalyzer
+from tennis_analyzer import config
+
+logger = setup_logger(__name__)
+
+
+TIERS = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+STAGES = ('import', 'download_parse', 'clean', 'analyzer', 'visualizer')
+
+# Import misurati in un interprete nuovo (il tier non conta: misurati una volta)
+IMPORT_CASES = {
+    'tennis_analyzer': 'import tennis_analyzer',
+    'ATPAnalyzer': 'from tennis_analyzer import ATPAnalyzer',
+    'ATPVisualizer': 'from tennis_analyzer import ATPVisualizer',
+    'visualizer_first_plot': 'from tennis_analyzer import visualizer; visualizer._load_plotting()',
+}
+IMPORT_REPEATS = 3
+
+ROUNDS = ['R32'] * 16 + ['R16'] * 8 + ['QF'] * 4 + ['SF'] * 2 + ['F']
+LEVELS = np.array(list('GMAAAACCCDF'))
+SURFACES = np.array(['Hard', 'Hard', 'Clay', 'Grass', 'Carpet'])
+FIRST_YEAR = 1968
+
+
+# =====================================================
+# DATASET SINTETICO
+# =====================================================
+
+def synthetic_matches(n_matches: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Match grezzi sintetici nel formato dei CSV di Jeff Sackmann.
+    
+    Tornei da 31 match (R32 -> F), giocatori con forza decrescente per
+    indice (il n.1 vince più spesso), statistiche di servizio plausibili.
+    
+    Args:
+        n_matches: Numero di match
+        seed: Seed del generatore
+    
+    Returns:
+        DataFrame grezzo (colonne come atp_matches_YYYY.csv)
+    """
+    rng = np.random.default_rng(seed)
+    n = n_matches
+    n_players = max(128, int(4 * np.sqrt(n)))
+    n_years = int(np.clip(n // 5_000, 1, 2025 - FIRST_YEAR))
+    
+    tourney = np.arange(n) // len(ROUNDS)
+    n_tourneys = int(tourney[-1]) + 1 if n else 0
+    tourney_year = FIRST_YEAR + np.arange(n_tourneys) * n_years // max(n_tourneys, 1)
+    tourney_week = rng.integers(0, 52, n_tourneys)
+    dates = (
+        pd.to_datetime(tourney_year.astype(str), format='%Y') + pd.to_timedelta(tourney_week * 7, unit='D')
+    ).strftime('%Y%m%d').astype(np.int64).to_numpy()
+    
+    # Giocatori: indice basso = più forte; vince il più forte nel 65% dei casi
+    a = rng.integers(0, n_players, n)
+    b = (a + rng.integers(1, n_players, n)) % n_players
+    stronger, weaker = np.minimum(a, b), np.maximum(a, b)
+    upset = rng.random(n) < 0.35
+    winner = np.where(upset, weaker, stronger)
+    loser = np.where(upset, stronger, weaker)
+    names = np.array([f"player {i}" for i in range(n_players)], dtype=object)
+    rank = np.arange(1, n_players + 1, dtype=np.float64)
+    points = np.round(12_000 / rank ** 0.8)
+    
+    df = pd.DataFrame({
+        'tourney_id': [f"{y}-{t}" for y, t in zip(tourney_year[tourney], tourney)],
+        'tourney_name': [f"Tournament {t % 300}" for t in tourney],
+        'surface': SURFACES[tourney % len(SURFACES)],
+        'draw_size': 32,
+        'tourney_level': LEVELS[tourney % len(LEVELS)],
+        'tourney_date': dates[tourney],
+        'match_num': np.arange(n) % len(ROUNDS) + 1,
+        'winner_id': 100_000 + winner,
+        'winner_name': names[winner],
+        'winner_rank': rank[winner],
+        'winner_rank_points': points[winner],
+        'loser_id': 100_000 + loser,
+        'loser_name': names[loser],
+        'loser_rank': rank[loser],
+        'loser_rank_points': points[loser],
+        'score': '6-4 6-4',
+        'best_of': np.where(LEVELS[tourney % len(LEVELS)] == 'G', 5, 3),
+        'round': np.array(ROUNDS)[np.arange(n) % len(ROUNDS)],
+        'minutes': rng.integers(55, 240, n).astype(np.float64),
+    })
+    
+    for prefix, serve_won in (('w', 0.68), ('l', 0.58)):
+        svpt = rng.integers(40, 130, n)
+        first_in = (svpt * rng.uniform(0.5, 0.72, n)).astype(np.int64)
+        bp_faced = rng.integers(0, 14, n)
+        df[f'{prefix}_ace'] = rng.integers(0, 20, n)
+        df[f'{prefix}_df'] = rng.integers(0, 9, n)
+        df[f'{prefix}_svpt'] = svpt
+        df[f'{prefix}_1stIn'] = first_in
+        df[f'{prefix}_1stWon'] = (first_in * (serve_won + 0.08)).astype(np.int64)
+        df[f'{prefix}_2ndWon'] = ((svpt - first_in) * (serve_won - 0.15)).astype(np.int64)
+        df[f'{prefix}_SvGms'] = svpt // 6
+        df[f'{prefix}_bpFaced'] = bp_faced
+        df[f'{prefix}_bpSaved'] = (bp_faced * rng.uniform(0.3, 0.8, n)).astype(np.int64)
+    
+    return df
+
+
+# =====================================================
+# MISURE
+# =====================================================
+
+def measure(func: Callable, setup: Callable = None, memory: bool = True) -> Dict[str, float]:
+    """
+    Tempo (wall) e picco di memoria allocata (tracemalloc) di una funzione.
+    
+    Il tempo viene misurato senza tracemalloc; il picco in una seconda
+    esecuzione. setup() prepara argomenti nuovi per ogni esecuzione e non
+    viene misurato.
+    
+    Args:
+        func: Funzione da misurare (riceve il risultato di setup, se presente)
+        setup: Preparazione non misurata (opzionale)
+        memory: Se False, salta la misura della memoria
+    
+    Returns:
+        Dict con seconds e peak_mb (None se memory=False)
+    """
+    args = (setup(),) if setup is not None else ()
+    started = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - started
+    
+    peak_mb = None
+    if memory:
+        args = (setup(),) if setup is not None else ()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            func(*args)
+            peak_mb = (tracemalloc.get_traced_memory()[1] - baseline) / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+    
+    return {'seconds': round(seconds, 6), 'peak_mb': None if peak_mb is None else round(peak_mb, 3)}
+
+
+def measure_import(statement: str, memory: bool = True, repeats: int = IMPORT_REPEATS) -> Dict[str, float]:
+    """
+    Tempo (minimo su più interpreti nuovi) e picco di memoria di un import.
+    
+    Args:
+        statement: Istruzione di import
+        memory: Se False, salta la misura della memoria
+        repeats: Interpreti nuovi per la misura del tempo
+    
+    Returns:
+        Dict con seconds e peak_mb (None se memory=False)
+    """
+    def run(trace: bool) -> Dict:
+        code = (
+            "import json, sys, time, tracemalloc\n"
+            f"sys.path.insert(0, {str(src_path)!r})\n"
+            f"trace = {trace}\n"
+            "if trace: tracemalloc.start()\n"
+            "started = time.perf_counter()\n"
+            f"{statement}\n"
+            "seconds = time.perf_counter() - started\n"
+            "peak = tracemalloc.get_traced_memory()[1] if trace else None\n"
+            "print(json.dumps({'seconds': seconds, 'peak': peak}))\n"
+        )
+        completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                   check=True, timeout=300)
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    
+    seconds = min(run(False)['seconds'] for _ in range(repeats))
+    peak_mb = run(True)['peak'] / 1024 ** 2 if memory else None
+    return {'seconds': round(seconds, 6), 'peak_mb': None if peak_mb is None else round(peak_mb, 3)}
+
+
+def run_imports(memory: bool = True) -> List[Dict]:
+    """
+    Tempi di import del pacchetto (tier '-').
+    
+    Args:
+        memory: Misura anche il picco di memoria
+    
+    Returns:
+        Lista di risultati nello stesso formato di run_tier
+    """
+    results = []
+    print("\n▶ Import del pacchetto (interpreti nuovi)", flush=True)
+    for name, statement in IMPORT_CASES.items():
+        entry = {'tier': '-', 'stage': 'import', 'name': name, 'rows': None}
+        try:
+            entry.update(measure_import(statement, memory))
+        except (subprocess.SubprocessError, ValueError) as e:
+            entry.update({'seconds': None, 'peak_mb': None, 'error': f"{type(e).__name__}: {e}"})
+        results.append(entry)
+        timing = f"{entry['seconds']:.3f}s" if entry['seconds'] is not None else entry['error']
+        memory_info = f" | {entry['peak_mb']:.1f} MB" if entry.get('peak_mb') is not None else ""
+        print(f"  [{'-':>4}] {'import':14} {name:30} {timing}{memory_info}", flush=True)
+    return results
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    """File server senza log per richiesta."""
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_directory(directory: Path) -> Iterator[str]:
+    """
+    File server HTTP locale (thread) su una cartella.
+    
+    Yields:
+        URL base del server (http://127.0.0.1:porta)
+    """
+    handler = functools.partial(_QuietHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _analyzer_cases(df_clean: pd.DataFrame) -> Dict[str, Callable[[ATPAnalyzer], object]]:
+    """Un caso per ogni metodo pubblico di ATPAnalyzer, con argomenti di default."""
+    counts = pd.concat([df_clean['winner_name'], df_clean['loser_name']]).value_counts()
+    top = counts.index[:8].tolist()
+    p1, p2 = top[0], top[1]
+    draw = top + [None] * (8 - len(top))
+    
+    return {
+        'get_all_players': lambda a: a.get_all_players(),
+        'select': lambda a: a.select('2000-01-01', '2009-12-31'),
+        'last_weeks': lambda a: a.last_weeks(52),
+        'analyze_top_atp_days': lambda a: a.analyze_top_atp_days(),
+        'analyze_total_wins': lambda a: a.analyze_total_wins(),
+        'analyze_surface_performance': lambda a: a.analyze_surface_performance(),
+        'analyze_tournament_levels': lambda a: a.analyze_tournament_levels(),
+        'get_era_leaders': lambda a: a.get_era_leaders(period='rolling_52w', top_k=3),
+        'get_era_dominators': lambda a: a.get_era_dominators(),
+        'head_to_head': lambda a: a.head_to_head(p1, p2),
+        'head_to_head_matches': lambda a: a.head_to_head_matches(p1, p2),
+        'head_to_head_matrix': lambda a: a.head_to_head_matrix(top),
+        'player_matches': lambda a: a.player_matches(p1),
+        'player_profile': lambda a: a.player_profile(p1),
+        'player_timeline': lambda a: a.player_timeline(p1),
+        'player_profiles': lambda a: a.player_profiles(),
+        'analyze_streaks': lambda a: a.analyze_streaks(),
+        'analyze_serve_return': lambda a: a.analyze_serve_return(),
+        'analyze_upsets': lambda a: a.analyze_upsets(),
+        'draw_probabilities': lambda a: a.draw_probabilities(top, source='elo'),
+        'simulate_tournament': lambda a: a.simulate_tournament(draw, n_simulations=100_000, seed=0),
+        'run_full_analysis': lambda a: a.run_full_analysis(),
+    }
+
+
+def run_tier(tier: str, stages: List[str], memory: bool = True, seed: int = 0) -> List[Dict]:
+    """
+    Esegue i benchmark di un livello di dimensione.
+    
+    Args:
+        tier: Chiave di TIERS (es. '100k')
+        stages: Fasi da misurare (sottoinsieme di STAGES)
+        memory: Misura anche il picco di memoria
+        seed: Seed del dataset sintetico
+    
+    Returns:
+        Lista di risultati (tier, stage, name, rows, seconds, peak_mb, error)
+    """
+    n_matches = TIERS[tier]
+    results = []
+    
+    def record(stage: str, name: str, func: Callable, setup: Callable = None):
+        entry = {'tier': tier, 'stage': stage, 'name': name, 'rows': n_matches}
+        try:
+            entry.update(measure(func, setup, memory))
+        except Exception as e:
+            entry.update({'seconds': None, 'peak_mb': None, 'error': f"{type(e).__name__}: {e}"})
+        results.append(entry)
+        timing = f"{entry['seconds']:.3f}s" if entry['seconds'] is not None else entry['error']
+        memory_info = f" | {entry['peak_mb']:.1f} MB" if entry.get('peak_mb') is not None else ""
+        print(f"  [{tier:>4}] {stage:14} {name:30} {timing}{memory_info}", flush=True)
+    
+    print(f"\n▶ Tier {tier}: generazione di {n_matches:,} match sintetici", flush=True)
+    df_raw = synthetic_matches(n_matches, seed)
+    
+    with tempfile.TemporaryDirectory(prefix='tennis_bench_') as tmp:
+        tmp = Path(tmp)
+        
+        if 'download_parse' in stages:
+            served = tmp / 'served'
+            served.mkdir()
+            years = df_raw['tourney_date'] // 10_000
+            for year, part in df_raw.groupby(years):
+                part.to_csv(served / f"atp_matches_{year}.csv", index=False)
+            
+            with serve_directory(served) as base_url:
+                def download():
+                    downloader = ATPDataDownloader()
+                    downloader.base_url = base_url
+                    downloader.raw_data_dir = tmp / 'downloaded'
+                    downloader.raw_data_dir.mkdir(exist_ok=True)
+                    return downloader.download_multiple_years(sorted(years.unique()))
+                
+                record('download_parse', 'download_multiple_years', download)
+        
+        cleaner = ATPDataCleaner()
+        if 'clean' in stages:
+            record('clean', 'process_pipeline', cleaner.process_pipeline, setup=df_raw.copy)
+        
+        if not {'analyzer', 'visualizer'} & set(stages):
+            return results
+        df_clean = cleaner.clean_data(df_raw.copy())
+        del df_raw
+        
+        if 'analyzer' in stages:
+            # Analyzer nuovo per ogni esecuzione: indici e cache inclusi nella misura
+            for name, case in _analyzer_cases(df_clean).items():
+                record('analyzer', name, case, setup=lambda: ATPAnalyzer(df_clean))
+        
+        if 'visualizer' in stages:
+            import matplotlib
+            matplotlib.use('Agg')
+            from tennis_analyzer.visualizer import ATPVisualizer
+            
+            analysis = ATPAnalyzer(df_clean).run_full_analysis()
+            visualizer = ATPVisualizer(output_dir=tmp / 'visuals')
+            plots = {
+                'plot_top_atp_days': lambda: visualizer.plot_top_atp_days(analysis['top_atp_days']),
+                'plot_total_wins': lambda: visualizer.plot_total_wins(analysis['total_wins']),
+                'plot_surface_performance': lambda: visualizer.plot_surface_performance(
+                    analysis['surface_performance']),
+                'plot_matches_distribution': lambda: visualizer.plot_matches_distribution(df_clean),
+                'plot_win_rate_analysis': lambda: visualizer.plot_win_rate_analysis(analysis['total_wins']),
+            }
+            for name, plot in plots.items():
+                record('visualizer', name, plot)
+    
+    return results
+
+
+# =====================================================
+# STORICO E CONFRONTO
+# =====================================================
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def append_history(results: List[Dict], history: Path) -> Dict:
+    """
+    Aggiunge un'esecuzione allo storico (una riga JSON per esecuzione).
+    
+    Returns:
+        Record dell'esecuzione salvato
+    """
+    run = {
+        'run_id': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    history.parent.mkdir(parents=True, exist_ok=True)
+    with open(history, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run) + '\n')
+    return run
+
+
+def load_history(history: Path) -> List[Dict]:
+    """Esecuzioni salvate, dalla più vecchia."""
+    if not history.exists():
+        return []
+    with open(history, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_runs(baseline: Dict, candidate: Dict, threshold: float = 0.10,
+                 min_seconds: float = 0.01) -> pd.DataFrame:
+    """
+    Confronta due esecuzioni caso per caso.
+    
+    Args:
+        baseline: Esecuzione di riferimento
+        candidate: Esecuzione da valutare
+        threshold: Aumento relativo oltre cui un caso è una regressione (0.10 = +10%)
+        min_seconds: Tempi sotto questa soglia non vengono segnalati (rumore)
+    
+    Returns:
+        DataFrame per caso con tempi, memoria, rapporti e flag regression
+    """
+    keys = ['tier', 'stage', 'name']
+    base = pd.DataFrame(baseline['results'])
+    cand = pd.DataFrame(candidate['results'])
+    if base.empty or cand.empty:
+        return pd.DataFrame()
+    table = base[keys + ['seconds', 'peak_mb']].merge(
+        cand[keys + ['seconds', 'peak_mb']], on=keys, suffixes=('_base', '_new')
+    )
+    
+    for metric in ('seconds', 'peak_mb'):
+        new, old = table[f'{metric}_new'].astype(float), table[f'{metric}_base'].astype(float)
+        table[f'{metric}_ratio'] = (new / old).round(3)
+    
+    slow = (table['seconds_ratio'] > 1 + threshold) & (table['seconds_new'].astype(float) >= min_seconds)
+    heavy = table['peak_mb_ratio'] > 1 + threshold
+    table['regression'] = slow | heavy
+    return table
+
+
+def _select_run(runs: List[Dict], ref: Optional[str], default: int) -> Dict:
+    """Esecuzione per run_id, commit o posizione (es. -1 = ultima)."""
+    if ref is None:
+        return runs[default]
+    for run in reversed(runs):
+        if ref in (run['run_id'], run.get('commit')):
+            return run
+    return runs[int(ref)]
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Tennis Stats Analyzer")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = commands.add_parser('run', help="Esegue i benchmark e aggiorna lo storico")
+    run_parser.add_argument('--tiers', default='10k,100k', help=f"Livelli tra {', '.join(TIERS)}")
+    run_parser.add_argument('--stages', default=','.join(STAGES), help=f"Fasi tra {', '.join(STAGES)}")
+    run_parser.add_argument('--no-memory', action='store_true', help="Non misura il picco di memoria")
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--history', type=Path, default=config.BENCHMARK_HISTORY)
+    
+    compare_parser = commands.add_parser('compare', help="Confronta due esecuzioni dello storico")
+    compare_parser.add_argument('--baseline', help="run_id, commit o indice (default: penultima)")
+    compare_parser.add_argument('--candidate', help="run_id, commit o indice (default: ultima)")
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="Aumento relativo segnalato come regressione (default 0.10)")
+    compare_parser.add_argument('--history', type=Path, default=config.BENCHMARK_HISTORY)
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'run':
+        tiers = [tier.strip() for tier in args.tiers.split(',')]
+        stages = [stage.strip() for stage in args.stages.split(',')]
+        unknown = [t for t in tiers if t not in TIERS] + [s for s in stages if s not in STAGES]
+        if unknown:
+            parser.error(f"Valori non validi: {', '.join(unknown)}")
+        
+        # Log delle singole analisi disattivati durante le misure
+        logging.disable(logging.INFO)
+        results = run_imports(memory=not args.no_memory) if 'import' in stages else []
+        for tier in tiers:
+            results.extend(run_tier(tier, stages, memory=not args.no_memory, seed=args.seed))
+        logging.disable(logging.NOTSET)
+        
+        run = append_history(results, args.history)
+        logger.info(f"✓ Esecuzione {run['run_id']} salvata in {args.history} ({len(results)} casi)")
+        return 0
+    
+    runs = load_history(args.history)
+    if len(runs) < 2 and (args.baseline is None or args.candidate is None):
+        logger.error(f"Servono almeno due esecuzioni in {args.history}")
+        return 2
+    
+    baseline = _select_run(runs, args.baseline, -2)
+    candidate = _select_run(runs, args.candidate, -1)
+    table = compare_runs(baseline, candidate, args.threshold)
+    if table.empty:
+        logger.warning("Nessun caso in comune tra le due esecuzioni")
+        return 0
+    
+    print(f"\nBaseline {baseline['run_id']} ({baseline.get('commit')}) → "
+          f"candidata {candidate['run_id']} ({candidate.get('commit')})\n")
+    columns = ['tier', 'stage', 'name', 'seconds_base', 'seconds_new', 'seconds_ratio',
+               'peak_mb_base', 'peak_mb_new', 'peak_mb_ratio', 'regression']
+    print(table[columns].to_string(index=False))
+    
+    regressions = table[table['regression']]
+    if regressions.empty:
+        logger.info(f"\n✓ Nessuna regressione oltre +{args.threshold:.0%}")
+        return 0
+    logger.warning(f"\n⚠ {len(regressions)} regressioni oltre +{args.threshold:.0%}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
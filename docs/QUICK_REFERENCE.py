@@ -81,6 +81,40 @@ from src.tennis_analyzer.analyzer import ATPAnalyzer
 
 analyzer = ATPAnalyzer(df_clean)
 
+# Query con pushdown: legge dal disco solo anni, colonne e righe richieste
+from src.tennis_analyzer.query import matches
+clay_slams = ATPAnalyzer(matches(years=range(2015, 2025), surfaces=['Clay'], levels=['Grand Slam', 'M']))
+
+# Out-of-core: aggregati calcolati a blocchi dal disco entro un limite di memoria
+big = ATPAnalyzer.out_of_core(matches(years=range(1968, 2025)), memory_limit_mb=256)
+big_results = big.run_full_analysis(start='2000-01-01')
+
+# Map-reduce su shard annuali: pool di processi, parziali scambiabili come file
+from src.tennis_analyzer.mapreduce import map_reduce, map_shards, reduce_partials
+history = ATPAnalyzer.from_aggregates(map_reduce(n_jobs=8))
+map_shards(years=range(1968, 1995), output_dir='/shared/partials')   # macchina A
+map_shards(years=range(1995, 2025), output_dir='/shared/partials')   # macchina B
+history = ATPAnalyzer.from_aggregates(reduce_partials('/shared/partials'))
+
+# Memoria condivisa: i worker si collegano per nome, senza copia del DataFrame
+from concurrent.futures import ProcessPoolExecutor
+def worker_total_wins(name):
+    return ATPAnalyzer.from_shared(name).analyze_total_wins()
+
+with analyzer.share() as shared:
+    with ProcessPoolExecutor(4) as pool:
+        wins = pool.submit(worker_total_wins, shared.name).result()
+
+# Archivio .npy mappato in memoria: apertura in millisecondi, pagine lette su richiesta
+from src.tennis_analyzer.store import MatchStore
+MatchStore.write(df_clean)                  # una volta, dopo il cleaning
+analyzer = ATPAnalyzer(MatchStore())        # config.MATCH_STORE_DIR
+
+# Modalità approssimata: campione stratificato (anno, superficie, livello) con intervalli
+approx = analyzer.approximate(confidence=0.95, seed=1)
+quick_wins = approx.analyze_total_wins(target_error=0.1)     # +-10% sul conteggio di un top player
+fast_surface = approx.analyze_surface_performance(time_budget=0.05)   # secondi
+
 # Analisi specifiche
 top_atp = analyzer.analyze_top_atp_days(top_n=20)
 top_wins = analyzer.analyze_total_wins(top_n=30)
@@ -88,6 +122,34 @@ surface_stats = analyzer.analyze_surface_performance(top_n=15)
 tournaments = analyzer.analyze_tournament_levels()
 dominators = analyzer.get_era_dominators()
 
+# Intervalli di confidenza bootstrap (95%) sul win rate, riproducibili con seed
+top_wins_ci = analyzer.analyze_total_wins(top_n=30, confidence=0.95, seed=42)
+serve_ci = analyzer.analyze_serve_return(sort_by='hold_pct', confidence=0.95, seed=42, n_jobs=4)
+
+# Leader per periodo (top-k, breakdown opzionale per superficie/livello)
+weekly_leaders = analyzer.get_era_leaders(period='rolling_52w', top_k=3)
+decade_by_surface = analyzer.get_era_leaders(period='decade', top_k=5, by='surface')
+
+# Serie di vittorie consecutive (più lunga e corrente), anche per superficie
+streaks = analyzer.analyze_streaks(top_n=10, by='surface')
+
+# Servizio/risposta: hold/break %, palle break, filtri per superficie, anno, ranking avversario
+serve = analyzer.analyze_serve_return(sort_by='break_pct', surface='Clay', opponent_rank=(1, 10))
+
+# Upset: griglia distanza di ranking x ranking favorito + report per dimensione
+upsets = analyzer.analyze_upsets(tournament=True)
+upsets['grid']
+upsets['round']
+
+# Simulazione tabellone (None = bye): probabilità di ogni turno e del titolo
+draw = ['Jannik Sinner', None, 'Casper Ruud', 'Holger Rune', 'Carlos Alcaraz', None, 'Alex De Minaur', 'Taylor Fritz']
+odds = analyzer.simulate_tournament(draw, n_simulations=1_000_000, source='elo', surface='Clay', seed=7)
+
+# Risultati lazy: ogni analisi calcolata solo al primo accesso (with rilascia i thread di prefetch)
+with analyzer.run_full_analysis(lazy=True) as results:
+    results.prefetch(['surface_performance'])
+    top_wins = results['total_wins']
+
 
 # ✅ Visualizzazioni Custom
 from src.tennis_analyzer.visualizer import ATPVisualizer
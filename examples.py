@@ -74,65 +74,60 @@ def example_2_custom_cleaning():
 # ================================================================
 # EXAMPLE 3: Analisi di un giocatore specifico
 # ================================================================
-def example_3_player_analysis(df: 'pd.DataFrame', player_name: str):
-    """Analizza statistiche di un giocatore"""
+def example_3_player_analysis(analyzer: ATPAnalyzer, player_name: str):
+    """Analizza statistiche di un giocatore (solo le sue righe, via indice)"""
     logger.info(f"EXAMPLE 3: Analisi giocatore {player_name}")
     
-    # Vittorie come winner
-    wins = df[df['winner_name'] == player_name].copy()
+    profile = analyzer.player_profile(player_name)
+    wins, losses = profile['wins'], profile['losses']
     
-    # Sconfitte come loser
-    losses = df[df['loser_name'] == player_name].copy()
-    
-    logger.info(f"  Vittorie: {len(wins)}")
-    logger.info(f"  Sconfitte: {len(losses)}")
-    logger.info(f"  Win rate: {len(wins)/(len(wins)+len(losses))*100:.1f}%")
+    logger.info(f"  Vittorie: {wins}")
+    logger.info(f"  Sconfitte: {losses}")
+    logger.info(f"  Win rate: {profile['win_rate']*100:.1f}%")
     
     # Performance per superficie
     for surface in ['Hard', 'Clay', 'Grass']:
-        surface_wins = wins[wins['surface'] == surface]
-        surface_losses = losses[losses['surface'] == surface]
-        total = len(surface_wins) + len(surface_losses)
+        surface_wins, surface_losses = profile['by_surface'].get(surface, (0, 0))
+        total = surface_wins + surface_losses
         if total > 0:
-            rate = len(surface_wins) / total * 100
-            logger.info(f"  {surface}: {len(surface_wins)}-{len(surface_losses)} ({rate:.0f}%)")
+            rate = surface_wins / total * 100
+            logger.info(f"  {surface}: {surface_wins}-{surface_losses} ({rate:.0f}%)")
     
     # Grand Slams
-    gs_wins = wins[wins['tourney_level_name'] == 'Grand Slam']
-    logger.info(f"  Grand Slam Wins: {len(gs_wins)}")
+    logger.info(f"  Grand Slam Wins: {profile['grand_slam_wins']}")
     
     return {
-        'wins': len(wins),
-        'losses': len(losses),
-        'win_rate': len(wins) / (len(wins) + len(losses)) if len(wins) + len(losses) > 0 else 0,
-        'grand_slam_wins': len(gs_wins)
+        'wins': wins,
+        'losses': losses,
+        'win_rate': profile['win_rate'],
+        'grand_slam_wins': profile['grand_slam_wins']
     }
 
 
 # ================================================================
 # EXAMPLE 4: Confronto head-to-head
 # ================================================================
-def example_4_head_to_head(df: 'pd.DataFrame', player1: str, player2: str):
-    """Confronta head-to-head tra due giocatori"""
+def example_4_head_to_head(analyzer: ATPAnalyzer, player1: str, player2: str):
+    """Confronta head-to-head tra due giocatori (indice precalcolato)"""
     logger.info(f"EXAMPLE 4: Head-to-head {player1} vs {player2}")
     
-    # Match dove player1 ha vinto
-    p1_wins = df[(df['winner_name'] == player1) & (df['loser_name'] == player2)]
-    
-    # Match dove player2 ha vinto
-    p2_wins = df[(df['winner_name'] == player2) & (df['loser_name'] == player1)]
+    h2h = analyzer.head_to_head(player1, player2)
     
-    logger.info(f"  {player1}: {len(p1_wins)} vittorie")
-    logger.info(f"  {player2}: {len(p2_wins)} vittorie")
+    logger.info(f"  {player1}: {h2h['player1_wins']} vittorie")
+    logger.info(f"  {player2}: {h2h['player2_wins']} vittorie")
     
-    if not p1_wins.empty or not p2_wins.empty:
-        logger.info(f"  Record: {len(p1_wins)}-{len(p2_wins)}")
-        logger.info(f"  Ultimi match: {p1_wins['tourney_date'].max() if not p1_wins.empty else p2_wins['tourney_date'].max()}")
+    if h2h['total'] > 0:
+        logger.info(f"  Record: {h2h['player1_wins']}-{h2h['player2_wins']}")
+        for surface, (w1, w2) in h2h['by_surface'].items():
+            logger.info(f"    {surface}: {w1}-{w2}")
+        
+        matches = analyzer.head_to_head_matches(player1, player2)
+        logger.info(f"  Ultimi match: {matches['tourney_date'].max()}")
     
     return {
-        'player1_wins': len(p1_wins),
-        'player2_wins': len(p2_wins),
-        'recent_matches': len(p1_wins) + len(p2_wins)
+        'player1_wins': h2h['player1_wins'],
+        'player2_wins': h2h['player2_wins'],
+        'recent_matches': h2h['total']
     }
 
 
@@ -181,6 +176,7 @@ def example_6_custom_visualization(df: 'pd.DataFrame'):
     ax.invert_yaxis()
     
     output_path = config.VISUALS_DIR / "custom_top10.png"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
     plt.savefig(output_path, dpi=300, bbox_inches='tight')
     logger.info(f"  Salvato: {output_path}")
     plt.close()
@@ -189,30 +185,16 @@ def example_6_custom_visualization(df: 'pd.DataFrame'):
 # ================================================================
 # EXAMPLE 7: Export statistics to CSV
 # ================================================================
-def example_7_export_statistics(df: 'pd.DataFrame'):
+def example_7_export_statistics(analyzer: ATPAnalyzer):
     """Esporta statistiche custom in CSV"""
     logger.info("EXAMPLE 7: Export statistiche")
     
-    # Player stats
-    player_stats = []
-    
-    for player in df['winner_name'].unique()[:100]:  # Top 100
-        wins = len(df[df['winner_name'] == player])
-        losses = len(df[df['loser_name'] == player])
-        
-        if wins + losses >= 20:  # Minimo match
-            player_stats.append({
-                'player': player,
-                'wins': wins,
-                'losses': losses,
-                'total_matches': wins + losses,
-                'win_rate': wins / (wins + losses),
-                'tournaments': df[df['winner_name'] == player]['tourney_name'].nunique()
-            })
-    
-    stats_df = pd.DataFrame(player_stats).sort_values('win_rate', ascending=False)
+    # Profili di tutti i giocatori in un solo passaggio
+    stats_df = analyzer.player_profiles(min_matches=20)  # Minimo match
+    stats_df = stats_df.sort_values('win_rate', ascending=False)
     
     output_path = config.OUTPUT_DIR / "player_statistics.csv"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
     stats_df.to_csv(output_path, index=False)
     logger.info(f"  Salvato: {output_path}")
     logger.info(f"  Record esportati: {len(stats_df)}")
@@ -245,14 +227,19 @@ if __name__ == "__main__":
     # example_2_custom_cleaning()
     
     if not df_clean.empty:
+        analyzer = ATPAnalyzer(df_clean)
+        
         logger.info("\nRunning player analysis examples...\n")
-        example_3_player_analysis(df_clean, "Novak Djokovic")
-        example_3_player_analysis(df_clean, "Rafael Nadal")
+        example_3_player_analysis(analyzer, "Novak Djokovic")
+        example_3_player_analysis(analyzer, "Rafael Nadal")
         
         logger.info("\n" + "="*60)
         logger.info("Head-to-head examples:\n")
-        example_4_head_to_head(df_clean, "Novak Djokovic", "Rafael Nadal")
-        example_4_head_to_head(df_clean, "Roger Federer", "Novak Djokovic")
+        example_4_head_to_head(analyzer, "Novak Djokovic", "Rafael Nadal")
+        example_4_head_to_head(analyzer, "Roger Federer", "Novak Djokovic")
+        
+        big4 = ["Novak Djokovic", "Rafael Nadal", "Roger Federer", "Andy Murray"]
+        logger.info(f"\n  Matrice H2H:\n{analyzer.head_to_head_matrix(big4)}")
         
         logger.info("\n" + "="*60)
         example_5_temporal_analysis(df_clean)
@@ -261,6 +248,6 @@ if __name__ == "__main__":
         example_6_custom_visualization(df_clean)
         
         logger.info("\n" + "="*60)
-        example_7_export_statistics(df_clean)
+        example_7_export_statistics(analyzer)
     
     logger.info("\n✅ Tutti gli esempi completati!")
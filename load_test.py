@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Load test del servizio di query - Tennis Stats Analyzer
+Invia richieste concorrenti (connessioni keep-alive, un client per thread)
+a un servizio avviato con serve.py e riporta throughput e latenze p50/p90/p99,
+in totale, per risposte dalla cache e calcolate.
+
+Uso:
+    python load_test.py --requests 2000 --concurrency 16
+    python load_test.py --dataset output/clean_data.csv   # servizio avviato in questo processo
+"""
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+
+# Aggiungere src al path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from tennis_analyzer.logger import setup_logger
+from tennis_analyzer import config
+
+logger = setup_logger(__name__)
+
+
+class Client:
+    """Connessione HTTP persistente verso il servizio."""
+    
+    def __init__(self, url: str, timeout: float = 60):
+        parts = urlsplit(url)
+        self.host, self.port, self.timeout = parts.hostname, parts.port or 80, timeout
+        self.connection = None
+    
+    def get(self, path: str):
+        """(status, X-Cache, corpo) di una GET, riaprendo la connessione se chiusa."""
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request('GET', path)
+                response = self.connection.getresponse()
+                return response.status, response.getheader('X-Cache'), response.read()
+            except (http.client.HTTPException, ConnectionError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+
+def default_paths(url: str, players: int = 10) -> List[str]:
+    """
+    Mix di richieste: tutte le analisi con parametri di default, profili e
+    timeline dei primi giocatori per vittorie e head-to-head tra loro.
+    """
+    client = Client(url)
+    _, _, body = client.get('/analyses')
+    paths = [f"/analyses/{name}" for name in json.loads(body)]
+    
+    _, _, body = client.get(f"/analyses/total_wins?top_n={players}")
+    names = [row['player_name'] for row in json.loads(body)]
+    for name in names:
+        paths += [f"/players/{quote(name)}", f"/players/{quote(name)}/timeline"]
+    paths += [f"/h2h?player1={quote(a)}&player2={quote(b)}" for a, b in combinations(names[:5], 2)]
+    return paths
+
+
+def run_load(url: str, paths: List[str], n_requests: int, concurrency: int) -> Dict:
+    """
+    Esegue n_requests richieste (a rotazione su paths) con concurrency thread.
+    
+    Returns:
+        Dict con durata, throughput, errori e latenze (ms) per gruppo
+    """
+    local = threading.local()
+    
+    def request(i: int):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client(url)
+        started = time.perf_counter()
+        try:
+            status, cache, _ = client.get(paths[i % len(paths)])
+        except (OSError, http.client.HTTPException):
+            status, cache = None, None
+        return (time.perf_counter() - started) * 1000, status, cache
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(request, range(n_requests)))
+    elapsed = time.perf_counter() - started
+    
+    latencies = np.array([latency for latency, _, _ in results])
+    statuses = np.array([status or 0 for _, status, _ in results])
+    caches = np.array([cache or '' for _, _, cache in results])
+    
+    def summary(mask: np.ndarray) -> Optional[Dict]:
+        if not mask.any():
+            return None
+        values = latencies[mask]
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        return {'count': int(mask.sum()), 'p50_ms': round(p50, 3), 'p90_ms': round(p90, 3),
+                'p99_ms': round(p99, 3), 'max_ms': round(values.max(), 3)}
+    
+    ok = statuses == 200
+    return {
+        'requests': n_requests,
+        'concurrency': concurrency,
+        'distinct_paths': len(set(paths)),
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(n_requests / elapsed, 1),
+        'errors': int((~ok).sum()),
+        'latency': {
+            'all': summary(ok),
+            'cache_hit': summary(ok & (caches == 'hit')),
+            'cache_miss': summary(ok & (caches == 'miss')),
+        },
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test del servizio di query")
+    parser.add_argument('--url', default=f"http://{config.SERVICE_HOST}:{config.SERVICE_PORT}")
+    parser.add_argument('--dataset', type=Path,
+                        help="Avvia il servizio in questo processo su questo dataset (porta libera)")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--paths', help="Percorsi separati da virgola (default: mix di analisi, giocatori, h2h)")
+    parser.add_argument('--no-cache', action='store_true', help="Con --dataset, servizio senza cache")
+    parser.add_argument('--json', action='store_true', help="Stampa il risultato in JSON")
+    args = parser.parse_args(argv)
+    
+    server = None
+    if args.dataset is not None:
+        from tennis_analyzer.service import QueryService, make_server
+        
+        service = QueryService(args.dataset, cache_size=0 if args.no_cache else config.SERVICE_CACHE_SIZE,
+                               reload_interval=0)
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    
+    try:
+        paths = args.paths.split(',') if args.paths else default_paths(args.url)
+        logger.info("Load test: %d richieste, %d thread, %d percorsi su %s",
+                    args.requests, args.concurrency, len(set(paths)), args.url)
+        result = run_load(args.url, paths, args.requests, args.concurrency)
+    except (OSError, http.client.HTTPException) as e:
+        logger.error("❌ Servizio non raggiungibile su %s: %s", args.url, e)
+        return 1
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"\n{result['requests']} richieste in {result['seconds']}s "
+              f"({result['throughput_rps']} req/s, {result['errors']} errori)")
+        for group, stats in result['latency'].items():
+            if stats is not None:
+                print(f"  {group:10} n={stats['count']:6}  p50 {stats['p50_ms']:8.2f} ms  "
+                      f"p90 {stats['p90_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  max {stats['max_ms']:8.2f} ms")
+    return 0 if result['errors'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,17 @@
 """
 Entry point principale - Tennis Stats Analyzer
 Orchestrazione completa della pipeline: download → cleaning → analisi → visualizzazione
+
+La pipeline è un grafo di stadi (pipeline.build_pipeline) con checkpoint:
+gli stadi aggiornati vengono saltati e quelli indipendenti girano in
+parallelo. Esempi:
+    
+    python main.py                                    # tutto, riprendendo dai checkpoint
+    python main.py --targets '*/surface_performance'  # solo analisi e grafico per superficie
+    python main.py --force 'plot/*'                   # rigenera i grafici
+    python main.py --list-stages
 """
+import argparse
 import sys
 from pathlib import Path
 
@@ -10,95 +20,96 @@ from pathlib import Path
 src_path = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_path))
 
-from tennis_analyzer.logger import setup_logger
-from tennis_analyzer.downloader import ATPDataDownloader
-from tennis_analyzer.cleaner import ATPDataCleaner
-from tennis_analyzer.analyzer import ATPAnalyzer
-from tennis_analyzer.visualizer import ATPVisualizer
+from tennis_analyzer.logger import configure_logging, setup_logger
+from tennis_analyzer.pipeline import build_pipeline
+from tennis_analyzer.profiling import PipelineProfiler
 from tennis_analyzer import config
 
 # Logger globale
 logger = setup_logger(__name__)
 
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    """Opzioni da riga di comando."""
+    parser = argparse.ArgumentParser(description="Tennis Stats Analyzer - ATP Data Pipeline")
+    parser.add_argument('--profile', nargs='?', const=config.PROFILE_REPORT, type=Path, metavar='REPORT',
+                        help=f"Profilo per stadio e per metodo in JSON (default: {config.PROFILE_REPORT})")
+    parser.add_argument('--cprofile', action='store_true',
+                        help=f"Con --profile, dump cProfile per stadio in {config.PROFILE_DIR}")
+    parser.add_argument('--no-trace-memory', action='store_true',
+                        help="Con --profile, non traccia il picco di memoria (tempi più fedeli)")
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                        help="Formato del log: testo o JSON lines")
+    parser.add_argument('--targets', type=lambda s: s.split(','), metavar='STAGES',
+                        help="Stadi da produrre, separati da virgola (nomi o pattern, es. '*/surface_performance')")
+    parser.add_argument('--jobs', type=int, default=config.PIPELINE_WORKERS,
+                        help="Thread per gli stadi indipendenti")
+    parser.add_argument('--force', nargs='?', const=['*'], type=lambda s: s.split(','), metavar='STAGES',
+                        help="Riesegue gli stadi indicati anche se aggiornati (senza valore: tutti)")
+    parser.add_argument('--list-stages', action='store_true',
+                        help="Elenca gli stadi (✓ aggiornato, ▶ da eseguire) senza eseguirli")
+    parser.add_argument('--log-results', action='store_true',
+                        help="Registra le tabelle di risultati riga per riga (default: solo riepilogo)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """
     Pipeline principale: scarica, pulisce, analizza, visualizza dati ATP.
+    
+    Args:
+        argv: Argomenti da riga di comando (default: sys.argv)
     """
+    args = parse_args(argv)
+    configure_logging(structured=args.log_format == 'json', results=args.log_results)
+    profiler = PipelineProfiler(
+        enabled=args.profile is not None,
+        memory=not args.no_trace_memory,
+        cprofile_dir=config.PROFILE_DIR if args.cprofile else None,
+    )
+    
     logger.info("\n" + "="*70)
     logger.info("  TENNIS STATS ANALYZER - ATP Data Pipeline")
     logger.info("  Data Engineer: Professional Analysis Framework")
     logger.info("="*70)
     
+    pipeline = build_pipeline()
     try:
-        # =====================================================
-        # STEP 1: DOWNLOAD DATA
-        # =====================================================
-        logger.info("\n" + "▶"*35)
-        logger.info("STEP 1: DOWNLOAD ATP DATA")
-        logger.info("▶"*35)
-        
-        downloader = ATPDataDownloader()
-        df_raw = downloader.get_consolidated_data(use_local=True)
-        
-        if df_raw.empty:
-            logger.error("❌ Errore: Nessun dato scaricato")
-            return False
-        
-        logger.info(f"\n✓ Raw data caricati: {len(df_raw)} record")
-        logger.info(f"  Data range: {df_raw['tourney_date'].min()} → {df_raw['tourney_date'].max()}")
-        
-        # =====================================================
-        # STEP 2: DATA CLEANING
-        # =====================================================
-        logger.info("\n" + "▶"*35)
-        logger.info("STEP 2: DATA CLEANING & NORMALIZATION")
-        logger.info("▶"*35)
-        
-        cleaner = ATPDataCleaner()
-        df_clean = cleaner.process_pipeline(df_raw)
-        
-        if df_clean.empty:
-            logger.error("❌ Errore: Cleaning fallito")
-            return False
-        
-        # Salvare dataset pulito
-        clean_csv_path = config.CLEAN_DATA_CSV
-        df_clean.to_csv(clean_csv_path, index=False)
-        logger.info(f"\n✓ Dataset pulito salvato: {clean_csv_path}")
-        logger.info(f"  Dimensione finale: {len(df_clean)} record")
-        logger.info(f"  Colonne: {df_clean.shape[1]}")
-        
-        # =====================================================
-        # STEP 3: EXPLORATORY DATA ANALYSIS
-        # =====================================================
-        logger.info("\n" + "▶"*35)
-        logger.info("STEP 3: EXPLORATORY DATA ANALYSIS (EDA)")
-        logger.info("▶"*35)
-        
-        analyzer = ATPAnalyzer(df_clean)
-        analysis_results = analyzer.run_full_analysis()
-        
-        # =====================================================
-        # STEP 4: VISUALIZATION
-        # =====================================================
-        logger.info("\n" + "▶"*35)
-        logger.info("STEP 4: GENERATE VISUALIZATIONS")
-        logger.info("▶"*35)
-        
-        visualizer = ATPVisualizer()
-        visualizer.generate_all_plots(df_clean, analysis_results)
+        pipeline.select(args.targets)
+    except ValueError as e:
+        logger.error("❌ %s (vedi --list-stages)", e)
+        return False
+    
+    if args.list_stages:
+        status = pipeline.plan(args.targets)
+        for name, up_to_date in status.items():
+            deps = ', '.join(pipeline.stages[name].deps)
+            print(f"{'✓' if up_to_date else '▶'} {name:40} {deps}")
+        return True
+    
+    # Con il profilo gli stadi girano in sequenza (misure per stadio affidabili)
+    jobs = 1 if profiler.enabled else args.jobs
+    
+    try:
+        report = pipeline.run(args.targets, jobs=jobs, force=args.force, profiler=profiler)
+        failed = [name for name, state in report.items() if state['status'] in ('failed', 'blocked')]
         
         # =====================================================
         # SUMMARY
         # =====================================================
         logger.info("\n" + "="*70)
+        if failed:
+            logger.error("  PIPELINE INCOMPLETA: %d stadi non eseguiti (%s)", len(failed), ', '.join(failed))
+            logger.error("  Rieseguire main.py: gli stadi completati verranno saltati")
+            logger.info("="*70)
+            return False
         logger.info("  PIPELINE COMPLETED SUCCESSFULLY")
         logger.info("="*70)
         
         logger.info("\n📊 OUTPUT SUMMARY:")
-        logger.info(f"  Clean Data (CSV): {clean_csv_path}")
-        logger.info(f"  Visualizations (PNG):")
+        if config.CLEAN_DATA_CSV.exists():
+            logger.info("  Clean Data (CSV): %s", config.CLEAN_DATA_CSV)
+        logger.info("  Visualizations (PNG):")
         
         visuals = [
             config.RANKING_EVOLUTION_PNG,
@@ -110,18 +121,24 @@ def main():
         
         for viz_file in visuals:
             if viz_file.exists():
-                logger.info(f"    ✓ {viz_file.name}")
+                logger.info("    ✓ %s", viz_file.name)
         
         logger.info("\n📁 Output Directory:")
-        logger.info(f"  {config.OUTPUT_DIR}")
+        logger.info("  %s", config.OUTPUT_DIR)
         
         logger.info("\n✅ Analysis Ready for Presentation/Reporting!")
         
         return True
     
     except Exception as e:
-        logger.error(f"\n❌ ERRORE CRITICO: {e}", exc_info=True)
+        logger.error("\n❌ ERRORE CRITICO: %s", e, exc_info=True)
         return False
+    
+    finally:
+        # Report scritto anche se la pipeline si interrompe
+        if profiler.enabled:
+            profiler.log_summary()
+            profiler.write(args.profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Servizio di query locale - Tennis Stats Analyzer
+Carica una volta il dataset pulito e i suoi indici e risponde in JSON alle
+query (analisi, profili giocatore, head-to-head), con cache delle risposte
+e ricarica a caldo quando il dataset su disco cambia.
+
+Uso:
+    python serve.py                                  # output/clean_data.csv su 127.0.0.1:8765
+    python serve.py --dataset data/processed/match_store --port 9000
+    curl 'http://127.0.0.1:8765/analyses/total_wins?top_n=5'
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Aggiungere src al path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+from tennis_analyzer.logger import setup_logger
+from tennis_analyzer.service import QueryService, make_server
+from tennis_analyzer import config
+
+logger = setup_logger(__name__)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Servizio di query Tennis Stats Analyzer")
+    parser.add_argument('--dataset', type=Path, default=config.CLEAN_DATA_CSV,
+                        help="clean_data.csv o cartella di un MatchStore")
+    parser.add_argument('--host', default=config.SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=config.SERVICE_PORT)
+    parser.add_argument('--cache-size', type=int, default=config.SERVICE_CACHE_SIZE,
+                        help="Risposte in cache (0 = disattivata)")
+    parser.add_argument('--reload-interval', type=float, default=config.SERVICE_RELOAD_INTERVAL,
+                        help="Secondi tra i controlli di una nuova versione (0 = nessuna ricarica)")
+    args = parser.parse_args(argv)
+    
+    try:
+        service = QueryService(args.dataset, cache_size=args.cache_size, reload_interval=args.reload_interval)
+    except FileNotFoundError as e:
+        logger.error("❌ %s (eseguire prima main.py o indicare --dataset)", e)
+        return 1
+    
+    server = make_server(service, args.host, args.port)
+    service.start_watching()
+    host, port = server.server_address[:2]
+    logger.info("🎾 Servizio in ascolto su http://%s:%d (Ctrl+C per terminare)", host, port)
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Arresto del servizio...")
+    finally:
+        service.stop_watching()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
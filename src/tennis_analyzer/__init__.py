@@ -1,22 +1,52 @@
 """
 Tennis Stats Analyzer - Pacchetto principale
+
+I sottomoduli vengono importati al primo accesso ai nomi esportati:
+`import tennis_analyzer` non carica pandas, matplotlib o seaborn finché
+non servono.
 """
+import importlib
+from typing import TYPE_CHECKING
 
 __version__ = "0.1.0"
 __author__ = "Data Analyst"
 
-from .logger import setup_logger
-from .downloader import ATPDataDownloader, download_atp_data
-from .cleaner import ATPDataCleaner, clean_atp_data
-from .analyzer import ATPAnalyzer
-from .visualizer import ATPVisualizer
-
-__all__ = [
-    'setup_logger',
-    'ATPDataDownloader',
-    'download_atp_data',
-    'ATPDataCleaner',
-    'clean_atp_data',
-    'ATPAnalyzer',
-    'ATPVisualizer',
-]
+# Nome esportato -> sottomodulo che lo definisce
+_EXPORTS = {
+    'setup_logger': 'logger',
+    'ATPDataDownloader': 'downloader',
+    'download_atp_data': 'downloader',
+    'ATPDataCleaner': 'cleaner',
+    'clean_atp_data': 'cleaner',
+    'ATPAnalyzer': 'analyzer',
+    'LazyAnalysisResults': 'analyzer',
+    'ATPVisualizer': 'visualizer',
+    'EloRatingEngine': 'ratings',
+    'MatchQuery': 'query',
+    'matches': 'query',
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .logger import setup_logger
+    from .downloader import ATPDataDownloader, download_atp_data
+    from .cleaner import ATPDataCleaner, clean_atp_data
+    from .analyzer import ATPAnalyzer, LazyAnalysisResults
+    from .visualizer import ATPVisualizer
+    from .ratings import EloRatingEngine
+    from .query import MatchQuery, matches
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    # Salvato nel modulo: gli accessi successivi non passano da __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
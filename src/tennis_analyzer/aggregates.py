@@ -0,0 +1,258 @@
+"""
+Aggregati parziali e combinabili dei match ATP
+
+Gli aggregati di un insieme di match (contatori vittorie/sconfitte, breakdown
+per superficie e livello, vittorie per anno e torneo, periodi da n.1) si
+possono calcolare su porzioni disgiunte del dataset e combinare con merge(),
+ottenendo lo stesso risultato del calcolo sull'intero dataset.
+"""
+import pickle
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from .encoding import decode_labels
+
+logger = setup_logger(__name__)
+
+
+PLAYER_COUNTERS = ['wins', 'losses', 'grand_slam_wins', 'hard_court_wins']
+RANK1_COLUMNS = ['first_rank1_date', 'last_rank1_date', 'matches_as_rank1', 'grand_slam_as_rank1']
+# tourney_name mancante: la vittoria conta, il torneo no (come nunique)
+NO_TOURNEY = ''
+
+
+def _add_counts(left: pd.Series, right: pd.Series) -> pd.Series:
+    """Somma due contatori allineando gli indici (chiavi mancanti = 0)."""
+    if left.empty:
+        return right.copy()
+    if right.empty:
+        return left.copy()
+    return left.add(right, fill_value=0).astype('int64').sort_index()
+
+
+class MatchAggregates:
+    """Aggregati combinabili su un insieme di match puliti"""
+    
+    def __init__(self, players: pd.DataFrame, surface_wins: pd.Series, surface_losses: pd.Series,
+                 level_counts: pd.Series, year_tourney_wins: pd.Series, rank1: pd.DataFrame,
+                 n_matches: int):
+        """
+        Inizializza aggregati (usare from_frame/empty per costruirli).
+        
+        Args:
+            players: Contatori per giocatore (PLAYER_COUNTERS), indice = nome
+            surface_wins: Vittorie per (surface, giocatore)
+            surface_losses: Sconfitte per (surface, giocatore)
+            level_counts: Match per tourney_level_name
+            year_tourney_wins: Vittorie per (year, giocatore, torneo)
+            rank1: Periodo e match vinti da n.1 per giocatore (RANK1_COLUMNS)
+            n_matches: Numero di match aggregati
+        """
+        self.players = players
+        self.surface_wins = surface_wins
+        self.surface_losses = surface_losses
+        self.level_counts = level_counts
+        self.year_tourney_wins = year_tourney_wins
+        self.rank1 = rank1
+        self.n_matches = n_matches
+    
+    @classmethod
+    def empty(cls) -> 'MatchAggregates':
+        """Aggregati neutri rispetto a merge()."""
+        def counts(names):
+            index = pd.MultiIndex.from_arrays([[]] * len(names), names=names) if len(names) > 1 \
+                else pd.Index([], name=names[0])
+            return pd.Series(np.zeros(0, dtype='int64'), index=index)
+        
+        return cls(
+            players=pd.DataFrame(columns=PLAYER_COUNTERS, index=pd.Index([], name='player_name'), dtype='int64'),
+            surface_wins=counts(['surface', 'player_name']),
+            surface_losses=counts(['surface', 'player_name']),
+            level_counts=counts(['tourney_level_name']),
+            year_tourney_wins=counts(['year', 'player_name', 'tourney_name']),
+            rank1=pd.DataFrame(columns=RANK1_COLUMNS, index=pd.Index([], name='player_name')),
+            n_matches=0,
+        )
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'MatchAggregates':
+        """
+        Calcola gli aggregati di un DataFrame pulito.
+        
+        Args:
+            df: DataFrame pulito da cleaner (o una sua porzione)
+        
+        Returns:
+            MatchAggregates del DataFrame
+        """
+        if df.empty:
+            return cls.empty()
+        
+        winners = df['winner_name']
+        losers = df['loser_name']
+        is_grand_slam = (df['tourney_level_name'] == 'Grand Slam').astype('int64')
+        is_hard = (df['surface'] == 'Hard').astype('int64')
+        
+        players = pd.DataFrame({
+            'wins': winners.groupby(winners).size(),
+            'losses': losers.groupby(losers).size(),
+            'grand_slam_wins': is_grand_slam.groupby(winners).sum(),
+            'hard_court_wins': is_hard.groupby(winners).sum(),
+        }).fillna(0).astype('int64')
+        players.index.name = 'player_name'
+        
+        surface_wins = df.groupby(['surface', 'winner_name']).size()
+        surface_wins.index.names = ['surface', 'player_name']
+        surface_losses = df.groupby(['surface', 'loser_name']).size()
+        surface_losses.index.names = ['surface', 'player_name']
+        
+        level_counts = df.groupby('tourney_level_name').size()
+        
+        tourney = df['tourney_name']
+        if tourney.hasnans:
+            if isinstance(tourney.dtype, pd.CategoricalDtype) and NO_TOURNEY not in tourney.cat.categories:
+                tourney = tourney.cat.add_categories([NO_TOURNEY])
+            tourney = tourney.fillna(NO_TOURNEY)
+        year_tourney_wins = df.groupby([df['year'], df['winner_name'], tourney]).size()
+        year_tourney_wins.index.names = ['year', 'player_name', 'tourney_name']
+        
+        rank1_mask = df['winner_rank'] == 1.0
+        rank1 = df.loc[rank1_mask, ['winner_name', 'tourney_date']].assign(
+            grand_slam=is_grand_slam[rank1_mask]
+        ).groupby('winner_name').agg(
+            first_rank1_date=('tourney_date', 'min'),
+            last_rank1_date=('tourney_date', 'max'),
+            matches_as_rank1=('tourney_date', 'count'),
+            grand_slam_as_rank1=('grand_slam', 'sum'),
+        )
+        rank1.index.name = 'player_name'
+        
+        # Chiavi Categorical (dataset condiviso o MatchStore) come etichette semplici
+        return cls(
+            players=decode_labels(players),
+            surface_wins=decode_labels(surface_wins),
+            surface_losses=decode_labels(surface_losses),
+            level_counts=decode_labels(level_counts),
+            year_tourney_wins=decode_labels(year_tourney_wins),
+            rank1=decode_labels(rank1),
+            n_matches=len(df),
+        )
+    
+    def merge(self, other: 'MatchAggregates') -> 'MatchAggregates':
+        """
+        Combina con gli aggregati di un insieme di match disgiunto.
+        
+        Args:
+            other: Aggregati da combinare
+        
+        Returns:
+            Nuovi MatchAggregates (operazione associativa e commutativa)
+        """
+        if other.players.empty:
+            players = self.players.copy()
+        elif self.players.empty:
+            players = other.players.copy()
+        else:
+            players = self.players.add(other.players, fill_value=0).astype('int64').sort_index()
+        
+        rank1_parts = [part for part in (self.rank1, other.rank1) if not part.empty]
+        if len(rank1_parts) == 2:
+            rank1 = pd.concat(rank1_parts).groupby(level=0).agg({
+                'first_rank1_date': 'min',
+                'last_rank1_date': 'max',
+                'matches_as_rank1': 'sum',
+                'grand_slam_as_rank1': 'sum',
+            })
+        else:
+            rank1 = rank1_parts[0].copy() if rank1_parts else self.rank1.copy()
+        
+        return MatchAggregates(
+            players=players,
+            surface_wins=_add_counts(self.surface_wins, other.surface_wins),
+            surface_losses=_add_counts(self.surface_losses, other.surface_losses),
+            level_counts=_add_counts(self.level_counts, other.level_counts),
+            year_tourney_wins=_add_counts(self.year_tourney_wins, other.year_tourney_wins),
+            rank1=rank1,
+            n_matches=self.n_matches + other.n_matches,
+        )
+    
+    def year_leaders(self) -> pd.DataFrame:
+        """
+        Vittorie e tornei distinti per (year, giocatore).
+        
+        Returns:
+            DataFrame con year, player_name, wins, tournaments
+        """
+        per_tourney = self.year_tourney_wins.reset_index(name='wins')
+        per_tourney['named'] = (per_tourney['tourney_name'] != NO_TOURNEY).astype('int64')
+        return per_tourney.groupby(['year', 'player_name']).agg(
+            wins=('wins', 'sum'),
+            tournaments=('named', 'sum'),
+        ).reset_index()
+    
+    def save(self, path: Path) -> Path:
+        """
+        Salva gli aggregati (pickle) per lo scambio tra processi o macchine.
+        
+        Args:
+            path: File di destinazione
+        
+        Returns:
+            Percorso salvato
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Rename atomico: chi legge la cartella non vede file parziali
+        tmp.replace(path)
+        return path
+    
+    @classmethod
+    def load(cls, path: Path) -> 'MatchAggregates':
+        """
+        Carica aggregati salvati con save() (solo file di provenienza fidata).
+        
+        Args:
+            path: File salvato con save()
+        
+        Returns:
+            MatchAggregates
+        """
+        with open(path, 'rb') as f:
+            aggregates = pickle.load(f)
+        if not isinstance(aggregates, cls):
+            raise TypeError(f"{path} non contiene MatchAggregates")
+        return aggregates
+
+
+def merge_all(partials: Iterable[MatchAggregates]) -> MatchAggregates:
+    """
+    Combina aggregati parziali con merge ad albero (contatore binario).
+    
+    Ogni parziale partecipa a O(log n) merge e restano in memoria O(log n)
+    risultati intermedi, quindi partials può essere un generatore.
+    
+    Args:
+        partials: Aggregati di insiemi di match disgiunti
+    
+    Returns:
+        MatchAggregates complessivi (empty() se partials è vuoto)
+    """
+    stack: List[Tuple[int, MatchAggregates]] = []
+    for partial in partials:
+        level = 0
+        while stack and stack[-1][0] == level:
+            partial = stack.pop()[1].merge(partial)
+            level += 1
+        stack.append((level, partial))
+    
+    result = MatchAggregates.empty()
+    for _, partial in stack:
+        result = result.merge(partial)
+    return result
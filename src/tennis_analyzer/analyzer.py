@@ -1,29 +1,719 @@
 """
 Modulo per analisi esplorative (EDA) del dataset ATP
 """
+import functools
+import threading
+import weakref
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
 
-from .logger import setup_logger
+from .logger import log_rows, results_enabled, setup_logger
+from .aggregates import MatchAggregates
+from .approximate import ApproximateAnalyzer
+from .bootstrap import add_confidence_intervals
+from .cleaner import chronological_order
+from .encoding import PlayerCodec, decode_labels
+from .indexes import HeadToHeadIndex, PlayerMatchIndex
+from .out_of_core import Source, stream_aggregates
+from .query import MatchQuery
+from .rankings import RankingsStore
+from .ratings import EloRatingEngine
+from .serve_stats import ServeStatsTable
+from .shared import SharedDataset
+from .store import MatchStore
+from .simulator import (
+    TournamentSimulator, probabilities_from_ratings, probabilities_from_strength,
+    probabilities_from_win_rates,
+)
+from .streaks import compute_streaks, streaks_frame
+from .upsets import upset_grid, upset_table
 from . import config
 
 logger = setup_logger(__name__)
 
 
+ERA_PERIODS = ('year', 'season', 'rolling_52w', 'decade')
+
+# Tipo accettato per i limiti di finestra temporale (start/end)
+DateLike = Union[str, pd.Timestamp, date, None]
+
+# Colonne per i breakdown opzionali delle analisi per periodo
+BREAKDOWN_COLUMNS = {
+    'surface': 'surface',
+    'level': 'tourney_level_name',
+}
+
+# Fonti di probabilità per simulate_tournament
+SIMULATION_SOURCES = ('points', 'elo', 'surface')
+
+# Celle massime (settimane x giocatori) per blocco nel calcolo rolling
+_ROLLING_BLOCK_CELLS = 4_000_000
+
+
+def _breakdown_columns(by: Union[str, List[str], None]) -> List[str]:
+    """Converte il parametro `by` nelle colonne del DataFrame."""
+    if by is None:
+        return []
+    if isinstance(by, str):
+        by = [by]
+    
+    unknown = [key for key in by if key not in BREAKDOWN_COLUMNS]
+    if unknown:
+        raise ValueError(f"Breakdown non valido: {unknown} (ammessi: {list(BREAKDOWN_COLUMNS)})")
+    
+    return [BREAKDOWN_COLUMNS[key] for key in by]
+
+
+def _period_labels(df: pd.DataFrame, period: str) -> pd.Series:
+    """Etichetta di periodo (anno, stagione o decade) per ogni match."""
+    if period == 'year':
+        return df['year']
+    if period == 'season':
+        # I tornei di fine dicembre aprono la stagione successiva
+        shifted = df['tourney_date'] + pd.Timedelta(days=config.SEASON_ROLLOVER_DAYS)
+        return shifted.dt.year
+    if period == 'decade':
+        return df['year'] // 10 * 10
+    raise ValueError(f"Periodo non valido: {period}")
+
+
+def _sort_chronologically(df: pd.DataFrame) -> pd.DataFrame:
+    """DataFrame in ordine cronologico (invariato se già ordinato)."""
+    if df.empty:
+        return df
+    order = chronological_order(df)
+    if np.array_equal(order, np.arange(len(df))):
+        return df
+    return df.take(order)
+
+
+def _rolling_leaders(df: pd.DataFrame, by_cols: List[str], top_k: int, window: int) -> pd.DataFrame:
+    """
+    Top-k giocatori per vittorie nelle ultime `window` settimane, per ogni settimana.
+    
+    Le vittorie sono contate in una matrice densa settimane x giocatori
+    (a blocchi di settimane), le somme mobili derivano dalla somma cumulativa
+    e la selezione top-k usa argpartition su tutte le settimane del blocco.
+    
+    Args:
+        df: DataFrame pulito
+        by_cols: Colonne di breakdown
+        top_k: Giocatori per settimana
+        window: Ampiezza finestra in settimane
+    
+    Returns:
+        DataFrame con period (lunedì della settimana), breakdown e classifica
+    """
+    dates = df['tourney_date'].to_numpy(dtype='datetime64[D]')
+    # Settimane a partire dal lunedì precedente la prima data (1970-01-01 era giovedì)
+    days = dates.astype(np.int64)
+    anchor = days.min() - (days.min() + 3) % 7
+    weeks = (days - anchor) // 7
+    
+    player_codes, player_names = pd.factorize(df['winner_name'], sort=True)
+    
+    if by_cols:
+        group_codes, group_index = pd.factorize(pd.MultiIndex.from_frame(df[by_cols]))
+    else:
+        group_codes, group_index = np.zeros(len(df), dtype=np.int64), None
+    
+    # Tornei distinti: un torneo cade in una sola settimana
+    first_in_tourney = ~pd.DataFrame({
+        'g': group_codes, 'w': weeks, 'p': player_codes, 't': df['tourney_name'].to_numpy()
+    }).duplicated().to_numpy()
+    
+    parts = []
+    for g in np.unique(group_codes):
+        mask = group_codes == g
+        part = _rolling_top_k(
+            weeks[mask], player_codes[mask], first_in_tourney[mask], top_k, window
+        )
+        if part.empty:
+            continue
+        
+        part['player_name'] = np.asarray(player_names)[part.pop('player_code').to_numpy()]
+        part['period'] = pd.to_datetime(anchor + part.pop('week').to_numpy() * 7, unit='D')
+        if by_cols:
+            for col, value in zip(by_cols, group_index[g]):
+                part[col] = value
+        parts.append(part)
+    
+    if not parts:
+        return pd.DataFrame(columns=['period'] + by_cols + ['rank', 'player_name', 'wins', 'tournaments'])
+    
+    leaders = pd.concat(parts, ignore_index=True)
+    return leaders.sort_values(['period'] + by_cols + ['rank'], ignore_index=True)
+
+
+def _rolling_top_k(weeks: np.ndarray, players: np.ndarray, tourney_flags: np.ndarray,
+                   top_k: int, window: int) -> pd.DataFrame:
+    """Top-k a finestra mobile per un singolo gruppo (vedi _rolling_leaders)."""
+    # Giocatori locali al gruppo: la matrice densa resta piccola
+    local_players, local_codes = np.unique(players, return_inverse=True)
+    n_players = len(local_players)
+    k = min(top_k, n_players)
+    
+    first_week = int(weeks.min())
+    last_week = int(weeks.max())
+    block = max(1, _ROLLING_BLOCK_CELLS // n_players - window)
+    
+    order = np.argsort(weeks, kind='stable')
+    weeks, local_codes, tourney_flags = weeks[order], local_codes[order], tourney_flags[order]
+    
+    frames = []
+    for start in range(first_week, last_week + 1, block):
+        stop = min(start + block, last_week + 1)
+        lo = start - window + 1
+        rows = stop - lo
+        
+        sel = slice(np.searchsorted(weeks, lo), np.searchsorted(weeks, stop))
+        cells = (weeks[sel] - lo) * n_players + local_codes[sel]
+        
+        wins = np.bincount(cells, minlength=rows * n_players).reshape(rows, n_players)
+        tourneys = np.bincount(
+            cells, weights=tourney_flags[sel], minlength=rows * n_players
+        ).reshape(rows, n_players)
+        
+        # Somma mobile = differenza di somme cumulative a distanza `window`
+        wins_cum = np.vstack([np.zeros((1, n_players), dtype=np.int64), wins.cumsum(axis=0)])
+        tourneys_cum = np.vstack([np.zeros((1, n_players)), tourneys.cumsum(axis=0)])
+        rolling_wins = wins_cum[window:] - wins_cum[:-window]
+        rolling_tourneys = tourneys_cum[window:] - tourneys_cum[:-window]
+        
+        # Chiave unica: vittorie, poi codice più basso (ordine alfabetico)
+        score = rolling_wins * n_players + (n_players - 1 - np.arange(n_players))
+        top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(score, top, axis=1)
+        top = np.take_along_axis(top, np.argsort(-top_scores, axis=1), axis=1)
+        
+        row_idx = np.repeat(np.arange(stop - start), k)
+        col_idx = top.ravel()
+        top_wins = rolling_wins[row_idx, col_idx]
+        valid = top_wins > 0
+        
+        frames.append(pd.DataFrame({
+            'week': (start + row_idx)[valid],
+            'rank': np.tile(np.arange(1, k + 1), stop - start)[valid],
+            'player_code': local_players[col_idx][valid],
+            'wins': top_wins[valid],
+            'tournaments': rolling_tourneys[row_idx, col_idx][valid].astype(np.int64),
+        }))
+    
+    return pd.concat(frames, ignore_index=True)
+
+
+class LazyAnalysisResults(Mapping):
+    """
+    Mapping dei risultati di analisi calcolati al primo accesso.
+    
+    Ogni chiave esegue la propria analisi solo quando viene letta e ne
+    memorizza il risultato; prefetch() permette di calcolare in background
+    un sottoinsieme di chiavi. Le cache condivise dalle analisi vengono
+    costruite una sola volta (prepare) prima del primo calcolo.
+    
+    Il thread pool viene rilasciato da close(), all'uscita da un blocco
+    with o quando il mapping viene distrutto.
+    """
+    
+    def __init__(self, factories: Dict[str, Callable[[], object]], max_workers: Optional[int] = None,
+                 prepare: Optional[Callable[[], None]] = None):
+        """
+        Inizializza mapping lazy.
+        
+        Args:
+            factories: Dict chiave -> funzione senza argomenti che calcola il risultato
+            max_workers: Thread massimi per prefetch (default: uno per chiave)
+            prepare: Funzione eseguita una volta prima del primo calcolo
+                (es. cache dell'analyzer lette da più thread)
+        """
+        self._factories = dict(factories)
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._shutdown: Optional[weakref.finalize] = None
+        self._max_workers = max_workers or max(1, len(self._factories))
+        self._prepare = prepare
+        self._prepare_lock = threading.Lock()
+    
+    def __enter__(self) -> 'LazyAnalysisResults':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _ensure_prepared(self):
+        """Esegue prepare (una sola volta, anche con accessi concorrenti)."""
+        with self._prepare_lock:
+            if self._prepare is not None:
+                self._prepare()
+                self._prepare = None
+    
+    def _get_future(self, key: str, background: bool) -> Tuple[Future, bool]:
+        """Ritorna (future, creato) per la chiave, creandolo se assente."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                return future, False
+            if background:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers,
+                        thread_name_prefix="atp-prefetch"
+                    )
+                    # Mapping abbandonato senza close(): i thread terminano da soli
+                    self._shutdown = weakref.finalize(self, self._executor.shutdown, wait=False)
+                future = self._executor.submit(self._factories[key])
+            else:
+                future = Future()
+            self._futures[key] = future
+            return future, True
+    
+    def __getitem__(self, key: str):
+        if key not in self._factories:
+            raise KeyError(key)
+        
+        future, created = self._get_future(key, background=False)
+        if created:
+            # Calcolo inline nel thread chiamante
+            try:
+                self._ensure_prepared()
+                future.set_result(self._factories[key]())
+            except BaseException as e:
+                future.set_exception(e)
+        
+        try:
+            return future.result()
+        except BaseException:
+            # Non memorizzare errori: il prossimo accesso riprova
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+            raise
+    
+    def __iter__(self):
+        return iter(self._factories)
+    
+    def __len__(self) -> int:
+        return len(self._factories)
+    
+    def __repr__(self) -> str:
+        computed = [key for key in self._factories if self.is_computed(key)]
+        return f"LazyAnalysisResults(keys={list(self._factories)}, computed={computed})"
+    
+    def is_computed(self, key: str) -> bool:
+        """True se il risultato della chiave è già disponibile."""
+        with self._lock:
+            future = self._futures.get(key)
+        return future is not None and future.done() and future.exception() is None
+    
+    def prefetch(self, keys: Iterable[str] = None) -> Dict[str, Future]:
+        """
+        Avvia in background il calcolo delle chiavi indicate.
+        
+        Args:
+            keys: Chiavi da calcolare (default: tutte)
+        
+        Returns:
+            Dict chiave -> Future (già esistente se la chiave era in calcolo)
+        """
+        keys = list(self._factories) if keys is None else list(keys)
+        unknown = [key for key in keys if key not in self._factories]
+        if unknown:
+            raise KeyError(f"Analisi sconosciute: {unknown}")
+        
+        # Cache condivise costruite qui, non in concorrenza dai thread del pool
+        self._ensure_prepared()
+        return {key: self._get_future(key, background=True)[0] for key in keys}
+    
+    def close(self):
+        """Attende i prefetch in corso e rilascia il thread pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if self._shutdown is not None:
+                self._shutdown.detach()
+                self._shutdown = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
 class ATPAnalyzer:
     """Analisi esplorative su dati ATP tennis"""
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: Union[pd.DataFrame, MatchQuery, MatchStore], rankings: Optional[RankingsStore] = None):
         """
         Inizializza analyzer con dataset pulito.
         
+        Il dataset viene mantenuto in ordine cronologico (tourney_date, turno,
+        match_num) per permettere slicing per data con searchsorted.
+        
         Args:
-            df: DataFrame pulito da cleaner
+            df: DataFrame pulito da cleaner, oppure MatchQuery (query.matches)
+                eseguita leggendo dal disco solo partizioni e colonne richieste,
+                oppure MatchStore (colonne .npy mappate in memoria, lette solo
+                nelle pagine usate dalle analisi)
+            rankings: Classifiche settimanali (da downloader.get_rankings) per
+                il calcolo esatto del tempo da n.1
         """
-        self.df = df
+        if isinstance(df, MatchQuery):
+            df = df.execute()
+        elif isinstance(df, MatchStore):
+            df = df.frame()
+        self.rankings = rankings
+        self._frames = [_sort_chronologically(df)]
+        self._needs_sort = False
+        self._date_keys: Optional[np.ndarray] = None
+        self._aggregates: Optional[MatchAggregates] = None
+        # Modalità out-of-core: sorgente su disco e aggregati per finestra
+        self._source: Optional[Source] = None
+        self._memory_limit_mb = config.OUT_OF_CORE_MEMORY_MB
+        self._window_aggregates: Dict[Tuple, MatchAggregates] = {}
+        self._codes: Optional[Dict[str, np.ndarray]] = None
+        self._h2h: Optional[HeadToHeadIndex] = None
+        self._player_index: Optional[PlayerMatchIndex] = None
+        self._serve_stats: Optional[ServeStatsTable] = None
+        self._elo: Optional[EloRatingEngine] = None
+        self._shared_release: Optional[weakref.finalize] = None
+        self.codec = PlayerCodec()
         self.logger = logger
     
+    @classmethod
+    def from_shared(cls, dataset: Union[str, SharedDataset],
+                    rankings: Optional[RankingsStore] = None) -> 'ATPAnalyzer':
+        """
+        Analyzer su un dataset pubblicato in memoria condivisa (es. in un worker).
+        
+        Le colonne sono viste in sola lettura sul blocco condiviso (stringhe
+        come Categorical sui codici condivisi): nessuna copia del DataFrame.
+        I risultati delle analisi hanno gli stessi tipi del percorso su
+        DataFrame (etichette riconvertite con encoding.decode_labels).
+        
+        Con un nome, il collegamento appartiene all'analyzer e viene
+        rilasciato da close() o alla sua distruzione (così il processo
+        proprietario può rimuovere il blocco); un SharedDataset resta del
+        chiamante.
+        
+        Args:
+            dataset: SharedDataset o nome del blocco (da ATPAnalyzer.share)
+            rankings: Classifiche settimanali (opzionali)
+        
+        Returns:
+            ATPAnalyzer sul dataset condiviso
+        """
+        attached = isinstance(dataset, str)
+        if attached:
+            dataset = SharedDataset.attach(dataset)
+        analyzer = cls(dataset.frame(), rankings)
+        # Riferimento al blocco: resta mappato finché vive l'analyzer
+        analyzer._shared = dataset
+        if attached:
+            analyzer._shared_release = weakref.finalize(analyzer, dataset.release)
+        return analyzer
+    
+    def close(self):
+        """
+        Rilascia il blocco condiviso collegato per nome da from_shared (se presente).
+        
+        Il dataset e le cache (viste sul blocco) vengono scartati prima, così la
+        mappatura si chiude subito; l'analyzer resta vuoto.
+        """
+        if self._shared_release is not None and self._shared_release.alive:
+            self.df = pd.DataFrame()
+            self._shared = None
+            self._shared_release()
+    
+    def share(self, name: Optional[str] = None) -> SharedDataset:
+        """
+        Pubblica il dataset in memoria condivisa per i processi worker.
+        
+        Args:
+            name: Nome del blocco (default: generato)
+        
+        Returns:
+            SharedDataset proprietario: passarlo (o passarne il nome) ai worker
+            e rilasciarlo con release() al termine
+        """
+        return SharedDataset.publish(self.df, name)
+    
+    @classmethod
+    def from_aggregates(cls, aggregates: MatchAggregates,
+                        rankings: Optional[RankingsStore] = None) -> 'ATPAnalyzer':
+        """
+        Analyzer su aggregati già calcolati (es. mapreduce.map_reduce).
+        
+        Sono disponibili le analisi di run_full_analysis sull'intero dataset,
+        senza finestre temporali né analisi sulle singole righe.
+        
+        Args:
+            aggregates: MatchAggregates del dataset
+            rankings: Classifiche settimanali (opzionali)
+        
+        Returns:
+            ATPAnalyzer in modalità out-of-core
+        """
+        analyzer = cls(pd.DataFrame(), rankings)
+        analyzer._frames = None
+        analyzer._aggregates = aggregates
+        return analyzer
+    
+    @classmethod
+    def out_of_core(cls, source: Source, memory_limit_mb: float = config.OUT_OF_CORE_MEMORY_MB,
+                    rankings: Optional[RankingsStore] = None) -> 'ATPAnalyzer':
+        """
+        Analyzer sugli aggregati calcolati a blocchi dal disco (dataset mai caricato).
+        
+        Le analisi basate sugli aggregati (run_full_analysis: top_atp_days,
+        total_wins, surface_performance, tournament_levels, era_dominators)
+        danno gli stessi risultati del percorso in memoria; con start/end la
+        sorgente viene riletta filtrando la finestra. Le analisi sulle singole
+        righe (head-to-head, profili, streak, ...) non sono disponibili.
+        
+        Args:
+            source: MatchQuery, CSV grezzo o lista di CSV grezzi
+            memory_limit_mb: Limite di memoria per la lettura a blocchi
+            rankings: Classifiche settimanali (opzionali)
+        
+        Returns:
+            ATPAnalyzer in modalità out-of-core
+        """
+        analyzer = cls.from_aggregates(stream_aggregates(source, memory_limit_mb), rankings)
+        analyzer._source = source
+        analyzer._memory_limit_mb = memory_limit_mb
+        return analyzer
+    
+    @property
+    def is_out_of_core(self) -> bool:
+        """True se l'analyzer lavora solo sugli aggregati (nessun DataFrame in memoria)."""
+        return self._frames is None
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        """Dataset completo (i blocchi aggiunti con update() sono concatenati al primo accesso)."""
+        if self._frames is None:
+            raise RuntimeError(
+                "Analyzer out-of-core: analisi sulle singole righe non disponibili "
+                "(usare ATPAnalyzer(df) per caricare il dataset in memoria)"
+            )
+        if len(self._frames) > 1:
+            df = pd.concat(self._frames, ignore_index=True)
+            if self._needs_sort:
+                # Blocchi non in coda cronologica: riordino completo
+                df = _sort_chronologically(df).reset_index(drop=True)
+                self._codes = None
+                self._needs_sort = False
+            self._frames = [df]
+        return self._frames[0]
+    
+    @df.setter
+    def df(self, df: pd.DataFrame):
+        self._frames = [_sort_chronologically(df)]
+        self._needs_sort = False
+        self._date_keys = None
+        self._aggregates = None
+        self._source = None
+        self._window_aggregates = {}
+        self._codes = None
+        self._h2h = None
+        self._player_index = None
+        self._serve_stats = None
+        self._elo = None
+        self.codec = PlayerCodec()
+    
+    @property
+    def player_codes(self) -> Dict[str, np.ndarray]:
+        """Codici (self.codec) di vincitore e perdente per ogni riga del dataset."""
+        if self._codes is None:
+            self._codes = {
+                'winner': self.codec.encode(self.df['winner_name']),
+                'loser': self.codec.encode(self.df['loser_name']),
+            }
+        return self._codes
+    
+    @property
+    def h2h_index(self) -> HeadToHeadIndex:
+        """Indice head-to-head su tutti i match (costruito al primo uso)."""
+        if self._h2h is None:
+            codes = self.player_codes
+            self._h2h = HeadToHeadIndex(
+                codes['winner'], codes['loser'],
+                self.df['surface'], self.df['tourney_level_name']
+            )
+            logger.info("✓ Indice head-to-head: %d coppie", len(self._h2h))
+        return self._h2h
+    
+    @property
+    def player_index(self) -> PlayerMatchIndex:
+        """Indice CSR giocatore -> righe dei suoi match (costruito al primo uso)."""
+        if self._player_index is None:
+            codes = self.player_codes
+            self._player_index = PlayerMatchIndex(codes['winner'], codes['loser'], len(self.codec))
+            logger.info("✓ Indice giocatori: %d giocatori", len(self._player_index))
+        return self._player_index
+    
+    @property
+    def serve_stats(self) -> ServeStatsTable:
+        """Tabella giocatore-match delle statistiche di servizio (costruita al primo uso)."""
+        if self._serve_stats is None:
+            self._serve_stats = ServeStatsTable(self.df)
+            logger.info("✓ Tabella servizio/risposta: %d righe con statistiche", self._serve_stats.has_stats.sum())
+        return self._serve_stats
+    
+    @property
+    def elo_engine(self) -> EloRatingEngine:
+        """Rating Elo calcolati su tutti i match in ordine cronologico (al primo uso)."""
+        if self._elo is None:
+            engine = EloRatingEngine()
+            engine.process(self.df)
+            self._elo = engine
+        return self._elo
+    
+    @property
+    def aggregates(self) -> MatchAggregates:
+        """Aggregati mantenuti su tutto il dataset (calcolati al primo uso)."""
+        if self._aggregates is None:
+            self._aggregates = MatchAggregates.from_frame(self.df)
+        return self._aggregates
+    
+    def update(self, new_matches: pd.DataFrame) -> 'ATPAnalyzer':
+        """
+        Aggiunge nuovi match già puliti aggiornando gli aggregati mantenuti.
+        
+        Il costo è proporzionale ai nuovi match: gli aggregati del blocco
+        vengono combinati con quelli esistenti e il DataFrame completo viene
+        ricostruito solo quando un'analisi lo richiede.
+        
+        Args:
+            new_matches: DataFrame pulito con match non ancora presenti
+        
+        Returns:
+            L'analyzer stesso (aggiornato)
+        """
+        if new_matches.empty:
+            return self
+        
+        if self.is_out_of_core:
+            # Solo aggregati: le finestre vengono ricalcolate dalla sorgente
+            self._aggregates = self._aggregates.merge(MatchAggregates.from_frame(new_matches))
+            self._source = None
+            self._window_aggregates = {}
+            logger.info("✓ Aggiunti %d match (totale: %d)", len(new_matches), self._aggregates.n_matches)
+            return self
+        
+        new_matches = _sort_chronologically(new_matches)
+        last_date = self._frames[-1]['tourney_date'].max() if not self._frames[-1].empty else None
+        if last_date is not None and new_matches['tourney_date'].iloc[0] < last_date:
+            self._needs_sort = True
+        
+        if self._aggregates is not None:
+            self._aggregates = self._aggregates.merge(MatchAggregates.from_frame(new_matches))
+        if self._codes is not None:
+            self._codes = {
+                'winner': np.concatenate([self._codes['winner'], self.codec.encode(new_matches['winner_name'])]),
+                'loser': np.concatenate([self._codes['loser'], self.codec.encode(new_matches['loser_name'])]),
+            }
+        # Gli indici sulle righe vengono ricostruiti al prossimo uso
+        self._h2h = None
+        self._player_index = None
+        self._serve_stats = None
+        self._elo = None
+        self._date_keys = None
+        if self._needs_sort:
+            self._codes = None
+        self._frames.append(new_matches)
+        
+        logger.info("✓ Aggiunti %d match (totale: %d)", len(new_matches), sum(len(f) for f in self._frames))
+        return self
+    
+    @property
+    def date_keys(self) -> np.ndarray:
+        """tourney_date come int64 (ns), ordinato: indice per searchsorted."""
+        if self._date_keys is None:
+            self._date_keys = self.df['tourney_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        return self._date_keys
+    
+    def date_range(self, start: DateLike = None, end: DateLike = None) -> slice:
+        """
+        Posizioni dei match con start <= tourney_date <= end (estremi inclusi).
+        
+        Args:
+            start: Data iniziale (default: inizio dataset)
+            end: Data finale (default: fine dataset)
+        
+        Returns:
+            slice posizionale sul dataset ordinato
+        """
+        keys = self.date_keys
+        lo = 0 if start is None else int(np.searchsorted(keys, pd.Timestamp(start).value, side='left'))
+        hi = len(keys) if end is None else int(np.searchsorted(keys, pd.Timestamp(end).value, side='right'))
+        return slice(lo, max(lo, hi))
+    
+    def select(self, start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """
+        Match nella finestra temporale indicata, senza scansione del dataset.
+        
+        Args:
+            start: Data iniziale inclusa (es. '2019-01-01')
+            end: Data finale inclusa
+        
+        Returns:
+            DataFrame (slice del dataset ordinato, senza copia)
+        """
+        if start is None and end is None:
+            return self.df
+        return self.df.iloc[self.date_range(start, end)]
+    
+    def last_weeks(self, weeks: int = 52) -> pd.DataFrame:
+        """
+        Match delle ultime `weeks` settimane rispetto all'ultima data del dataset.
+        
+        Args:
+            weeks: Ampiezza finestra in settimane
+        
+        Returns:
+            DataFrame (slice del dataset ordinato)
+        """
+        if self.df.empty:
+            return self.df
+        last = self.df['tourney_date'].iloc[-1]
+        return self.select(start=last - pd.Timedelta(weeks=weeks) + pd.Timedelta(days=1), end=last)
+    
+    def approximate(self, confidence: float = config.BOOTSTRAP_CONFIDENCE,
+                    seed: Optional[int] = None) -> ApproximateAnalyzer:
+        """
+        Modalità approssimata: analisi su un campione stratificato (anno,
+        superficie, livello) con conteggi scalati e intervalli di confidenza.
+        
+        Ogni analisi accetta target_error, time_budget o sample_size per
+        scegliere la dimensione del campione (vedi ApproximateAnalyzer).
+        
+        Args:
+            confidence: Livello degli intervalli
+            seed: Seed dell'estrazione
+        
+        Returns:
+            ApproximateAnalyzer sul dataset
+        """
+        return ApproximateAnalyzer(self.df, confidence=confidence, seed=seed)
+    
+    def _aggregates_for(self, start: DateLike = None, end: DateLike = None) -> MatchAggregates:
+        """Aggregati mantenuti o, con una finestra temporale, calcolati sulla slice."""
+        if start is None and end is None:
+            return self.aggregates
+        if not self.is_out_of_core:
+            return MatchAggregates.from_frame(self.select(start, end))
+        
+        # Out-of-core: nuova lettura a blocchi filtrata sulla finestra
+        if self._source is None:
+            raise RuntimeError("Analyzer senza sorgente su disco: finestre temporali non disponibili")
+        key = (start, end)
+        if key not in self._window_aggregates:
+            self._window_aggregates[key] = stream_aggregates(self._source, self._memory_limit_mb, start, end)
+        return self._window_aggregates[key]
+    
     def get_all_players(self) -> pd.Series:
         """
         Ottiene lista di tutti i giocatori (winner + loser).
@@ -36,84 +726,109 @@ class ATPAnalyzer:
         all_players = pd.Series(list(set(winners) | set(losers)))
         return all_players.sort_values().reset_index(drop=True)
     
-    def analyze_top_atp_days(self, top_n: int = 15) -> pd.DataFrame:
+    def analyze_top_atp_days(self, top_n: int = 15, start: DateLike = None,
+                             end: DateLike = None) -> pd.DataFrame:
         """
         Analizza giocatori che sono stati n.1 ATP per più giorni.
         
+        Con le classifiche settimanali (self.rankings) i giorni sono esatti;
+        altrimenti sono stimati dalla prima all'ultima vittoria da n.1.
+        
         Args:
             top_n: Top N giocatori da ritornare
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
         
         Returns:
             DataFrame con rank_1_days, prime, title_wins
         """
         logger.info("\n📊 ANALISI: Top N.1 ATP per giorni")
         
-        # Giocatori che hanno avuto rank 1
-        rank_1_matches = self.df[self.df['winner_rank'] == 1.0]
+        rank_1_data = self._aggregates_for(start, end).rank1.reset_index()
+        
+        if self.rankings is not None:
+            rank_1_data = self._rank1_from_rankings(rank_1_data, start, end)
+        elif not rank_1_data.empty:
+            # Calcolare giorni approssimati (dalla prima all'ultima data)
+            rank_1_data['days_at_rank1'] = (
+                rank_1_data['last_rank1_date'] - rank_1_data['first_rank1_date']
+            ).dt.days
+            
+            rank_1_data['days_at_rank1'] = rank_1_data['days_at_rank1'].fillna(0).astype(int)
         
-        if rank_1_matches.empty:
+        if rank_1_data.empty:
             logger.warning("Nessun giocatore con rank 1 trovato")
-            return pd.DataFrame()
+            # Stesse colonne del risultato non vuoto
+            if 'days_at_rank1' not in rank_1_data.columns:
+                rank_1_data['days_at_rank1'] = pd.Series(dtype='int64')
+            return rank_1_data
         
-        # Group by vincitore quando era n.1
-        rank_1_data = rank_1_matches.groupby('winner_name').agg({
-            'tourney_date': ['min', 'max', 'count'],
-            'tourney_level_name': lambda x: (x == 'Grand Slam').sum()
-        }).reset_index()
+        # Order by giorni
+        rank_1_data = rank_1_data.sort_values('days_at_rank1', ascending=False).head(top_n)
         
-        # Flatten colonne
-        rank_1_data.columns = ['player_name', 'first_rank1_date', 'last_rank1_date', 
-                               'matches_as_rank1', 'grand_slam_as_rank1']
+        logger.info("✓ Top %d giocatori n.1 ATP", len(rank_1_data))
+        log_rows(logger, rank_1_data,
+                 "  {player_name:20} | {days_at_rank1:5} giorni | {matches_as_rank1:3} match | {grand_slam_as_rank1} GS")
         
-        # Calcolare giorni approssimati (dalla prima all'ultima data)
-        rank_1_data['days_at_rank1'] = (
-            rank_1_data['last_rank1_date'] - rank_1_data['first_rank1_date']
-        ).dt.days
+        return rank_1_data
+    
+    def _rank1_from_rankings(self, match_stats: pd.DataFrame, start: DateLike = None,
+                             end: DateLike = None) -> pd.DataFrame:
+        """
+        Giorni esatti da n.1 dalle classifiche, con le statistiche match da n.1.
         
-        rank_1_data['days_at_rank1'] = rank_1_data['days_at_rank1'].fillna(0).astype(int)
+        Args:
+            match_stats: Aggregati rank1 dei match (player_name, matches_as_rank1, ...)
+            start: Data iniziale inclusa
+            end: Data finale inclusa
         
-        # Order by giorni
-        rank_1_data = rank_1_data.sort_values('days_at_rank1', ascending=False).head(top_n)
+        Returns:
+            DataFrame nel formato di analyze_top_atp_days (più weeks_at_rank1)
+        """
+        # Buchi nello storico (anni '70, file mancanti) non attribuiti all'ultimo n.1
+        spans = self.rankings.time_at_rank(1, start=start, end=end, max_gap_days=config.RANKINGS_MAX_GAP_DAYS)
+        spans = spans.rename(columns={
+            'first_date': 'first_rank1_date',
+            'last_date': 'last_rank1_date',
+            'days': 'days_at_rank1',
+            'weeks': 'weeks_at_rank1',
+        })[['player_name', 'first_rank1_date', 'last_rank1_date', 'days_at_rank1', 'weeks_at_rank1']]
         
-        logger.info(f"✓ Top {len(rank_1_data)} giocatori n.1 ATP:")
-        for idx, row in rank_1_data.iterrows():
-            logger.info(
-                f"  {row['player_name']:20} | "
-                f"{row['days_at_rank1']:5} giorni | "
-                f"{row['matches_as_rank1']:3} match | "
-                f"{row['grand_slam_as_rank1']} GS"
-            )
+        counts = match_stats[['player_name', 'matches_as_rank1', 'grand_slam_as_rank1']]
+        result = spans.merge(counts, on='player_name', how='left')
+        result[['matches_as_rank1', 'grand_slam_as_rank1']] = (
+            result[['matches_as_rank1', 'grand_slam_as_rank1']].fillna(0).astype(int)
+        )
         
-        return rank_1_data
+        return result[['player_name', 'first_rank1_date', 'last_rank1_date', 'matches_as_rank1',
+                       'grand_slam_as_rank1', 'days_at_rank1', 'weeks_at_rank1']]
     
-    def analyze_total_wins(self, top_n: int = 20) -> pd.DataFrame:
+    def analyze_total_wins(self, top_n: int = 20, start: DateLike = None,
+                           end: DateLike = None, confidence: Optional[float] = None,
+                           n_resamples: int = config.BOOTSTRAP_RESAMPLES, seed: Optional[int] = None,
+                           n_jobs: int = 1) -> pd.DataFrame:
         """
         Analizza numero totale di match vinti per giocatore.
         
         Args:
             top_n: Top N giocatori da ritornare
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
+            confidence: Se indicato (es. 0.95), aggiunge win_rate_low/high bootstrap
+            n_resamples: Repliche bootstrap
+            seed: Seed del bootstrap (risultati riproducibili)
+            n_jobs: Processi per il bootstrap
         
         Returns:
             DataFrame con statistiche vittorie
         """
         logger.info("\n📊 ANALISI: Giocatori per Total Wins")
         
-        # Contare vittorie per ogni giocatore
-        wins = self.df.groupby('winner_name').agg({
-            'tourney_date': 'count',
-            'tourney_level_name': lambda x: (x == 'Grand Slam').sum(),
-            'surface': lambda x: (x == 'Hard').sum(),
-        }).reset_index()
-        
-        wins.columns = ['player_name', 'total_wins', 'grand_slam_wins', 'hard_court_wins']
-        
-        # Win rate (wins vs partecipazioni stimate)
-        # Giocatori che hanno perso
-        losses = self.df.groupby('loser_name').size().reset_index(name='total_losses')
-        
-        wins = wins.merge(losses, left_on='player_name', right_on='loser_name', how='left')
-        wins = wins.drop('loser_name', axis=1)
-        wins['total_losses'] = wins['total_losses'].fillna(0).astype(int)
+        # Contatori vittorie/sconfitte mantenuti per giocatore
+        players = self._aggregates_for(start, end).players
+        wins = players[players['wins'] > 0].reset_index()
+        wins = wins.rename(columns={'wins': 'total_wins', 'losses': 'total_losses'})
+        wins = wins[['player_name', 'total_wins', 'grand_slam_wins', 'hard_court_wins', 'total_losses']]
         wins['total_matches'] = wins['total_wins'] + wins['total_losses']
         wins['win_rate'] = (wins['total_wins'] / wins['total_matches'] * 100).round(2)
         
@@ -123,24 +838,34 @@ class ATPAnalyzer:
         # Order by wins
         wins = wins.sort_values('total_wins', ascending=False).head(top_n)
         
-        logger.info(f"✓ Top {len(wins)} per total wins:")
-        for idx, row in wins.iterrows():
-            logger.info(
-                f"  {row['player_name']:20} | "
-                f"{int(row['total_wins']):4} W | "
-                f"{int(row['total_losses']):4} L | "
-                f"{row['win_rate']:5.1f}% | "
-                f"{int(row['grand_slam_wins'])} GS"
+        if confidence is not None:
+            wins = add_confidence_intervals(
+                wins, 'win_rate', 'total_wins', 'total_matches',
+                confidence=confidence, n_resamples=n_resamples, seed=seed, n_jobs=n_jobs,
             )
         
+        logger.info("✓ Top %d per total wins", len(wins))
+        log_rows(logger, wins,
+                 "  {player_name:20} | {total_wins:4.0f} W | {total_losses:4.0f} L | {win_rate:5.1f}% | "
+                 "{grand_slam_wins:.0f} GS")
+        
         return wins
     
-    def analyze_surface_performance(self, top_n: int = 10) -> pd.DataFrame:
+    def analyze_surface_performance(self, top_n: int = 10, start: DateLike = None,
+                                    end: DateLike = None, confidence: Optional[float] = None,
+                                    n_resamples: int = config.BOOTSTRAP_RESAMPLES,
+                                    seed: Optional[int] = None, n_jobs: int = 1) -> pd.DataFrame:
         """
         Analizza performance per superficie.
         
         Args:
             top_n: Top N giocatori per superficie
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
+            confidence: Se indicato (es. 0.95), aggiunge win_rate_low/high bootstrap
+            n_resamples: Repliche bootstrap
+            seed: Seed del bootstrap (risultati riproducibili)
+            n_jobs: Processi per il bootstrap
         
         Returns:
             DataFrame con performance per superficie
@@ -149,19 +874,17 @@ class ATPAnalyzer:
         
         surface_stats = []
         
+        aggregates = self._aggregates_for(start, end)
+        surface_counts = pd.DataFrame({
+            'wins': aggregates.surface_wins,
+            'losses': aggregates.surface_losses,
+        }).fillna(0).astype(int)
+        
         for surface in config.SURFACE_TYPES:
-            surface_df = self.df[self.df['surface'] == surface]
-            
-            if surface_df.empty:
+            if surface not in surface_counts.index.get_level_values('surface'):
                 continue
             
-            wins = surface_df.groupby('winner_name').size().reset_index(name='wins')
-            losses = surface_df.groupby('loser_name').size().reset_index(name='losses')
-            
-            stats = wins.merge(losses, left_on='winner_name', right_on='loser_name', how='outer')
-            stats = stats.drop('loser_name', axis=1)
-            stats.columns = ['player_name', 'wins', 'losses']
-            stats = stats.fillna(0).astype({'wins': int, 'losses': int})
+            stats = surface_counts.xs(surface, level='surface').reset_index()
             stats['total'] = stats['wins'] + stats['losses']
             stats['win_rate'] = (stats['wins'] / stats['total'] * 100).round(1)
             stats['surface'] = surface
@@ -169,86 +892,650 @@ class ATPAnalyzer:
             # Top per questa superficie
             surface_stats.append(stats.sort_values('wins', ascending=False).head(top_n))
         
-        result = pd.concat(surface_stats, ignore_index=True)
+        if surface_stats:
+            result = pd.concat(surface_stats, ignore_index=True)
+        else:
+            # Nessun match (es. finestra vuota): stesse colonne, zero righe
+            result = pd.DataFrame(columns=['player_name', 'wins', 'losses', 'total', 'win_rate', 'surface'])
         
-        logger.info(f"✓ Performance per superficie (top {top_n}):")
-        for surface in config.SURFACE_TYPES:
-            surf_data = result[result['surface'] == surface]
-            if not surf_data.empty:
-                logger.info(f"  {surface}: {len(surf_data)} giocatori analizzati")
+        if confidence is not None:
+            result = add_confidence_intervals(
+                result, 'win_rate', 'wins', 'total',
+                confidence=confidence, n_resamples=n_resamples, seed=seed, n_jobs=n_jobs,
+            )
+        
+        logger.info("✓ Performance per superficie (top %d): %d righe", top_n, len(result))
+        if results_enabled(logger):
+            players = result.groupby('surface', sort=False).size().rename('players').reset_index()
+            log_rows(logger, players, "  {surface}: {players} giocatori analizzati")
         
         return result
     
-    def analyze_tournament_levels(self) -> pd.DataFrame:
+    def analyze_tournament_levels(self, start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
         """
         Analizza distribuzione match per livello torneo.
         
+        Args:
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
+        
         Returns:
             DataFrame con statistiche per livello
         """
         logger.info("\n📊 ANALISI: Distribuzione per livello torneo")
         
-        level_stats = self.df['tourney_level_name'].value_counts().reset_index()
+        level_stats = self._aggregates_for(start, end).level_counts.sort_values(ascending=False).reset_index()
         level_stats.columns = ['tourney_level', 'match_count']
         level_stats['percentage'] = (level_stats['match_count'] / level_stats['match_count'].sum() * 100).round(1)
         
-        logger.info("✓ Distribuzione tornei:")
-        for idx, row in level_stats.iterrows():
-            logger.info(
-                f"  {row['tourney_level']:20} | "
-                f"{int(row['match_count']):5} match | "
-                f"{row['percentage']:5.1f}%"
-            )
+        logger.info("✓ Distribuzione tornei: %d livelli", len(level_stats))
+        log_rows(logger, level_stats, "  {tourney_level:20} | {match_count:5.0f} match | {percentage:5.1f}%")
         
         return level_stats
     
-    def get_era_dominators(self) -> Dict[int, Dict]:
+    def get_era_leaders(self, period: str = 'year', top_k: int = 1,
+                        by: Union[str, List[str], None] = None,
+                        start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """
+        Top-k giocatori per vittorie in ogni periodo, con un solo groupby.
+        
+        Args:
+            period: 'year' (anno solare), 'season' (stagione ATP),
+                'rolling_52w' (finestra mobile di 52 settimane, una riga per
+                settimana) o 'decade'
+            top_k: Numero di giocatori per periodo
+            by: Breakdown opzionale: 'surface', 'level' o entrambi
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
+        
+        Returns:
+            DataFrame con period, [breakdown], rank, player_name, wins, tournaments
+        """
+        if period not in ERA_PERIODS:
+            raise ValueError(f"Periodo non valido: {period} (ammessi: {ERA_PERIODS})")
+        
+        by_cols = _breakdown_columns(by)
+        columns = ['period'] + by_cols + ['rank', 'player_name', 'wins', 'tournaments']
+        
+        df = self.select(start, end)
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+        
+        if period == 'rolling_52w':
+            leaders = _rolling_leaders(df, by_cols, top_k, window=52)
+            return decode_labels(leaders[columns], by_cols + ['player_name'])
+        
+        frame = df[['winner_name', 'tourney_name'] + by_cols].assign(
+            period=_period_labels(df, period)
+        )
+        keys = ['period'] + by_cols
+        
+        stats = frame.groupby(keys + ['winner_name'], observed=True, sort=False).agg(
+            wins=('tourney_name', 'size'),
+            tournaments=('tourney_name', 'nunique'),
+        ).reset_index()
+        
+        # Ordinamento per vittorie (parità: nome) e taglio top-k per gruppo
+        stats = stats.sort_values(
+            keys + ['wins', 'winner_name'],
+            ascending=[True] * len(keys) + [False, True]
+        )
+        leaders = stats.groupby(keys, observed=True, sort=False).head(top_k).copy()
+        leaders['rank'] = leaders.groupby(keys, observed=True, sort=False).cumcount() + 1
+        leaders = leaders.rename(columns={'winner_name': 'player_name'})
+        
+        return decode_labels(leaders[columns].reset_index(drop=True), by_cols + ['player_name'])
+    
+    def get_era_dominators(self, start: DateLike = None, end: DateLike = None) -> Dict[int, Dict]:
         """
         Identifica dominatori per ogni anno.
         
+        Args:
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
+        
         Returns:
             Dict con dominatore per anno
         """
         logger.info("\n📊 ANALISI: Dominatori per anno")
         
+        # Leader per anno dagli aggregati mantenuti (parità: nome)
+        leaders = self._aggregates_for(start, end).year_leaders()
+        leaders = leaders.sort_values(['year', 'wins', 'player_name'], ascending=[True, False, True])
+        leaders = leaders.groupby('year').head(1).rename(columns={'year': 'period'})
+        
         dominators = {}
         
-        for year in sorted(self.df['year'].unique()):
-            year_df = self.df[self.df['year'] == year]
-            wins = year_df['winner_name'].value_counts()
-            
-            if not wins.empty:
-                top_player = wins.index[0]
-                dominators[year] = {
-                    'player': top_player,
-                    'wins': int(wins.iloc[0]),
-                    'tournaments': year_df[year_df['winner_name'] == top_player]['tourney_name'].nunique()
-                }
-                
-                logger.info(
-                    f"  {year}: {top_player:20} ({int(wins.iloc[0])} wins, "
-                    f"{dominators[year]['tournaments']} tornei)"
-                )
+        for year, player, wins, tournaments in zip(
+            leaders['period'], leaders['player_name'], leaders['wins'], leaders['tournaments']
+        ):
+            dominators[int(year)] = {
+                'player': player,
+                'wins': int(wins),
+                'tournaments': int(tournaments)
+            }
+        
+        logger.info("✓ Dominatori: %d stagioni", len(dominators))
+        log_rows(logger, leaders, "  {period}: {player_name:20} ({wins:.0f} wins, {tournaments:.0f} tornei)")
         
         return dominators
     
-    def run_full_analysis(self) -> Dict:
+    def head_to_head(self, player1: str, player2: str) -> Dict:
+        """
+        Bilancio head-to-head tra due giocatori (lookup O(1) sull'indice).
+        
+        Args:
+            player1: Nome primo giocatore
+            player2: Nome secondo giocatore
+        
+        Returns:
+            Dict con player1_wins, player2_wins, total e split by_surface/by_level
+            (tuple vittorie player1, vittorie player2)
+        """
+        self._ensure_codes()
+        record = self.h2h_index.record(self.codec.code(player1), self.codec.code(player2))
+        
+        return {
+            'player1_wins': record['wins'],
+            'player2_wins': record['losses'],
+            'total': record['wins'] + record['losses'],
+            'by_surface': record['by_surface'],
+            'by_level': record['by_level'],
+        }
+    
+    def head_to_head_matches(self, player1: str, player2: str, start: DateLike = None,
+                             end: DateLike = None) -> pd.DataFrame:
+        """
+        Match tra due giocatori (solo le righe della coppia, via indice).
+        
+        Args:
+            player1: Nome primo giocatore
+            player2: Nome secondo giocatore
+            start: Data iniziale inclusa (default: tutti i match)
+            end: Data finale inclusa
+        
+        Returns:
+            DataFrame con i match della coppia
+        """
+        code1, code2 = self._lookup_codes([player1, player2])
+        rows = self.h2h_index.pair_rows(code1, code2)
+        
+        if start is not None or end is not None:
+            window = self.date_range(start, end)
+            rows = rows[(rows >= window.start) & (rows < window.stop)]
+        
+        return decode_labels(self.df.iloc[rows])
+    
+    def head_to_head_matrix(self, players: List[str], surface: str = None,
+                            level: str = None) -> pd.DataFrame:
+        """
+        Matrice head-to-head N x N per un insieme di giocatori.
+        
+        Args:
+            players: Nomi giocatori
+            surface: Solo match su questa superficie
+            level: Solo match di questo tourney_level_name
+        
+        Returns:
+            DataFrame (righe = vincitore, colonne = sconfitto) con le vittorie
+        """
+        codes = self._lookup_codes(players)
+        matrix = self.h2h_index.matrix(codes, surface=surface, level=level)
+        return pd.DataFrame(matrix, index=pd.Index(players, name='player'), columns=players)
+    
+    def player_matches(self, player_name: str, start: DateLike = None,
+                       end: DateLike = None) -> pd.DataFrame:
+        """
+        Match di un giocatore (solo le sue righe, via indice CSR).
+        
+        Args:
+            player_name: Nome giocatore
+            start: Data iniziale inclusa (default: tutta la carriera)
+            end: Data finale inclusa
+        
+        Returns:
+            DataFrame con i match del giocatore e colonna `won`
+        """
+        self._ensure_codes()
+        code = self.codec.code(player_name)
+        index = self.player_index
+        
+        rows = index.player_rows(code)
+        won = index.player_won(code)
+        
+        if start is not None or end is not None:
+            # Righe del giocatore ordinate per posizione = ordine cronologico
+            window = self.date_range(start, end)
+            lo, hi = np.searchsorted(rows, [window.start, window.stop])
+            rows, won = rows[lo:hi], won[lo:hi]
+        
+        matches = decode_labels(self.df.iloc[rows])
+        return matches.assign(won=won)
+    
+    def player_profile(self, player_name: str, start: DateLike = None,
+                       end: DateLike = None) -> Dict:
+        """
+        Profilo di un giocatore calcolato sulle sole righe dei suoi match.
+        
+        Args:
+            player_name: Nome giocatore
+            start: Data iniziale inclusa (default: tutta la carriera)
+            end: Data finale inclusa
+        
+        Returns:
+            Dict con wins, losses, win_rate, grand_slam_wins, titles,
+            first_match, last_match e by_surface (vittorie, sconfitte)
+        """
+        matches = self.player_matches(player_name, start, end)
+        won = matches['won'].to_numpy()
+        wins = int(won.sum())
+        losses = len(matches) - wins
+        
+        by_surface = matches.groupby('surface')['won'].agg(['sum', 'size'])
+        
+        return {
+            'player_name': player_name,
+            'wins': wins,
+            'losses': losses,
+            'win_rate': wins / len(matches) if len(matches) > 0 else 0,
+            'grand_slam_wins': int((won & (matches['tourney_level_name'] == 'Grand Slam').to_numpy()).sum()),
+            'titles': int((won & (matches['round'] == 'F').to_numpy()).sum()) if 'round' in matches else 0,
+            'first_match': matches['tourney_date'].min() if len(matches) > 0 else pd.NaT,
+            'last_match': matches['tourney_date'].max() if len(matches) > 0 else pd.NaT,
+            'by_surface': {
+                surface: (int(row['sum']), int(row['size'] - row['sum']))
+                for surface, row in by_surface.iterrows()
+            },
+        }
+    
+    def player_timeline(self, player_name: str, start: DateLike = None,
+                        end: DateLike = None) -> pd.DataFrame:
+        """
+        Timeline di carriera (per anno) di un giocatore.
+        
+        Args:
+            player_name: Nome giocatore
+            start: Data iniziale inclusa (default: tutta la carriera)
+            end: Data finale inclusa
+        
+        Returns:
+            DataFrame con year, wins, losses, win_rate, tournaments, best_rank
+        """
+        matches = self.player_matches(player_name, start, end)
+        won = matches['won']
+        rank = matches['winner_rank'].where(won, matches['loser_rank'])
+        
+        timeline = matches.assign(rank=rank).groupby('year').agg(
+            wins=('won', 'sum'),
+            matches=('won', 'size'),
+            tournaments=('tourney_name', 'nunique'),
+            best_rank=('rank', 'min'),
+        ).reset_index()
+        timeline['losses'] = timeline['matches'] - timeline['wins']
+        timeline['win_rate'] = (timeline['wins'] / timeline['matches'] * 100).round(1)
+        
+        return timeline[['year', 'wins', 'losses', 'win_rate', 'tournaments', 'best_rank']]
+    
+    def player_profiles(self, min_matches: int = 0) -> pd.DataFrame:
+        """
+        Profili di tutti i giocatori in un solo passaggio sull'indice CSR.
+        
+        Args:
+            min_matches: Minimo match disputati
+        
+        Returns:
+            DataFrame con un profilo per giocatore (vittorie/sconfitte totali e
+            per superficie, Grand Slam, titoli, prima/ultima data)
+        """
+        index = self.player_index
+        n_players = len(index)
+        columns = ['player_name', 'wins', 'losses', 'total_matches', 'win_rate']
+        if len(index.rows) == 0:
+            return pd.DataFrame(columns=columns)
+        
+        rows, won, codes = index.rows, index.won, index.codes
+        
+        profiles = pd.DataFrame({'player_name': self.codec.names[:n_players]})
+        total_matches = np.diff(index.offsets)
+        profiles['wins'] = np.bincount(codes, weights=won, minlength=n_players).astype(np.int64)
+        profiles['losses'] = total_matches - profiles['wins']
+        profiles['total_matches'] = total_matches
+        profiles['win_rate'] = (profiles['wins'] / profiles['total_matches'] * 100).round(2)
+        
+        is_gs = (self.df['tourney_level_name'] == 'Grand Slam').to_numpy()[rows]
+        profiles['grand_slam_wins'] = np.bincount(codes, weights=won & is_gs, minlength=n_players).astype(np.int64)
+        if 'round' in self.df.columns:
+            is_final = (self.df['round'] == 'F').to_numpy()[rows]
+            profiles['titles'] = np.bincount(codes, weights=won & is_final, minlength=n_players).astype(np.int64)
+        
+        surfaces = list(config.SURFACE_TYPES)
+        surface_codes = pd.Index(surfaces).get_indexer(self.df['surface'])[rows]
+        known = surface_codes >= 0
+        cells = codes[known] * len(surfaces) + surface_codes[known]
+        surface_wins = np.bincount(cells, weights=won[known], minlength=n_players * len(surfaces))
+        surface_total = np.bincount(cells, minlength=n_players * len(surfaces))
+        for i, surface in enumerate(surfaces):
+            key = surface.lower()
+            profiles[f'{key}_wins'] = surface_wins[i::len(surfaces)].astype(np.int64)
+            profiles[f'{key}_losses'] = surface_total[i::len(surfaces)] - profiles[f'{key}_wins']
+        
+        # Prima/ultima data: riduzione sui segmenti contigui di ogni giocatore
+        dates = self.df['tourney_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)[rows]
+        starts = index.offsets[:-1]
+        present = np.diff(index.offsets) > 0
+        first = np.full(n_players, np.iinfo(np.int64).min)
+        last = np.full(n_players, np.iinfo(np.int64).min)
+        first[present] = np.minimum.reduceat(dates, starts[present])
+        last[present] = np.maximum.reduceat(dates, starts[present])
+        profiles['first_match'] = pd.to_datetime(first)
+        profiles['last_match'] = pd.to_datetime(last)
+        
+        profiles = profiles[profiles['total_matches'] >= max(min_matches, 1)]
+        return profiles.reset_index(drop=True)
+    
+    def analyze_streaks(self, top_n: int = 20, by: Union[str, List[str], None] = None,
+                        start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """
+        Serie di vittorie consecutive più lunghe e correnti (tutti i giocatori insieme).
+        
+        Args:
+            top_n: Top N giocatori (per gruppo se `by` è indicato; None = tutti)
+            by: Breakdown opzionale: 'surface', 'level' o lista
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
+        
+        Returns:
+            DataFrame con player_name, colonne di breakdown, longest_streak,
+            longest_start, longest_end, current_streak, current_start, current_end
+        """
+        logger.info("\n📊 ANALISI: Serie di vittorie consecutive")
+        
+        by_cols = _breakdown_columns(by)
+        index = self.player_index
+        codes, rows, won = index.codes, index.rows, index.won
+        
+        if start is not None or end is not None:
+            window = self.date_range(start, end)
+            inside = (rows >= window.start) & (rows < window.stop)
+            codes, rows, won = codes[inside], rows[inside], won[inside]
+        
+        groups, labels = None, None
+        if by_cols:
+            grouped = self.df.groupby(by_cols, sort=True)
+            groups = grouped.ngroup().to_numpy()[rows]
+            labels = grouped.size().index.to_frame(index=False)
+            known = groups >= 0
+            codes, rows, won, groups = codes[known], rows[known], won[known], groups[known]
+        
+        dates = self.df['tourney_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        streaks = streaks_frame(
+            compute_streaks(codes, rows, won, dates, groups), self.codec.names, labels
+        )
+        
+        streaks = streaks[streaks['longest_streak'] > 0].sort_values(
+            by_cols + ['longest_streak', 'longest_start'],
+            ascending=[True] * len(by_cols) + [False, True],
+        )
+        if top_n is not None:
+            streaks = streaks.groupby(by_cols, sort=False).head(top_n) if by_cols else streaks.head(top_n)
+        streaks = streaks.reset_index(drop=True)
+        
+        logger.info("✓ Serie più lunghe (%d righe)", len(streaks))
+        if results_enabled(logger):
+            # Colonne di gruppo con nomi posizionali (possono non essere identificatori)
+            rows = streaks.head(10)[['player_name', 'longest_streak', 'longest_start', 'longest_end'] + by_cols]
+            rows.columns = ['player_name', 'longest_streak', 'longest_start', 'longest_end'] + [
+                f'group_{i}' for i in range(len(by_cols))
+            ]
+            log_rows(logger, rows,
+                     "  {player_name:20} | {longest_streak:3.0f} W di fila | "
+                     "{longest_start:%Y-%m-%d} → {longest_end:%Y-%m-%d}"
+                     + ''.join(f" | {{group_{i}}}" for i in range(len(by_cols))))
+        
+        return streaks
+    
+    def analyze_serve_return(self, top_n: int = 20, sort_by: str = 'hold_pct',
+                             by: Union[str, List[str], None] = None, surface: str = None,
+                             year: Union[int, Tuple[int, int], None] = None,
+                             opponent_rank: Optional[Tuple[int, int]] = None,
+                             min_matches: int = config.MIN_MATCHES_PLAYER,
+                             start: DateLike = None, end: DateLike = None,
+                             confidence: Optional[float] = None,
+                             n_resamples: int = config.BOOTSTRAP_RESAMPLES, seed: Optional[int] = None,
+                             n_jobs: int = 1) -> pd.DataFrame:
+        """
+        Statistiche al servizio e in risposta per giocatore (colonne w_/l_).
+        
+        Args:
+            top_n: Top N giocatori per sort_by (per gruppo se `by` è indicato; None = tutti)
+            sort_by: Percentuale di ordinamento (es. 'hold_pct', 'break_pct')
+            by: Raggruppamento opzionale: 'surface', 'level', 'year' o lista
+            surface: Solo match su questa superficie
+            year: Anno o intervallo (primo, ultimo) inclusi
+            opponent_rank: Fascia di ranking avversario (min, max), es. (1, 10)
+            min_matches: Minimo match con statistiche
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
+            confidence: Se indicato (es. 0.95), aggiunge {sort_by}_low/high bootstrap
+            n_resamples: Repliche bootstrap
+            seed: Seed del bootstrap (risultati riproducibili)
+            n_jobs: Processi per il bootstrap
+        
+        Returns:
+            DataFrame con contatori e percentuali (first_serve_pct,
+            first_serve_won_pct, second_serve_won_pct, bp_saved_pct,
+            bp_converted_pct, hold_pct, break_pct, ...)
+        """
+        logger.info("\n📊 ANALISI: Statistiche servizio/risposta")
+        
+        rows = self.date_range(start, end) if start is not None or end is not None else None
+        stats = self.serve_stats.aggregate(
+            by=by, min_matches=min_matches,
+            surface=surface, year=year, opponent_rank=opponent_rank, rows=rows,
+            intervals=[sort_by] if confidence is not None else [],
+            confidence=confidence or config.BOOTSTRAP_CONFIDENCE,
+            n_resamples=n_resamples, seed=seed, n_jobs=n_jobs,
+        )
+        
+        group_cols = [col for col in stats.columns if col in ('surface', 'tourney_level_name', 'year')]
+        stats = stats.sort_values(group_cols + [sort_by], ascending=[True] * len(group_cols) + [False])
+        if top_n is not None:
+            stats = stats.groupby(group_cols, sort=False).head(top_n) if group_cols else stats.head(top_n)
+        stats = stats.reset_index(drop=True)
+        
+        logger.info("✓ Top %d per %s", len(stats), sort_by)
+        log_rows(logger, stats,
+                 "  {player_name:20} | hold {hold_pct:5.1f}% | break {break_pct:5.1f}% | "
+                 "1st in {first_serve_pct:5.1f}% | {matches:.0f} match", limit=10)
+        
+        return stats
+    
+    def analyze_upsets(self, by: Iterable[str] = ('surface', 'level', 'round', 'year'),
+                       tournament: bool = False, base: float = 2.0, start: DateLike = None,
+                       end: DateLike = None) -> Dict[str, pd.DataFrame]:
+        """
+        Tassi di upset per distanza di ranking (fasce logaritmiche) e dimensione.
+        
+        Args:
+            by: Dimensioni del report ('surface', 'level', 'round', 'year')
+            tournament: Aggiunge il report per torneo
+            base: Rapporto tra estremi consecutivi delle fasce
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
+        
+        Returns:
+            Dict con 'grid' (distanza x ranking favorito) e una tabella
+            (dimensione x fascia di distanza) per ogni dimensione
+        """
+        logger.info("\n📊 ANALISI: Upset per distanza di ranking")
+        
+        df = self.select(start, end)
+        dimensions = list(by) + (['tournament'] if tournament else [])
+        
+        report = {'grid': upset_grid(df, base=base)}
+        for dimension in dimensions:
+            report[dimension] = upset_table(df, by=dimension, favorite=False, base=base)
+        
+        overall = upset_table(df, gap=False, favorite=False)
+        if not overall.empty:
+            logger.info("✓ Upset: %d/%d (%.1f%%)", overall['upsets'].iloc[0], overall['matches'].iloc[0],
+                        overall['upset_rate'].iloc[0])
+        # Tassi per dimensione: tabelle calcolate solo per il log dei risultati
+        if results_enabled(logger):
+            for dimension in by:
+                rates = upset_table(df, by=dimension, gap=False, favorite=False)
+                column = rates.columns[0]
+                logger.info("  %s: %s", dimension, ", ".join(
+                    f"{value} {rate:.1f}%" for value, rate in zip(rates[column], rates['upset_rate'])
+                ))
+        
+        return report
+    
+    def draw_probabilities(self, players: List[str], source: str = 'points',
+                           surface: str = None) -> np.ndarray:
+        """
+        Matrice P[i, j] = probabilità che players[i] batta players[j].
+        
+        Args:
+            players: Giocatori
+            source: 'points' (ultimi punti ATP nel dataset), 'elo' (rating Elo,
+                per superficie se indicata) o 'surface' (win rate sulla
+                superficie, formula log5)
+            surface: Superficie del torneo
+        
+        Returns:
+            Matrice N x N
+        """
+        if source not in SIMULATION_SOURCES:
+            raise ValueError(f"Fonte non valida: {source} (ammesse: {list(SIMULATION_SOURCES)})")
+        
+        codes = self._lookup_codes(players)
+        known = codes >= 0
+        
+        if source == 'points':
+            # Punti del giocatore nel suo ultimo match
+            index = self.player_index
+            last = np.where(known, index.offsets[np.maximum(codes, 0) + 1] - 1, 0)
+            rows, won = index.rows[last], index.won[last]
+            points = np.where(
+                won,
+                self.df['winner_rank_points'].to_numpy(dtype=np.float64)[rows],
+                self.df['loser_rank_points'].to_numpy(dtype=np.float64)[rows],
+            )
+            # Giocatori senza punti: minimo positivo del dataset
+            all_points = self.df[['winner_rank_points', 'loser_rank_points']].to_numpy(dtype=np.float64)
+            all_points = all_points[all_points > 0]
+            floor = all_points.min() if len(all_points) else 1.0
+            points = np.where(known & (points > 0), points, np.nan)
+            return probabilities_from_strength(np.nan_to_num(points, nan=floor))
+        
+        if source == 'elo':
+            engine = self.elo_engine
+            ratings = engine.get_ratings(surface=surface).set_index('player_name')['elo']
+            return probabilities_from_ratings(ratings.reindex(players).fillna(engine.initial_rating).to_numpy())
+        
+        aggregates = self.aggregates
+        if surface is not None:
+            wins = aggregates.surface_wins.xs(surface, level='surface') if len(aggregates.surface_wins) else pd.Series(dtype=float)
+            losses = aggregates.surface_losses.xs(surface, level='surface') if len(aggregates.surface_losses) else pd.Series(dtype=float)
+        else:
+            wins, losses = aggregates.players['wins'], aggregates.players['losses']
+        wins = wins.reindex(players).fillna(0).to_numpy()
+        losses = losses.reindex(players).fillna(0).to_numpy()
+        # Laplace: giocatori con pochi match restano vicini al 50%
+        return probabilities_from_win_rates((wins + 1) / (wins + losses + 2))
+    
+    def simulate_tournament(self, draw: List[Optional[str]], n_simulations: int = 100_000,
+                            source: str = 'points', surface: str = None,
+                            probabilities: Optional[np.ndarray] = None, seed: Optional[int] = None,
+                            n_jobs: int = 1) -> pd.DataFrame:
+        """
+        Probabilità di titolo (e di ogni turno) con simulazione Monte Carlo del tabellone.
+        
+        Args:
+            draw: Giocatori in ordine di tabellone (None = bye), lunghezza potenza di 2
+            n_simulations: Numero di tabelloni simulati
+            source: Fonte delle probabilità (vedi draw_probabilities)
+            surface: Superficie del torneo
+            probabilities: Matrice fornita (giocatori nell'ordine del tabellone,
+                bye esclusi); se indicata sostituisce `source`
+            seed: Seed per risultati riproducibili
+            n_jobs: Processi per i blocchi di simulazioni
+        
+        Returns:
+            DataFrame con player_name, reach_<turno> e title_probability
+        """
+        logger.info("\n📊 SIMULAZIONE: tabellone da %d (%d simulazioni)", len(draw), n_simulations)
+        
+        players = [player for player in draw if player is not None]
+        if probabilities is None:
+            probabilities = self.draw_probabilities(players, source=source, surface=surface)
+        
+        result = TournamentSimulator(draw, probabilities).run(n_simulations, seed=seed, n_jobs=n_jobs)
+        
+        if not result.empty:
+            logger.info("✓ Favoriti per il titolo: %s (%.1f%%)", result['player_name'].iloc[0],
+                        result['title_probability'].iloc[0] * 100)
+        log_rows(logger, result, "  {player_name:20} | {title_probability:6.1%}", limit=5)
+        
+        return result
+    
+    def _ensure_codes(self):
+        """Codifica i giocatori del dataset se non ancora fatto."""
+        if self._codes is None:
+            self.player_codes
+    
+    def _lookup_codes(self, names: List[str]) -> np.ndarray:
+        """Codici giocatore per nome (-1 se assente)."""
+        self._ensure_codes()
+        return self.codec.lookup(names)
+    
+    def _analysis_factories(self, start: DateLike = None,
+                            end: DateLike = None) -> Dict[str, Callable[[], object]]:
+        """Chiavi dei risultati e relative analisi (con parametri di default)."""
+        analyses = {
+            'top_atp_days': self.analyze_top_atp_days,
+            'total_wins': self.analyze_total_wins,
+            'surface_performance': self.analyze_surface_performance,
+            'tournament_levels': self.analyze_tournament_levels,
+            'era_dominators': self.get_era_dominators,
+        }
+        return {
+            key: functools.partial(analysis, start=start, end=end)
+            for key, analysis in analyses.items()
+        }
+    
+    def _prepare_analyses(self, start: DateLike = None, end: DateLike = None):
+        """Costruisce le cache lette dalle analisi (dataset, date_keys, aggregati)."""
+        if not self.is_out_of_core:
+            self.date_keys
+        if self.is_out_of_core or (start is None and end is None):
+            self._aggregates_for(start, end)
+    
+    def run_full_analysis(self, lazy: bool = False, start: DateLike = None,
+                          end: DateLike = None) -> Union[Dict, LazyAnalysisResults]:
         """
         Esegue tutte le analisi.
         
+        Args:
+            lazy: Se True, ritorna un LazyAnalysisResults che esegue ogni
+                analisi solo al primo accesso alla sua chiave
+            start: Data iniziale inclusa (default: tutto il dataset)
+            end: Data finale inclusa
+        
         Returns:
-            Dict consolidato con tutti i risultati
+            Dict consolidato con tutti i risultati (o mapping lazy)
         """
         logger.info("\n" + "="*60)
         logger.info("ANALISI ESPLORATIVE COMPLETE")
         logger.info("="*60)
         
-        results = {
-            'top_atp_days': self.analyze_top_atp_days(),
-            'total_wins': self.analyze_total_wins(),
-            'surface_performance': self.analyze_surface_performance(),
-            'tournament_levels': self.analyze_tournament_levels(),
-            'era_dominators': self.get_era_dominators(),
-        }
+        factories = self._analysis_factories(start, end)
+        
+        if lazy:
+            logger.info("Modalità lazy: analisi calcolate al primo accesso")
+            return LazyAnalysisResults(factories, prepare=functools.partial(self._prepare_analyses, start, end))
+        
+        results = {key: factory() for key, factory in factories.items()}
         
         return results
@@ -0,0 +1,365 @@
+"""
+Analisi approssimate su un campione stratificato con intervalli di confidenza
+
+Il campione è stratificato per anno, superficie e livello torneo con
+allocazione proporzionale: ogni match campionato pesa N_h / n_h (match dello
+strato / match campionati). I conteggi vengono riportati alla scala del
+dataset con lo stimatore stratificato del totale, le percentuali con lo
+stimatore del rapporto (linearizzazione); gli intervalli sono normali con
+correzione per popolazione finita. I totali per strato (es. match per
+livello) sono esatti.
+
+L'ordine di estrazione è fissato una volta per strato (chiavi casuali): un
+campione più grande contiene quelli più piccoli e cambiare dimensione non
+richiede una nuova estrazione.
+"""
+import time
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from . import config
+
+logger = setup_logger(__name__)
+
+
+STRATA_COLUMNS = ['year', 'surface', 'tourney_level_name']
+
+# Righe del campione pilota per stimare la velocità in modalità time_budget
+_PILOT_ROWS = 5_000
+
+
+def _z(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+class StratifiedDesign:
+    """Campioni stratificati annidati di un DataFrame e pesi di espansione"""
+    
+    def __init__(self, df: pd.DataFrame, strata: List[str] = None, seed: Optional[int] = None):
+        """
+        Inizializza il disegno (un ordinamento casuale per strato).
+        
+        Args:
+            df: DataFrame pulito
+            strata: Colonne che definiscono gli strati (default: STRATA_COLUMNS)
+            seed: Seed dell'estrazione
+        """
+        strata = strata or STRATA_COLUMNS
+        self.df = df
+        # Codice combinato delle colonne di strato (0 = valore mancante)
+        codes = [pd.factorize(df[column])[0] + 1 for column in strata]
+        shape = [int(c.max()) + 1 if len(c) else 1 for c in codes]
+        _, self.stratum = np.unique(np.ravel_multi_index(codes, shape), return_inverse=True)
+        self.stratum = self.stratum.astype(np.int64)
+        self.population = np.bincount(self.stratum).astype(np.int64)
+        
+        # Posizione di ogni riga nell'ordine casuale del suo strato
+        rng = np.random.default_rng(seed)
+        order = np.lexsort((rng.random(len(df)), self.stratum))
+        starts = np.concatenate([[0], np.cumsum(self.population)[:-1]])
+        self.rank = np.empty(len(df), dtype=np.int64)
+        self.rank[order] = np.arange(len(df)) - starts[self.stratum[order]]
+    
+    def __len__(self) -> int:
+        return len(self.df)
+    
+    def allocation(self, size: int) -> np.ndarray:
+        """
+        Match campionati per strato (proporzionale, almeno 2 se disponibili).
+        
+        Args:
+            size: Dimensione complessiva desiderata
+        
+        Returns:
+            Array n_h per strato
+        """
+        fraction = min(1.0, size / max(len(self), 1))
+        n = np.ceil(self.population * fraction).astype(np.int64)
+        return np.minimum(self.population, np.maximum(n, 2))
+    
+    def sample(self, size: int) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        """
+        Campione stratificato.
+        
+        Args:
+            size: Dimensione desiderata
+        
+        Returns:
+            (righe campionate, strato di ogni riga, n_h per strato)
+        """
+        n = self.allocation(size)
+        mask = self.rank < n[self.stratum]
+        return self.df[mask], self.stratum[mask], n
+
+
+def estimate_totals(keys: pd.DataFrame, stratum: np.ndarray, population: np.ndarray,
+                    sampled: np.ndarray) -> pd.DataFrame:
+    """
+    Stima stratificata di conteggi per gruppo (righe campionate con una certa chiave).
+    
+    Args:
+        keys: Chiavi di gruppo delle righe campionate da contare
+        stratum: Strato di ogni riga di keys
+        population: N_h per strato
+        sampled: n_h per strato
+    
+    Returns:
+        DataFrame indicizzato per chiave con estimate e variance
+    """
+    cells = _cell_counts(keys, stratum)
+    return _totals(cells, population, sampled)
+
+
+def _cell_counts(keys: pd.DataFrame, stratum: np.ndarray) -> pd.Series:
+    """Righe campionate per (chiave, strato)."""
+    return keys.assign(_stratum=stratum).groupby(list(keys.columns) + ['_stratum'], observed=True).size()
+
+
+def _stratum_factor(population: np.ndarray, sampled: np.ndarray) -> np.ndarray:
+    """N_h^2 (1 - n_h/N_h) / (n_h - 1): varianza del totale per unità di p(1-p)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = population.astype(np.float64) ** 2 * (1 - sampled / population) / (sampled - 1)
+    return np.where(sampled > 1, factor, 0.0)
+
+
+def _totals(cells: pd.Series, population: np.ndarray, sampled: np.ndarray) -> pd.DataFrame:
+    """Totale stimato e varianza per chiave dai conteggi per (chiave, strato)."""
+    h = cells.index.get_level_values('_stratum').to_numpy()
+    p = cells.to_numpy() / sampled[h]
+    levels = list(range(cells.index.nlevels - 1))
+    parts = pd.DataFrame({
+        'estimate': p * population[h],
+        'variance': p * (1 - p) * _stratum_factor(population, sampled)[h],
+    }, index=cells.index)
+    return parts.groupby(level=levels).sum()
+
+
+def _ratio(successes: pd.Series, failures: pd.Series, population: np.ndarray,
+           sampled: np.ndarray) -> pd.DataFrame:
+    """
+    Stima di successi, prove e rapporto successi/prove per chiave.
+    
+    Ogni riga campionata conta per una chiave al più come successo o come
+    insuccesso (es. vittoria o sconfitta di un giocatore in un match).
+    
+    Returns:
+        DataFrame per chiave: successes, trials, ratio (e varianze)
+    """
+    cells = pd.DataFrame({'a': successes, 'b': failures}).fillna(0)
+    h = cells.index.get_level_values('_stratum').to_numpy()
+    n = sampled[h]
+    py = cells['a'].to_numpy() / n
+    px = (cells['a'] + cells['b']).to_numpy() / n
+    factor = _stratum_factor(population, sampled)[h]
+    levels = list(range(cells.index.nlevels - 1))
+    
+    parts = pd.DataFrame({
+        'successes': py * population[h],
+        'trials': px * population[h],
+        'var_successes': py * (1 - py) * factor,
+        'var_trials': px * (1 - px) * factor,
+        'cov': (py - py * px) * factor,
+    }, index=cells.index).groupby(level=levels).sum()
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = parts['successes'] / parts['trials']
+        parts['ratio'] = ratio
+        parts['var_ratio'] = (
+            parts['var_successes'] + ratio ** 2 * parts['var_trials'] - 2 * ratio * parts['cov']
+        ).clip(lower=0) / parts['trials'] ** 2
+    return parts
+
+
+def _with_interval(frame: pd.DataFrame, column: str, variance: pd.Series, z: float,
+                   scale: float = 1.0, decimals: int = 0, lower: float = 0.0,
+                   upper: Optional[float] = None) -> pd.DataFrame:
+    """Aggiunge {column}_low / {column}_high (estimate +- z * sd, troncato ai limiti)."""
+    half = z * np.sqrt(variance.to_numpy()) * scale
+    for suffix, bound in (('low', frame[column] - half), ('high', frame[column] + half)):
+        bound = bound.clip(lower=lower, upper=upper).round(decimals)
+        frame[f'{column}_{suffix}'] = bound.astype('int64') if decimals == 0 else bound
+    return frame
+
+
+class ApproximateAnalyzer:
+    """Analisi su campione stratificato con conteggi scalati e intervalli di confidenza"""
+    
+    def __init__(self, df: pd.DataFrame, confidence: float = config.BOOTSTRAP_CONFIDENCE,
+                 seed: Optional[int] = None, strata: List[str] = None):
+        """
+        Inizializza modalità approssimata.
+        
+        Args:
+            df: DataFrame pulito (popolazione)
+            confidence: Livello degli intervalli
+            seed: Seed dell'estrazione (risultati riproducibili)
+            strata: Colonne di stratificazione (default: anno, superficie, livello)
+        """
+        self.design = StratifiedDesign(df, strata, seed)
+        self.confidence = confidence
+        self._z = _z(confidence)
+        self._samples: Dict[int, Tuple[pd.DataFrame, np.ndarray, np.ndarray]] = {}
+        self._rows_per_second: Optional[float] = None
+    
+    def sample_size_for(self, target_error: Optional[float] = None, time_budget: Optional[float] = None,
+                        reference_share: float = config.APPROX_REFERENCE_SHARE) -> int:
+        """
+        Dimensione del campione per un errore o un tempo obiettivo.
+        
+        Args:
+            target_error: Semiampiezza relativa dell'intervallo (es. 0.05 = +-5%)
+                per il conteggio di un gruppo che vale reference_share dei match
+            time_budget: Secondi disponibili per un'analisi
+            reference_share: Quota dei match del gruppo di riferimento
+        
+        Returns:
+            Numero di match da campionare (al più l'intero dataset)
+        """
+        population = len(self.design)
+        sizes = [population]
+        
+        if target_error is not None:
+            # n0 = z^2 (1 - q) / (q e^2), con correzione per popolazione finita
+            n0 = self._z ** 2 * (1 - reference_share) / (reference_share * target_error ** 2)
+            sizes.append(int(np.ceil(n0 / (1 + n0 / max(population, 1)))))
+        
+        if time_budget is not None:
+            sizes.append(int(time_budget * self._throughput()))
+        
+        if len(sizes) == 1:
+            sizes.append(int(population * config.APPROX_SAMPLE_FRACTION))
+        return max(1, min(sizes))
+    
+    def _throughput(self) -> float:
+        """Righe campionate elaborate al secondo (misurate su un campione pilota)."""
+        if self._rows_per_second is None:
+            started = time.perf_counter()
+            sample, stratum, sampled = self.design.sample(_PILOT_ROWS)
+            self._wins_table(sample, stratum, sampled)
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            self._rows_per_second = len(sample) / elapsed
+        return self._rows_per_second
+    
+    def sample(self, target_error: Optional[float] = None, time_budget: Optional[float] = None,
+               sample_size: Optional[int] = None) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        """
+        Campione (in cache) per i parametri di una query.
+        
+        Returns:
+            (righe campionate, strato di ogni riga, n_h per strato)
+        """
+        size = sample_size or self.sample_size_for(target_error, time_budget)
+        if size not in self._samples:
+            self._samples[size] = self.design.sample(size)
+            logger.info("Campione stratificato: %d match su %d", len(self._samples[size][0]), len(self.design))
+        return self._samples[size]
+    
+    def _wins_table(self, sample: pd.DataFrame, stratum: np.ndarray, sampled: np.ndarray) -> pd.DataFrame:
+        """Vittorie, sconfitte e win rate stimati per giocatore (con varianze)."""
+        population = self.design.population
+        winners = pd.DataFrame({'player_name': sample['winner_name'].to_numpy()})
+        losers = pd.DataFrame({'player_name': sample['loser_name'].to_numpy()})
+        
+        table = _ratio(_cell_counts(winners, stratum), _cell_counts(losers, stratum), population, sampled)
+        for column, mask in (('grand_slam_wins', sample['tourney_level_name'] == 'Grand Slam'),
+                             ('hard_court_wins', sample['surface'] == 'Hard')):
+            mask = mask.to_numpy()
+            counts = estimate_totals(winners[mask], stratum[mask], population, sampled)
+            table[column] = counts['estimate'].reindex(table.index, fill_value=0)
+        return table
+    
+    def analyze_total_wins(self, top_n: int = 20, target_error: Optional[float] = None,
+                           time_budget: Optional[float] = None,
+                           sample_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Stima di analyze_total_wins con intervalli su vittorie e win rate.
+        
+        Args:
+            top_n: Top N giocatori
+            target_error: Errore relativo obiettivo (vedi sample_size_for)
+            time_budget: Secondi disponibili
+            sample_size: Dimensione esplicita del campione
+        
+        Returns:
+            DataFrame come ATPAnalyzer.analyze_total_wins (conteggi scalati) più
+            total_wins_low/high e win_rate_low/high
+        """
+        sample, stratum, sampled = self.sample(target_error, time_budget, sample_size)
+        table = self._wins_table(sample, stratum, sampled)
+        
+        wins = pd.DataFrame({
+            'player_name': table.index.get_level_values(0),
+            'total_wins': table['successes'].round().astype('int64').to_numpy(),
+            'grand_slam_wins': table['grand_slam_wins'].round().astype('int64').to_numpy(),
+            'hard_court_wins': table['hard_court_wins'].round().astype('int64').to_numpy(),
+            'total_losses': (table['trials'] - table['successes']).round().astype('int64').to_numpy(),
+        })
+        wins['total_matches'] = wins['total_wins'] + wins['total_losses']
+        wins['win_rate'] = (table['ratio'].to_numpy() * 100).round(2)
+        wins = _with_interval(wins, 'total_wins', table['var_successes'], self._z)
+        wins = _with_interval(wins, 'win_rate', table['var_ratio'], self._z, scale=100, decimals=2, upper=100)
+        
+        wins = wins[(wins['total_wins'] > 0) & (wins['total_matches'] >= config.MIN_MATCHES_PLAYER)]
+        wins = wins.sort_values('total_wins', ascending=False).head(top_n).reset_index(drop=True)
+        logger.info("✓ Top %d per total wins (stima su %d match, %.0f%%)", len(wins), len(sample), self.confidence * 100)
+        return wins
+    
+    def analyze_surface_performance(self, top_n: int = 10, target_error: Optional[float] = None,
+                                    time_budget: Optional[float] = None,
+                                    sample_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Stima di analyze_surface_performance con intervalli su vittorie e win rate.
+        
+        Returns:
+            DataFrame come ATPAnalyzer.analyze_surface_performance più
+            wins_low/high e win_rate_low/high
+        """
+        sample, stratum, sampled = self.sample(target_error, time_budget, sample_size)
+        surface = sample['surface'].to_numpy()
+        winners = pd.DataFrame({'surface': surface, 'player_name': sample['winner_name'].to_numpy()})
+        losers = pd.DataFrame({'surface': surface, 'player_name': sample['loser_name'].to_numpy()})
+        table = _ratio(_cell_counts(winners, stratum), _cell_counts(losers, stratum),
+                       self.design.population, sampled)
+        
+        stats = pd.DataFrame({
+            'player_name': table.index.get_level_values(1),
+            'wins': table['successes'].round().astype('int64').to_numpy(),
+            'losses': (table['trials'] - table['successes']).round().astype('int64').to_numpy(),
+            'surface': table.index.get_level_values(0),
+        })
+        stats.insert(3, 'total', stats['wins'] + stats['losses'])
+        stats.insert(4, 'win_rate', (table['ratio'].to_numpy() * 100).round(1))
+        stats = _with_interval(stats, 'wins', table['var_successes'], self._z)
+        stats = _with_interval(stats, 'win_rate', table['var_ratio'], self._z, scale=100, decimals=1, upper=100)
+        
+        parts = [
+            stats[stats['surface'] == name].sort_values('wins', ascending=False).head(top_n)
+            for name in config.SURFACE_TYPES if (stats['surface'] == name).any()
+        ]
+        return pd.concat(parts, ignore_index=True) if parts else stats.iloc[:0]
+    
+    def analyze_tournament_levels(self, target_error: Optional[float] = None,
+                                  time_budget: Optional[float] = None,
+                                  sample_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Match per livello torneo (esatti se il livello è tra gli strati).
+        
+        Returns:
+            DataFrame come ATPAnalyzer.analyze_tournament_levels più
+            match_count_low/high
+        """
+        sample, stratum, sampled = self.sample(target_error, time_budget, sample_size)
+        keys = pd.DataFrame({'tourney_level': sample['tourney_level_name'].to_numpy()})
+        table = estimate_totals(keys, stratum, self.design.population, sampled)
+        
+        levels = pd.DataFrame({
+            'tourney_level': table.index,
+            'match_count': table['estimate'].round().astype('int64').to_numpy(),
+        })
+        levels['percentage'] = (levels['match_count'] / levels['match_count'].sum() * 100).round(1)
+        levels = _with_interval(levels, 'match_count', table['variance'], self._z)
+        return levels.sort_values('match_count', ascending=False, ignore_index=True)
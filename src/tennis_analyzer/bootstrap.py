@@ -0,0 +1,177 @@
+"""
+Intervalli di confidenza bootstrap per metriche di rapporto per giocatore
+
+Il ricampionamento avviene per tutti i giocatori insieme: per ogni replica
+ogni giocatore estrae con reinserimento n_i dei suoi n_i match (pesi
+multinomiali), e i rapporti delle somme si ottengono con un bincount.
+Le repliche sono divise in blocchi con seed derivati da un SeedSequence,
+quindi il risultato non dipende dal numero di processi usati.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from . import config
+
+logger = setup_logger(__name__)
+
+
+# Estrazioni massime (repliche x match) per blocco di ricampionamento
+_BOOTSTRAP_BLOCK_CELLS = 8_000_000
+
+
+def _resample_ratio(offsets: np.ndarray, numerators: np.ndarray, denominators: np.ndarray,
+                    n_resamples: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """Rapporti ricampionati (repliche x gruppi) per un blocco di repliche."""
+    rng = np.random.default_rng(seed)
+    sizes = np.diff(offsets)
+    n_groups = len(sizes)
+    group_of_item = np.repeat(np.arange(n_groups), sizes)
+    n_items = len(group_of_item)
+    
+    # Indice uniforme nel segmento del proprio gruppo = pesi multinomiali sui match
+    draws = rng.random((n_resamples, n_items))
+    picks = offsets[group_of_item] + (draws * sizes[group_of_item]).astype(np.int64)
+    cells = (np.arange(n_resamples)[:, None] * n_groups + group_of_item).ravel()
+    
+    num = np.bincount(cells, weights=numerators[picks].ravel(), minlength=n_resamples * n_groups)
+    den = np.bincount(cells, weights=denominators[picks].ravel(), minlength=n_resamples * n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (num / den).reshape(n_resamples, n_groups)
+
+
+def _resample_proportion(successes: np.ndarray, trials: np.ndarray, n_resamples: int,
+                         seed: np.random.SeedSequence) -> np.ndarray:
+    """Proporzioni ricampionate (repliche x gruppi) per esiti 0/1."""
+    rng = np.random.default_rng(seed)
+    trials = np.asarray(trials, dtype=np.int64)
+    p = np.divide(successes, trials, out=np.zeros(len(trials)), where=trials > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return rng.binomial(trials, p, size=(n_resamples, len(trials))) / trials
+
+
+def _run_blocks(worker, args: tuple, n_resamples: int, block: int, seed: Optional[int],
+                n_jobs: int) -> np.ndarray:
+    """Esegue le repliche a blocchi (in processi separati se n_jobs > 1)."""
+    sizes = [min(block, n_resamples - start) for start in range(0, n_resamples, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    
+    if n_jobs > 1 and len(sizes) > 1:
+        logger.info("Bootstrap: %d repliche in %d blocchi su %d processi", n_resamples, len(sizes), n_jobs)
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(worker, *args, size, child) for size, child in zip(sizes, seeds)]
+            parts = [future.result() for future in futures]
+    else:
+        parts = [worker(*args, size, child) for size, child in zip(sizes, seeds)]
+    
+    return np.vstack(parts)
+
+
+def _summarize(samples: np.ndarray, confidence: float) -> Dict[str, np.ndarray]:
+    """Estremi percentili e deviazione standard delle repliche per gruppo."""
+    alpha = (1 - confidence) / 2
+    with np.errstate(invalid='ignore'):
+        low, high = np.nanquantile(samples, [alpha, 1 - alpha], axis=0) if np.isnan(samples).any() \
+            else np.quantile(samples, [alpha, 1 - alpha], axis=0)
+        std = np.nanstd(samples, axis=0)
+    return {'low': low, 'high': high, 'std': std}
+
+
+def bootstrap_ratio(offsets: np.ndarray, numerators: np.ndarray, denominators: Optional[np.ndarray] = None,
+                    n_resamples: int = config.BOOTSTRAP_RESAMPLES,
+                    confidence: float = config.BOOTSTRAP_CONFIDENCE, seed: Optional[int] = None,
+                    n_jobs: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Bootstrap del rapporto di somme sum(num) / sum(den) per ogni gruppo.
+    
+    Args:
+        offsets: Estremi CSR dei gruppi (giocatori) sugli array dei match
+        numerators: Numeratore per match (es. 1 se vinto)
+        denominators: Denominatore per match (default: 1, rapporto = media)
+        n_resamples: Numero di repliche
+        confidence: Livello di confidenza (es. 0.95)
+        seed: Seed per risultati riproducibili
+        n_jobs: Processi per i blocchi di repliche
+    
+    Returns:
+        Dict di array per gruppo: estimate, low, high, std
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    numerators = np.asarray(numerators, dtype=np.float64)
+    denominators = np.ones_like(numerators) if denominators is None \
+        else np.asarray(denominators, dtype=np.float64)
+    
+    sizes = np.diff(offsets)
+    group_of_item = np.repeat(np.arange(len(sizes)), sizes)
+    num = np.bincount(group_of_item, weights=numerators, minlength=len(sizes))
+    den = np.bincount(group_of_item, weights=denominators, minlength=len(sizes))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimate = num / den
+    
+    block = max(1, _BOOTSTRAP_BLOCK_CELLS // max(len(numerators), 1))
+    samples = _run_blocks(
+        _resample_ratio, (offsets, numerators, denominators), n_resamples, block, seed, n_jobs
+    )
+    return {'estimate': estimate, **_summarize(samples, confidence)}
+
+
+def bootstrap_proportion(successes: np.ndarray, trials: np.ndarray,
+                         n_resamples: int = config.BOOTSTRAP_RESAMPLES,
+                         confidence: float = config.BOOTSTRAP_CONFIDENCE, seed: Optional[int] = None,
+                         n_jobs: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Bootstrap di proporzioni (es. win rate) dai soli conteggi.
+    
+    Per esiti 0/1 il numero di successi in un ricampionamento multinomiale
+    degli n match è Binomiale(n, k/n): stesso risultato di bootstrap_ratio
+    senza materializzare i singoli match.
+    
+    Args:
+        successes: Successi per gruppo (es. vittorie)
+        trials: Prove per gruppo (es. match disputati)
+        n_resamples: Numero di repliche
+        confidence: Livello di confidenza
+        seed: Seed per risultati riproducibili
+        n_jobs: Processi per i blocchi di repliche
+    
+    Returns:
+        Dict di array per gruppo: estimate, low, high, std
+    """
+    successes = np.asarray(successes, dtype=np.float64)
+    trials = np.asarray(trials, dtype=np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimate = successes / trials
+    
+    block = max(1, _BOOTSTRAP_BLOCK_CELLS // max(len(trials), 1))
+    samples = _run_blocks(_resample_proportion, (successes, trials), n_resamples, block, seed, n_jobs)
+    return {'estimate': estimate, **_summarize(samples, confidence)}
+
+
+def add_confidence_intervals(frame: pd.DataFrame, rate_col: str, successes_col: str, trials_col: str,
+                             scale: float = 100, **options) -> pd.DataFrame:
+    """
+    Aggiunge {rate_col}_low / {rate_col}_high a una tabella con conteggi per giocatore.
+    
+    Args:
+        frame: Tabella (una riga per giocatore/gruppo)
+        rate_col: Colonna della metrica (es. 'win_rate')
+        successes_col: Colonna dei successi
+        trials_col: Colonna delle prove
+        scale: Scala della metrica (100 = percentuale)
+        **options: n_resamples, confidence, seed, n_jobs (vedi bootstrap_proportion)
+    
+    Returns:
+        Copia di frame con le colonne dell'intervallo
+    """
+    frame = frame.copy()
+    if frame.empty:
+        return frame.assign(**{f'{rate_col}_low': [], f'{rate_col}_high': []})
+    
+    interval = bootstrap_proportion(frame[successes_col].to_numpy(), frame[trials_col].to_numpy(), **options)
+    frame[f'{rate_col}_low'] = (interval['low'] * scale).round(2)
+    frame[f'{rate_col}_high'] = (interval['high'] * scale).round(2)
+    return frame
+
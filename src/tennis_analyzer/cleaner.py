@@ -133,16 +133,7 @@ class ATPDataCleaner:
         df['month'] = df['tourney_date'].dt.month
         
         # Tipo torneo
-        level_map = {
-            'G': 'Grand Slam',
-            'M': 'Masters 1000',
-            'A': 'ATP Tour',
-            'D': 'Davis Cup',
-            'F': 'Finals',
-            'C': 'Challenger',
-            'I': 'ITF'
-        }
-        df['tourney_level_name'] = df.get('tourney_level', 'A').map(level_map).fillna('Other')
+        df['tourney_level_name'] = df.get('tourney_level', 'A').map(config.TOURNEY_LEVELS).fillna('Other')
         
         logger.info(f"  - Colonne derivate aggiunte (year, upset_indicator, ecc.)")
         
@@ -201,6 +192,30 @@ class ATPDataCleaner:
         return df_clean
 
 
+def chronological_order(df: pd.DataFrame) -> np.ndarray:
+    """
+    Posizioni dei match in ordine cronologico.
+    
+    Ordina per tourney_date, poi per turno (config.ROUND_ORDER) e match_num;
+    l'ordinamento è stabile, quindi a parità resta l'ordine originale.
+    
+    Args:
+        df: DataFrame pulito
+    
+    Returns:
+        Array di posizioni (da usare con take/iloc)
+    """
+    keys = [df['tourney_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)]
+    
+    if 'round' in df.columns:
+        keys.append(df['round'].map(config.ROUND_ORDER).fillna(len(config.ROUND_ORDER)).to_numpy())
+    if 'match_num' in df.columns:
+        keys.append(pd.to_numeric(df['match_num'], errors='coerce').fillna(0).to_numpy())
+    
+    # np.lexsort usa l'ultima chiave come primaria
+    return np.lexsort(keys[::-1])
+
+
 # Funzione di utilità
 def clean_atp_data(df: pd.DataFrame) -> pd.DataFrame:
     """
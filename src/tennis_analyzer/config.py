@@ -12,22 +12,39 @@ RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 OUTPUT_DIR = PROJECT_ROOT / "output"
 VISUALS_DIR = OUTPUT_DIR / "visuals"
-
-# Creare directory se non esistono
-RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
-PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
-VISUALS_DIR.mkdir(parents=True, exist_ok=True)
+# Le directory vengono create da chi scrive, alla prima scrittura
 
 # URL Dataset
 GITHUB_SACKMANN_URL = "https://raw.githubusercontent.com/JeffSackmann/tennis_atp/master"
 
+# Classifiche ATP settimanali (file Sackmann per decade + correnti)
+RANKINGS_FILES = [
+    "atp_rankings_70s.csv",
+    "atp_rankings_80s.csv",
+    "atp_rankings_90s.csv",
+    "atp_rankings_00s.csv",
+    "atp_rankings_10s.csv",
+    "atp_rankings_20s.csv",
+    "atp_rankings_current.csv",
+]
+PLAYERS_FILE = "atp_players.csv"
+RANKINGS_STORE = PROCESSED_DATA_DIR / "atp_rankings.npz"
+RANKINGS_RETRY_HOURS = 24  # Dopo un download fallito, nessun nuovo tentativo per queste ore
+RANKINGS_MAX_GAP_DAYS = 14  # Validità massima di una classifica (buchi nelle classifiche storiche)
+MATCH_STORE_DIR = PROCESSED_DATA_DIR / "match_store"  # Colonne .npy mappate in memoria
+RANKING_THRESHOLDS = [1, 5, 10, 20, 100]
+
 # Parametri di analisi
 ANALYSIS_YEARS = range(2014, 2026)  # 2025-2026 non ancora disponibili su github
 MIN_MATCHES_PLAYER = 20  # Minimo match per inclusione analisi
+SEASON_ROLLOVER_DAYS = 7  # Tornei di fine dicembre contati nella stagione successiva
 
 # Logging
 LOG_LEVEL = logging.INFO
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_STRUCTURED = False  # JSON lines invece che testo
+LOG_ASYNC = True  # Scrittura in un thread dedicato (QueueHandler/QueueListener)
+LOG_RESULTS = False  # Tabelle di risultati riga per riga (altrimenti solo riepilogo)
 
 # Colori per visualizzazioni
 COLORS_PALETTE = {
@@ -40,6 +57,9 @@ COLORS_PALETTE = {
 
 # Output files
 CLEAN_DATA_CSV = OUTPUT_DIR / "clean_data.csv"
+BENCHMARK_HISTORY = OUTPUT_DIR / "benchmarks" / "history.jsonl"
+PROFILE_DIR = OUTPUT_DIR / "profile"  # Report JSON e dump cProfile (main.py --profile)
+PROFILE_REPORT = PROFILE_DIR / "profile_report.json"
 RANKING_EVOLUTION_PNG = VISUALS_DIR / "01_top_atp_days.png"
 WINS_BY_PLAYER_PNG = VISUALS_DIR / "02_total_wins.png"
 WINS_BY_SURFACE_PNG = VISUALS_DIR / "03_wins_by_surface.png"
@@ -49,6 +69,55 @@ WIN_RATE_ANALYSIS_PNG = VISUALS_DIR / "05_win_rate_analysis.png"
 # Feature engineering
 SURFACE_TYPES = ["Hard", "Clay", "Grass", "Carpet"]
 
+# Codici livello torneo (tourney_level) -> tourney_level_name
+TOURNEY_LEVELS = {
+    "G": "Grand Slam",
+    "M": "Masters 1000",
+    "A": "ATP Tour",
+    "D": "Davis Cup",
+    "F": "Finals",
+    "C": "Challenger",
+    "I": "ITF",
+}
+
+# Ordine cronologico dei turni all'interno di un torneo
+ROUND_ORDER = {
+    "Q1": 0, "Q2": 1, "Q3": 2, "Q4": 3, "ER": 4,
+    "R128": 5, "R64": 6, "R32": 7, "R16": 8, "RR": 9,
+    "QF": 10, "SF": 11, "BR": 12, "F": 13,
+}
+
+# Rating Elo
+ELO_INITIAL_RATING = 1500.0
+ELO_SCALE = 400.0
+
+# Intervalli di confidenza bootstrap
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_CONFIDENCE = 0.95
+
+# Query con pushdown su partizioni annuali (righe per blocco di lettura)
+QUERY_CHUNKSIZE = 100_000
+
+# Analisi approssimate: frazione campionata di default e quota del gruppo di
+# riferimento per target_error (circa i match di un top player sull'intero storico)
+APPROX_SAMPLE_FRACTION = 0.1
+APPROX_REFERENCE_SHARE = 0.005
+
+# Servizio di query locale (serve.py): indirizzo, risposte in cache e
+# intervallo (secondi) dei controlli di una nuova versione del dataset
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_CACHE_SIZE = 512
+SERVICE_RELOAD_INTERVAL = 2.0
+
+# Pipeline a grafo (main.py): checkpoint degli stadi e thread per gli stadi indipendenti
+PIPELINE_CACHE_DIR = PROCESSED_DATA_DIR / "pipeline"
+PIPELINE_WORKERS = 4
+
+# Esecuzione out-of-core: limite di memoria (MB) e fattore tra blocco grezzo e picco
+OUT_OF_CORE_MEMORY_MB = 256
+OUT_OF_CORE_OVERHEAD = 8
+
 # Configurazione output directory
 OUTPUT_FILES = {
     "clean_data": CLEAN_DATA_CSV,
@@ -6,8 +6,10 @@ import pandas as pd
 from pathlib import Path
 from typing import List, Optional
 import io
+import time
 
 from .logger import setup_logger
+from .rankings import RankingsStore
 from . import config
 
 logger = setup_logger(__name__)
@@ -40,6 +42,7 @@ class ATPDataDownloader:
             response.raise_for_status()
             
             # Salvare localmente
+            self.raw_data_dir.mkdir(parents=True, exist_ok=True)
             csv_file.write_bytes(response.content)
             logger.info(f"✓ Download completato: {csv_file}")
             
@@ -131,10 +134,119 @@ class ATPDataDownloader:
         
         # Salvare consolidato localmente
         if not df.empty:
+            consolidated_file.parent.mkdir(parents=True, exist_ok=True)
             df.to_csv(consolidated_file, index=False)
             logger.info(f"✓ Consolidato salvato: {consolidated_file}")
         
         return df
+    
+    def _download_csv(self, filename: str, **read_kwargs) -> Optional[pd.DataFrame]:
+        """
+        Scarica un CSV dal repository Sackmann salvandolo in raw_data_dir.
+        
+        Args:
+            filename: Nome file (es. atp_rankings_10s.csv)
+            read_kwargs: Parametri aggiuntivi per pd.read_csv
+        
+        Returns:
+            DataFrame o None se errore
+        """
+        url = f"{self.base_url}/{filename}"
+        csv_file = self.raw_data_dir / filename
+        
+        try:
+            logger.info(f"Scaricando {filename} da {url}")
+            response = requests.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            
+            self.raw_data_dir.mkdir(parents=True, exist_ok=True)
+            csv_file.write_bytes(response.content)
+            df = pd.read_csv(io.BytesIO(response.content), **read_kwargs)
+            logger.info(f"  - Record scaricati: {len(df)}")
+            
+            return df
+        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"✗ Errore download {filename}: {e}")
+            return None
+    
+    def _local_or_download_csv(self, filename: str, use_local: bool, **read_kwargs) -> Optional[pd.DataFrame]:
+        """CSV da raw_data_dir se già scaricato (e use_local), altrimenti dal repository."""
+        csv_file = self.raw_data_dir / filename
+        if use_local and csv_file.exists():
+            logger.info("Caricando da file locale: %s", csv_file)
+            return pd.read_csv(csv_file, **read_kwargs)
+        return self._download_csv(filename, **read_kwargs)
+    
+    def download_rankings(self, use_local: bool = True) -> Optional[RankingsStore]:
+        """
+        Scarica le classifiche ATP settimanali e le converte in archivio compatto.
+        
+        Args:
+            use_local: Se True, usa i CSV già presenti in raw_data_dir
+        
+        Returns:
+            RankingsStore salvato in config.RANKINGS_STORE, None se errore
+            (anche parziale: una decade mancante falserebbe i giorni da n.1)
+        """
+        # Tipi compatti già in parsing: decine di milioni di righe
+        dtypes = {'ranking_date': 'int32', 'rank': 'int16', 'player': 'int32', 'points': 'float32'}
+        
+        frames, missing = [], []
+        for filename in config.RANKINGS_FILES:
+            df = self._local_or_download_csv(filename, use_local, dtype=dtypes)
+            if df is None:
+                missing.append(filename)
+            else:
+                frames.append(df)
+        
+        players = self._local_or_download_csv(
+            config.PLAYERS_FILE, use_local, usecols=['player_id', 'name_first', 'name_last'],
+            dtype={'player_id': 'int32'}
+        )
+        if players is None:
+            missing.append(config.PLAYERS_FILE)
+        
+        if missing:
+            logger.error("✗ Classifiche incomplete, archivio non salvato (mancano: %s)", ', '.join(missing))
+            return None
+        
+        store = RankingsStore.from_frames(pd.concat(frames, ignore_index=True), players)
+        store.save(config.RANKINGS_STORE)
+        
+        return store
+    
+    def get_rankings(self, use_local: bool = True) -> Optional[RankingsStore]:
+        """
+        Classifiche ATP settimanali, con fallback locale.
+        
+        Args:
+            use_local: Se True, carica l'archivio locale se presente
+        
+        Returns:
+            RankingsStore o None se non disponibile
+        """
+        if use_local and config.RANKINGS_STORE.exists():
+            store = RankingsStore.load(config.RANKINGS_STORE)
+            if store is not None:
+                return store
+        
+        # Tentativo fallito di recente: niente nuovi download (es. offline) fino alla scadenza
+        failed_marker = config.RANKINGS_STORE.with_name(config.RANKINGS_STORE.name + '.failed')
+        if use_local and failed_marker.exists():
+            age_hours = (time.time() - failed_marker.stat().st_mtime) / 3600
+            if age_hours < config.RANKINGS_RETRY_HOURS:
+                logger.warning("Classifiche non disponibili (download fallito %.1f ore fa, "
+                               "nuovo tentativo dopo %d ore)", age_hours, config.RANKINGS_RETRY_HOURS)
+                return None
+        
+        store = self.download_rankings(use_local=use_local)
+        if store is None:
+            failed_marker.parent.mkdir(parents=True, exist_ok=True)
+            failed_marker.touch()
+        else:
+            failed_marker.unlink(missing_ok=True)
+        return store
 
 
 # Funzione di utilità
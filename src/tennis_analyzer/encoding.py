@@ -0,0 +1,192 @@
+"""
+Codifica stabile dei nomi giocatori in codici interi e codifica a colonne
+di un DataFrame (array a larghezza fissa + dizionari per le stringhe)
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+
+
+class PlayerCodec:
+    """Dizionario nome giocatore -> codice intero, estendibile senza rinumerare"""
+    
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Inizializza codec.
+        
+        Args:
+            names: Nomi iniziali (codici assegnati in ordine)
+        """
+        self._index = pd.Index([], dtype=object)
+        self._codes: Dict[str, int] = {}
+        self.encode(pd.Series(list(names), dtype=object))
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._codes
+    
+    @property
+    def names(self) -> np.ndarray:
+        """Nomi in ordine di codice."""
+        return self._index.to_numpy()
+    
+    def encode(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Codifica nomi, assegnando nuovi codici ai nomi mai visti.
+        
+        Args:
+            names: Nomi giocatori
+        
+        Returns:
+            Array int32 di codici
+        """
+        names = pd.Series(names, dtype=object) if not isinstance(names, pd.Series) else names
+        codes = self._index.get_indexer(names)
+        
+        missing = codes < 0
+        if missing.any():
+            new_names = pd.unique(names[missing].to_numpy())
+            self._codes.update(zip(new_names.tolist(), range(len(self._index), len(self._index) + len(new_names))))
+            self._index = self._index.append(pd.Index(new_names, dtype=object))
+            codes[missing] = self._index.get_indexer(names[missing])
+        
+        return codes.astype(np.int32)
+    
+    def code(self, name: str) -> int:
+        """Codice di un singolo nome in O(1) (-1 se sconosciuto)."""
+        return self._codes.get(name, -1)
+    
+    def lookup(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Codifica nomi senza estendere il dizionario.
+        
+        Args:
+            names: Nomi giocatori
+        
+        Returns:
+            Array int32 di codici (-1 per nomi sconosciuti)
+        """
+        return self._index.get_indexer(pd.Index(names, dtype=object)).astype(np.int32)
+    
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Converte codici in nomi.
+        
+        Args:
+            codes: Codici giocatore
+        
+        Returns:
+            Array di nomi
+        """
+        return self._index.to_numpy()[np.asarray(codes)]
+
+
+def code_dtype(n_categories: int) -> np.dtype:
+    """Dtype dei codici scelto da pandas per n categorie (Categorical.from_codes senza copia)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def encode_columns(df: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], Dict[str, dict]]:
+    """
+    Codifica un DataFrame come array a larghezza fissa.
+    
+    Le colonne numeriche, booleane e datetime restano array NumPy; le altre
+    (stringhe, categorie, oggetti) diventano codici interi più un dizionario
+    dei valori distinti (-1 = valore mancante).
+    
+    Args:
+        df: DataFrame da codificare (l'indice non viene conservato)
+    
+    Returns:
+        (array per colonna, schema per colonna con kind, dtype e categories)
+    """
+    arrays, schema = {}, {}
+    for name, series in df.items():
+        dtype = series.dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+            arrays[name] = np.ascontiguousarray(series.to_numpy())
+            schema[name] = {'kind': 'fixed', 'dtype': dtype.str}
+        else:
+            # Dizionario ordinato: groupby/sort sui Categorical danno l'ordine delle stringhe
+            codes, uniques = pd.factorize(series, sort=True)
+            uniques = np.asarray(uniques, dtype=object)
+            arrays[name] = codes.astype(code_dtype(len(uniques)))
+            schema[name] = {'kind': 'dictionary', 'dtype': str(dtype), 'categories': uniques}
+    return arrays, schema
+
+
+def decode_columns(arrays: Dict[str, np.ndarray], schema: Dict[str, dict],
+                   strings: str = 'category', columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Ricostruisce un DataFrame da encode_columns.
+    
+    Args:
+        arrays: Array per colonna (anche viste su memoria condivisa o mmap)
+        schema: Schema da encode_columns
+        strings: 'category' = colonne a dizionario come Categorical sui
+            codici (nessuna copia); 'dense' = valori nel dtype originale (copia)
+        columns: Colonne da ricostruire (default: tutte)
+    
+    Returns:
+        DataFrame; le colonne fisse sono viste sugli array (nessuna copia)
+    """
+    if strings not in ('category', 'dense'):
+        raise ValueError(f"strings non valido: {strings} (usare 'category' o 'dense')")
+    
+    data = {}
+    for name in (columns if columns is not None else schema):
+        spec, values = schema[name], arrays[name]
+        if spec['kind'] == 'fixed':
+            data[name] = pd.Series(values, copy=False)
+            continue
+        
+        categories = pd.Index(spec['categories'], dtype=object)
+        if spec['dtype'] not in ('object', 'category'):
+            # Categorie nel tipo originale (es. str): decode_labels ritrova lo stesso dtype
+            categories = categories.astype(spec['dtype'])
+        categorical = pd.Categorical.from_codes(values, categories=categories)
+        if strings == 'dense':
+            data[name] = pd.Series(categorical).astype(object).astype(spec['dtype'])
+        else:
+            data[name] = pd.Series(categorical, copy=False)
+    
+    return pd.DataFrame(data, copy=False)
+
+
+def _plain(values):
+    """Series/Index Categorical convertito nel tipo delle sue categorie."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.astype(values.dtype.categories.dtype)
+    return values
+
+
+def decode_labels(result, columns: Optional[Iterable[str]] = None):
+    """
+    Etichette Categorical di un risultato (colonne e indice) nel tipo delle categorie.
+    
+    Su un dataset a dizionario (SharedDataset, MatchStore con strings='category')
+    i raggruppamenti producono etichette Categorical: convertite qui, i
+    risultati hanno gli stessi tipi del percorso su DataFrame denso.
+    
+    Args:
+        result: DataFrame o Series di un'analisi
+        columns: Colonne da convertire (default: tutte le Categorical)
+    
+    Returns:
+        Copia superficiale con etichette convertite
+    """
+    result = result.copy(deep=False)
+    if isinstance(result.index, pd.MultiIndex):
+        result.index = result.index.set_levels([_plain(level) for level in result.index.levels])
+    else:
+        result.index = _plain(result.index)
+    if isinstance(result, pd.DataFrame):
+        for name in (columns if columns is not None else result.columns):
+            result[name] = _plain(result[name])
+    return result
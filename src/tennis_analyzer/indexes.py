@@ -0,0 +1,201 @@
+"""
+Indici precalcolati sul dataset ATP per interrogazioni rapide
+"""
+from typing import Dict, Optional
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from . import config
+
+logger = setup_logger(__name__)
+
+
+def _pair_keys(codes_a: np.ndarray, codes_b: np.ndarray) -> np.ndarray:
+    """Chiave int64 della coppia non ordinata (codice minore nei 32 bit alti)."""
+    lo = np.minimum(codes_a, codes_b).astype(np.int64)
+    hi = np.maximum(codes_a, codes_b).astype(np.int64)
+    return (lo << 32) | hi
+
+
+class HeadToHeadIndex:
+    """Indice head-to-head: vittorie per coppia (per superficie e livello) e righe dei match"""
+    
+    def __init__(self, winner_codes: np.ndarray, loser_codes: np.ndarray,
+                 surfaces: pd.Series, levels: pd.Series):
+        """
+        Costruisce l'indice con un solo ordinamento dei match per coppia.
+        
+        Args:
+            winner_codes: Codici vincitori (uno per riga del dataset)
+            loser_codes: Codici perdenti
+            surfaces: Superficie di ogni riga
+            levels: tourney_level_name di ogni riga
+        """
+        keys = _pair_keys(winner_codes, loser_codes)
+        # Lato 0 = giocatore con codice minore, lato 1 = codice maggiore
+        side = (winner_codes > loser_codes).astype(np.int64)
+        
+        order = np.argsort(keys, kind='stable')
+        self.pair_keys, starts = np.unique(keys[order], return_index=True)
+        self.offsets = np.append(starts, len(keys)).astype(np.int64)
+        self.rows = order.astype(np.int64)
+        
+        n_pairs = len(self.pair_keys)
+        pair_of_row = np.empty(len(keys), dtype=np.int64)
+        pair_of_row[order] = np.repeat(np.arange(n_pairs), np.diff(self.offsets))
+        
+        self.surfaces = list(config.SURFACE_TYPES) + ['Unknown']
+        surface_codes = pd.Index(self.surfaces).get_indexer(surfaces)
+        surface_codes[surface_codes < 0] = len(self.surfaces) - 1
+        
+        self.levels = sorted(pd.unique(levels.dropna()))
+        level_codes = pd.Index(self.levels).get_indexer(levels)
+        
+        self.surface_wins = self._count(pair_of_row, surface_codes, side, n_pairs, len(self.surfaces))
+        self.level_wins = self._count(pair_of_row, level_codes, side, n_pairs, len(self.levels))
+        self.wins = self.surface_wins.sum(axis=1)
+        
+        # Ricerca O(1) chiave coppia -> posizione
+        self._lookup = dict(zip(self.pair_keys.tolist(), range(n_pairs)))
+    
+    @staticmethod
+    def _count(pair_of_row: np.ndarray, category: np.ndarray, side: np.ndarray,
+               n_pairs: int, n_categories: int) -> np.ndarray:
+        """Vittorie per (coppia, categoria, lato) con un solo bincount."""
+        valid = category >= 0
+        cells = (pair_of_row[valid] * n_categories + category[valid]) * 2 + side[valid]
+        counts = np.bincount(cells, minlength=n_pairs * n_categories * 2)
+        return counts.reshape(n_pairs, n_categories, 2)
+    
+    def __len__(self) -> int:
+        return len(self.pair_keys)
+    
+    def pair_position(self, code1: int, code2: int) -> Optional[int]:
+        """Posizione della coppia nell'indice (None se mai affrontati)."""
+        if code1 < 0 or code2 < 0 or code1 == code2:
+            return None
+        return self._lookup.get(int(_pair_keys(np.int64(code1), np.int64(code2))))
+    
+    def pair_rows(self, code1: int, code2: int) -> np.ndarray:
+        """Posizioni (nel dataset) dei match tra due giocatori, in ordine di dataset."""
+        pos = self.pair_position(code1, code2)
+        if pos is None:
+            return np.empty(0, dtype=np.int64)
+        return self.rows[self.offsets[pos]:self.offsets[pos + 1]]
+    
+    def record(self, code1: int, code2: int) -> Dict:
+        """
+        Bilancio tra due giocatori dal punto di vista di code1.
+        
+        Args:
+            code1: Codice primo giocatore
+            code2: Codice secondo giocatore
+        
+        Returns:
+            Dict con wins/losses totali e per superficie e livello
+        """
+        pos = self.pair_position(code1, code2)
+        if pos is None:
+            return {
+                'wins': 0, 'losses': 0,
+                'by_surface': {}, 'by_level': {},
+            }
+        
+        # Orientare i lati: code1 è il lato 0 se ha il codice minore
+        mine, theirs = (0, 1) if code1 < code2 else (1, 0)
+        
+        return {
+            'wins': int(self.wins[pos, mine]),
+            'losses': int(self.wins[pos, theirs]),
+            'by_surface': {
+                surface: (int(counts[mine]), int(counts[theirs]))
+                for surface, counts in zip(self.surfaces, self.surface_wins[pos]) if counts.any()
+            },
+            'by_level': {
+                level: (int(counts[mine]), int(counts[theirs]))
+                for level, counts in zip(self.levels, self.level_wins[pos]) if counts.any()
+            },
+        }
+    
+    def matrix(self, codes: np.ndarray, surface: str = None, level: str = None) -> np.ndarray:
+        """
+        Matrice N x N delle vittorie (riga i batte colonna j).
+        
+        Args:
+            codes: Codici dei giocatori (-1 = sconosciuto)
+            surface: Solo match su questa superficie
+            level: Solo match di questo livello
+        
+        Returns:
+            Array int64 N x N
+        """
+        if surface is not None:
+            counts = self.surface_wins[:, self.surfaces.index(surface)] if surface in self.surfaces \
+                else np.zeros((len(self), 2), dtype=np.int64)
+        elif level is not None:
+            counts = self.level_wins[:, self.levels.index(level)] if level in self.levels \
+                else np.zeros((len(self), 2), dtype=np.int64)
+        else:
+            counts = self.wins
+        
+        codes = np.asarray(codes, dtype=np.int64)
+        if len(self) == 0 or len(codes) == 0:
+            return np.zeros((len(codes), len(codes)), dtype=np.int64)
+        
+        row_codes = codes[:, None]
+        col_codes = codes[None, :]
+        keys = _pair_keys(row_codes, col_codes)
+        
+        pos = np.searchsorted(self.pair_keys, keys).clip(max=len(self) - 1)
+        found = (self.pair_keys[pos] == keys) & (row_codes >= 0) & (col_codes >= 0) & (row_codes != col_codes)
+        
+        # Vittorie del giocatore di riga: lato 0 se ha il codice minore
+        row_side = (row_codes > col_codes).astype(np.int64)
+        wins = counts[pos, row_side]
+        
+        return np.where(found, wins, 0)
+
+
+class PlayerMatchIndex:
+    """Indice CSR giocatore -> posizioni ordinate dei suoi match"""
+    
+    def __init__(self, winner_codes: np.ndarray, loser_codes: np.ndarray, n_players: int):
+        """
+        Costruisce l'indice con un solo ordinamento delle partecipazioni.
+        
+        Args:
+            winner_codes: Codici vincitori (uno per riga del dataset)
+            loser_codes: Codici perdenti
+            n_players: Numero di codici giocatore
+        """
+        n_rows = len(winner_codes)
+        codes = np.concatenate([winner_codes, loser_codes]).astype(np.int64)
+        rows = np.tile(np.arange(n_rows, dtype=np.int64), 2)
+        won = np.repeat([True, False], n_rows)
+        
+        # Ordinamento per (giocatore, riga): chiave unica int64
+        order = np.argsort(codes * max(n_rows, 1) + rows)
+        self.codes = codes[order]
+        self.rows = rows[order]
+        self.won = won[order]
+        self.offsets = np.zeros(n_players + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.codes, minlength=n_players), out=self.offsets[1:])
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def segment(self, code: int) -> slice:
+        """Intervallo delle partecipazioni di un giocatore negli array dell'indice."""
+        if code < 0 or code >= len(self):
+            return slice(0, 0)
+        return slice(self.offsets[code], self.offsets[code + 1])
+    
+    def player_rows(self, code: int) -> np.ndarray:
+        """Posizioni (nel dataset) dei match di un giocatore, in ordine di dataset."""
+        return self.rows[self.segment(code)]
+    
+    def player_won(self, code: int) -> np.ndarray:
+        """Esito (True = vittoria) dei match di un giocatore, allineato a player_rows."""
+        return self.won[self.segment(code)]
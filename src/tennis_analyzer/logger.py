@@ -1,42 +1,241 @@
 """
 Logging centralizzato per il progetto Tennis Stats Analyzer
+
+I logger dei moduli non scrivono direttamente: accodano i record a una coda
+in memoria e un QueueListener in un thread dedicato li formatta e li scrive
+(testo o JSON lines). I messaggi vanno scritti in stile % (logger.info("%d
+match", n)): gli argomenti vengono interpolati solo se il livello è attivo e
+nel thread del listener, quindi vanno passati valori immutabili.
+
+Le tabelle di risultati riga per riga (log_rows) sono opzionali e disattivate
+di default: le analisi registrano solo una riga di riepilogo.
 """
+import atexit
+import copy
+import json
 import logging
+import multiprocessing
+import os
+import queue
 import sys
-from pathlib import Path
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING, Optional, TextIO
+
+from . import config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Attributi standard di LogRecord (il resto sono campi extra=... per il JSON)
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_lock = threading.RLock()
+_loggers = set()
+_settings = {
+    'level': config.LOG_LEVEL,
+    'structured': config.LOG_STRUCTURED,
+    'asynchronous': config.LOG_ASYNC,
+    'results': config.LOG_RESULTS,
+    'stream': None,
+}
+_output: Optional[logging.Handler] = None
+_front: Optional[logging.Handler] = None
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Un oggetto JSON per riga: tempo, livello, logger, messaggio e campi extra"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage().strip('\n'),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler che non formatta nel thread chiamante.
+    
+    QueueHandler.prepare interpola il messaggio prima di accodarlo; qui
+    viene reso solo il traceback (i frame non sopravvivono al chiamante) e
+    il resto è lasciato al formatter del listener.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record = copy.copy(record)
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _Rows:
+    """Righe di un DataFrame formattate solo quando il record viene scritto."""
+    
+    def __init__(self, frame: 'pd.DataFrame', template: str):
+        self.frame = frame
+        self.template = template
+    
+    def __str__(self) -> str:
+        return "\n".join(self.template.format(**row) for row in self.frame.to_dict('records'))
+
+
+def _formatter() -> logging.Formatter:
+    if _settings['structured']:
+        return JsonFormatter(datefmt="%Y-%m-%dT%H:%M:%S")
+    return logging.Formatter(config.LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S")
+
+
+def _in_child_process() -> bool:
+    # I worker escono con os._exit: una coda asincrona perderebbe gli ultimi record
+    return multiprocessing.parent_process() is not None
+
+
+def _build():
+    """(Ri)crea handler di output, coda e listener secondo le impostazioni."""
+    global _output, _front, _listener
+    
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    
+    _output = logging.StreamHandler(_settings['stream'] or sys.stdout)
+    _output.setLevel(_settings['level'])
+    _output.setFormatter(_formatter())
+    
+    previous = _front
+    if _settings['asynchronous'] and not _in_child_process():
+        _front = _DeferredQueueHandler(queue.SimpleQueue())
+        _listener = QueueListener(_front.queue, _output, respect_handler_level=True)
+        _listener.start()
+    else:
+        _front = _output
+    
+    for name in _loggers:
+        logger = logging.getLogger(name)
+        if previous is not None:
+            logger.removeHandler(previous)
+        logger.addHandler(_front)
+
+
+def _ensure_built():
+    if _front is None:
+        _build()
+
+
+def _after_fork():
+    # Il thread del listener non esiste nel figlio: output sincrono
+    global _lock, _listener
+    _lock = threading.RLock()
+    _listener = None
+    _settings['asynchronous'] = False
+    if _front is not None:
+        _build()
+
 
-def setup_logger(name: str, log_level: int = logging.INFO) -> logging.Logger:
+def setup_logger(name: str, log_level: Optional[int] = None) -> logging.Logger:
     """
-    Configura un logger con output su console e file.
+    Configura un logger collegato all'output condiviso (coda asincrona).
     
     Args:
         name: Nome del logger (tipicamente __name__)
-        log_level: Livello logging (default: INFO)
+        log_level: Livello logging (default: config.LOG_LEVEL)
     
     Returns:
         Logger configurato
     """
     logger = logging.getLogger(name)
-    logger.setLevel(log_level)
+    logger.setLevel(log_level if log_level is not None else _settings['level'])
     
     # Evita duplicate handlers
     if logger.handlers:
         return logger
     
-    # Formato log
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-    
-    # Handler console (output colorato è opzionale)
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(log_level)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    with _lock:
+        _ensure_built()
+        _loggers.add(name)
+        logger.addHandler(_front)
     
     return logger
 
 
+def configure_logging(level: Optional[int] = None, structured: Optional[bool] = None,
+                      asynchronous: Optional[bool] = None, results: Optional[bool] = None,
+                      stream: Optional[TextIO] = None):
+    """
+    Cambia le impostazioni di tutti i logger del progetto.
+    
+    Args:
+        level: Livello di logging
+        structured: Se True, output JSON lines invece che testo
+        asynchronous: Se True, scrittura in un thread dedicato tramite coda
+        results: Se True, log_rows scrive le tabelle di risultati riga per riga
+        stream: Stream di destinazione (default: stdout)
+    """
+    with _lock:
+        for key, value in (('level', level), ('structured', structured), ('asynchronous', asynchronous),
+                           ('results', results), ('stream', stream)):
+            if value is not None:
+                _settings[key] = value
+        if level is not None:
+            for name in _loggers:
+                logging.getLogger(name).setLevel(level)
+        _build()
+
+
+def flush_logs():
+    """Attende la scrittura dei record accodati (es. prima di stampare su stdout)."""
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+
+def results_enabled(logger: logging.Logger) -> bool:
+    """True se le tabelle di risultati riga per riga vanno registrate."""
+    return _settings['results'] and logger.isEnabledFor(logging.INFO)
+
+
+def log_rows(logger: logging.Logger, frame: 'pd.DataFrame', template: str, limit: Optional[int] = None):
+    """
+    Righe di un risultato come unico record (solo se i risultati sono attivi).
+    
+    Args:
+        logger: Logger di destinazione
+        frame: Risultato tabellare
+        template: Formato str.format di una riga con le colonne come campi
+        limit: Numero massimo di righe
+    """
+    if not results_enabled(logger) or frame.empty:
+        return
+    rows = frame.head(limit) if limit is not None else frame
+    logger.info("\n%s", _Rows(rows.copy(), template))
+
+
+@atexit.register
+def _shutdown():
+    # Registrato dopo logging.shutdown: eseguito prima, svuota la coda
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+
+
+if hasattr(os, 'register_at_fork'):
+    # Solo POSIX: su Windows i processi figli non ereditano il listener
+    os.register_at_fork(after_in_child=_after_fork)
+
+
 # Logger globale per il modulo
 logger = setup_logger(__name__)
@@ -0,0 +1,136 @@
+"""
+Map-reduce degli aggregati su shard annuali
+
+Ogni stagione è uno shard indipendente: la fase map calcola i
+MatchAggregates dello shard (lettura out-of-core dalla partizione annuale)
+in un pool di processi, la fase reduce li combina con merge_all. Con una
+cartella di scambio i parziali sono file (partial_{anno}.pkl): la fase map
+può girare su macchine diverse e la reduce legge i file che trova.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import pandas as pd
+
+from .logger import setup_logger
+from .aggregates import MatchAggregates, merge_all
+from .out_of_core import stream_aggregates
+from .query import MatchQuery
+from . import config
+
+logger = setup_logger(__name__)
+
+
+PARTIAL_PATTERN = 'partial_*.pkl'
+
+
+def shard_years(data_dir: Path = None) -> List[int]:
+    """
+    Stagioni disponibili su disco (partizioni annuali o date del consolidato).
+    
+    Args:
+        data_dir: Cartella delle partizioni (default: config.RAW_DATA_DIR)
+    
+    Returns:
+        Lista ordinata di anni
+    """
+    files = MatchQuery(data_dir=data_dir).partitions()
+    if all(path.stem[-4:].isdigit() for path in files):
+        return sorted(int(path.stem[-4:]) for path in files)
+    
+    # Consolidato: solo la colonna delle date
+    years = set()
+    for path in files:
+        for chunk in pd.read_csv(path, usecols=['tourney_date'], chunksize=config.QUERY_CHUNKSIZE):
+            years.update((pd.to_numeric(chunk['tourney_date'], errors='coerce') // 10000).dropna().astype(int))
+    return sorted(years)
+
+
+def map_shard(year: int, data_dir: Path = None, memory_limit_mb: float = config.OUT_OF_CORE_MEMORY_MB,
+              output_dir: Path = None) -> Union[MatchAggregates, Path]:
+    """
+    Fase map: aggregati di una stagione.
+    
+    Args:
+        year: Stagione dello shard
+        data_dir: Cartella delle partizioni
+        memory_limit_mb: Limite di memoria della lettura a blocchi
+        output_dir: Se indicata, salva il parziale come file e ne ritorna il percorso
+    
+    Returns:
+        MatchAggregates dello shard, o percorso del file salvato
+    """
+    aggregates = stream_aggregates(MatchQuery(years=[year], data_dir=data_dir), memory_limit_mb)
+    if output_dir is None:
+        return aggregates
+    return aggregates.save(Path(output_dir) / f'partial_{year}.pkl')
+
+
+def map_shards(years: Optional[Iterable[int]] = None, data_dir: Path = None, n_jobs: int = 1,
+               memory_limit_mb: float = config.OUT_OF_CORE_MEMORY_MB,
+               output_dir: Path = None) -> List[Union[MatchAggregates, Path]]:
+    """
+    Fase map su più stagioni, in processi separati se n_jobs > 1.
+    
+    Args:
+        years: Stagioni da elaborare (default: tutte quelle su disco)
+        data_dir: Cartella delle partizioni
+        n_jobs: Processi del pool
+        memory_limit_mb: Limite di memoria complessivo (diviso tra i processi)
+        output_dir: Cartella di scambio dei parziali (opzionale)
+    
+    Returns:
+        Parziali (o percorsi dei file) nell'ordine delle stagioni
+    """
+    years = sorted(years) if years is not None else shard_years(data_dir)
+    limit = memory_limit_mb / max(1, min(n_jobs, len(years)))
+    
+    if n_jobs > 1 and len(years) > 1:
+        logger.info("Map: %d stagioni su %d processi (%.0f MB ciascuno)", len(years), n_jobs, limit)
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(map_shard, year, data_dir, limit, output_dir) for year in years]
+            return [future.result() for future in futures]
+    
+    return [map_shard(year, data_dir, limit, output_dir) for year in years]
+
+
+def reduce_partials(partials: Union[Path, str, Iterable[Union[MatchAggregates, Path, str]]]) -> MatchAggregates:
+    """
+    Fase reduce: combina parziali in memoria o salvati su file.
+    
+    Args:
+        partials: Cartella di scambio (tutti i partial_*.pkl), oppure
+            MatchAggregates e/o percorsi di file
+    
+    Returns:
+        MatchAggregates complessivi
+    """
+    if isinstance(partials, (str, Path)):
+        partials = sorted(Path(partials).glob(PARTIAL_PATTERN))
+    
+    def load(partial):
+        return partial if isinstance(partial, MatchAggregates) else MatchAggregates.load(partial)
+    
+    aggregates = merge_all(load(partial) for partial in partials)
+    logger.info("✓ Reduce: %d match aggregati", aggregates.n_matches)
+    return aggregates
+
+
+def map_reduce(years: Optional[Iterable[int]] = None, data_dir: Path = None, n_jobs: int = 1,
+               memory_limit_mb: float = config.OUT_OF_CORE_MEMORY_MB,
+               exchange_dir: Path = None) -> MatchAggregates:
+    """
+    Aggregati dell'intero storico con map su shard annuali e reduce associativa.
+    
+    Args:
+        years: Stagioni da elaborare (default: tutte quelle su disco)
+        data_dir: Cartella delle partizioni
+        n_jobs: Processi del pool
+        memory_limit_mb: Limite di memoria complessivo
+        exchange_dir: Cartella per scambiare i parziali come file (opzionale)
+    
+    Returns:
+        MatchAggregates (da usare con ATPAnalyzer.from_aggregates)
+    """
+    return reduce_partials(map_shards(years, data_dir, n_jobs, memory_limit_mb, exchange_dir))
@@ -0,0 +1,156 @@
+"""
+Esecuzione out-of-core: aggregati calcolati a blocchi dal disco
+
+Il dataset non viene mai caricato per intero: ogni blocco letto dal CSV
+viene deduplicato rispetto ai blocchi precedenti (hash delle chiavi grezze
+usate dal cleaner), pulito e ridotto a MatchAggregates, combinati con
+merge(). La dimensione dei blocchi deriva dal limite di memoria configurato.
+"""
+import copy
+from pathlib import Path
+from typing import Iterator, List, Union
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from .aggregates import MatchAggregates, merge_all
+from .cleaner import ATPDataCleaner
+from .query import MatchQuery
+from . import config
+
+logger = setup_logger(__name__)
+
+
+# Chiavi di duplicato usate da ATPDataCleaner.clean_data
+DEDUPE_KEYS = ['tourney_date', 'winner_name', 'loser_name']
+
+# Sorgente out-of-core: query, file CSV grezzo o lista di file
+Source = Union[MatchQuery, str, Path, List[Union[str, Path]]]
+
+_SAMPLE_ROWS = 2_000
+
+
+def _source_files(source: Source) -> List[Path]:
+    """File CSV di una sorgente."""
+    if isinstance(source, MatchQuery):
+        return source.partitions()
+    if isinstance(source, (str, Path)):
+        return [Path(source)]
+    return [Path(path) for path in source]
+
+
+def estimate_chunksize(source: Source, memory_limit_mb: float = config.OUT_OF_CORE_MEMORY_MB) -> int:
+    """
+    Righe per blocco tali che un blocco (grezzo, pulito e intermedi) resti nel limite.
+    
+    Args:
+        source: Sorgente dei match
+        memory_limit_mb: Limite di memoria in MB
+    
+    Returns:
+        Numero di righe per blocco
+    """
+    files = _source_files(source)
+    if not files:
+        return config.QUERY_CHUNKSIZE
+    
+    usecols = source._wants_column if isinstance(source, MatchQuery) else None
+    sample = pd.read_csv(files[0], nrows=_SAMPLE_ROWS, usecols=usecols)
+    if sample.empty:
+        return config.QUERY_CHUNKSIZE
+    
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+    budget = memory_limit_mb * 1024 ** 2 / config.OUT_OF_CORE_OVERHEAD
+    return max(_SAMPLE_ROWS, int(budget / bytes_per_row))
+
+
+def iter_raw_chunks(source: Source, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Blocchi grezzi della sorgente (già filtrati se è una MatchQuery)."""
+    if isinstance(source, MatchQuery):
+        # Copia: la query del chiamante resta invariata
+        query = copy.copy(source)
+        query.chunksize = chunksize
+        yield from query.iter_chunks()
+        return
+    
+    for path in _source_files(source):
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+class _SeenKeys:
+    """Hash (uint64 ordinati) delle chiavi grezze già lette, per dedupe tra blocchi."""
+    
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+    
+    def filter_new(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Righe grezze con chiave non ancora vista, come drop_duplicates(keep='first')
+        sull'intero dataset; le nuove chiavi vengono registrate.
+        """
+        # Data come float: il dtype letto può cambiare tra blocchi (NaN)
+        keys = raw[DEDUPE_KEYS].assign(
+            tourney_date=pd.to_numeric(raw['tourney_date'], errors='coerce').astype(np.float64)
+        )
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        first = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(self.hashes):
+            pos = np.searchsorted(self.hashes, hashes).clip(max=len(self.hashes) - 1)
+            first &= self.hashes[pos] != hashes
+        new = np.sort(hashes[first])
+        self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, new), new)
+        return raw[first]
+
+
+def iter_clean_chunks(source: Source, memory_limit_mb: float = config.OUT_OF_CORE_MEMORY_MB,
+                      start=None, end=None) -> Iterator[pd.DataFrame]:
+    """
+    Blocchi puliti e senza duplicati (anche tra blocchi diversi).
+    
+    Args:
+        source: MatchQuery, CSV grezzo o lista di CSV
+        memory_limit_mb: Limite di memoria in MB
+        start: Data iniziale inclusa (opzionale)
+        end: Data finale inclusa (opzionale)
+    
+    Yields:
+        DataFrame pulito di un blocco
+    """
+    chunksize = estimate_chunksize(source, memory_limit_mb)
+    logger.info("Out-of-core: blocchi da %d righe (limite %s MB)", chunksize, memory_limit_mb)
+    
+    cleaner = ATPDataCleaner()
+    seen = _SeenKeys()
+    for raw in iter_raw_chunks(source, chunksize):
+        chunk = cleaner.clean_data(seen.filter_new(raw))
+        if start is not None:
+            chunk = chunk[chunk['tourney_date'] >= pd.Timestamp(start)]
+        if end is not None:
+            chunk = chunk[chunk['tourney_date'] <= pd.Timestamp(end)]
+        if not chunk.empty:
+            yield chunk
+
+
+def stream_aggregates(source: Source, memory_limit_mb: float = config.OUT_OF_CORE_MEMORY_MB,
+                      start=None, end=None) -> MatchAggregates:
+    """
+    Aggregati dell'intera sorgente calcolati blocco per blocco.
+    
+    Args:
+        source: MatchQuery, CSV grezzo o lista di CSV
+        memory_limit_mb: Limite di memoria in MB
+        start: Data iniziale inclusa (opzionale)
+        end: Data finale inclusa (opzionale)
+    
+    Returns:
+        MatchAggregates equivalenti a MatchAggregates.from_frame sul dataset pulito
+    """
+    partials = (
+        MatchAggregates.from_frame(chunk)
+        for chunk in iter_clean_chunks(source, memory_limit_mb, start, end)
+    )
+    aggregates = merge_all(partials)
+    
+    logger.info("✓ Out-of-core: %d match aggregati", aggregates.n_matches)
+    return aggregates
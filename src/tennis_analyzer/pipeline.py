@@ -0,0 +1,591 @@
+"""
+Pipeline a grafo (DAG) con checkpoint degli stadi
+
+Ogni stadio dichiara le dipendenze, i parametri, i file sorgente e i moduli
+del pacchetto da cui dipende. Come make, uno stadio viene saltato se il suo
+fingerprint coincide con quello dell'ultimo checkpoint: il fingerprint
+combina nome, parametri, stato dei file sorgente (dimensione e mtime),
+contenuto dei moduli e digest dell'output di ciascuna dipendenza. Il digest
+dipende dal contenuto dell'output (hash_pandas_object per DataFrame e Series),
+quindi uno stadio rieseguito che produce lo stesso risultato non invalida gli
+stadi a valle.
+
+Gli output vengono salvati in config.PIPELINE_CACHE_DIR (pickle più un
+manifest JSON con fingerprint e digest) e ricaricati solo se uno stadio a
+valle deve essere eseguito. Gli output None (es. download fallito) non
+vengono salvati: lo stadio viene ritentato all'esecuzione successiva.
+
+Gli stadi indipendenti girano in parallelo su un pool di thread; gli stadi
+con lo stesso lock esclusivo (i grafici: pyplot non è thread-safe) vengono
+serializzati. Se uno stadio fallisce, solo i suoi discendenti vengono
+bloccati: alla prossima esecuzione si riparte da lì.
+
+Con un PipelineProfiler attivo ogni stadio è misurato come blocco e gli
+oggetti costruiti al suo interno (cleaner, analyzer, visualizer) sono
+strumentati: i loro metodi compaiono come sotto-misure dello stadio.
+
+Grafo di default (build_pipeline):
+
+    download/{anno} → clean/{anno} → dataset → aggregates → analysis/{nome} → plot/{nome}
+    rankings ─────────────────────────────────────────────┘
+    dataset → export_csv, plot/matches_distribution
+"""
+import fnmatch
+import hashlib
+import json
+import pickle
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from .logger import setup_logger
+from . import config
+
+logger = setup_logger(__name__)
+
+_PACKAGE_DIR = Path(__file__).parent
+
+
+def _digest(value, data: bytes) -> str:
+    """
+    Digest del contenuto di un output.
+    
+    Il pickle non è stabile per dati uguali (dipende dalla condivisione
+    degli oggetti in memoria): DataFrame e Series usano hash_pandas_object,
+    i dict i digest dei valori, gli altri tipi il pickle.
+    
+    Args:
+        value: Output dello stadio
+        data: Pickle di value
+    
+    Returns:
+        sha256 esadecimale
+    """
+    import pandas as pd
+    
+    digest = hashlib.sha256()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+            columns = value.dtypes.items() if isinstance(value, pd.DataFrame) else [(value.name, value.dtype)]
+            digest.update(repr([(name, str(dtype)) for name, dtype in columns]).encode())
+            return digest.hexdigest()
+        except TypeError:
+            pass
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            digest.update(repr(key).encode())
+            digest.update(_digest(item, pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)).encode())
+        return digest.hexdigest()
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class Stage:
+    """Nodo del grafo: funzione, dipendenze e input che ne determinano il fingerprint"""
+    
+    def __init__(self, name: str, func: Callable, deps: Sequence[str] = (),
+                 params: Optional[Dict] = None, sources: Sequence[Path] = (),
+                 modules: Sequence[str] = (), outputs: Sequence[Path] = (),
+                 persist: bool = True, exclusive: Optional[str] = None):
+        """
+        Definisce uno stadio.
+        
+        Args:
+            name: Nome univoco (es. 'clean/2020')
+            func: Chiamata come func(*output_dipendenze, **params)
+            deps: Nomi degli stadi da cui dipende, nell'ordine degli argomenti
+            params: Parametri (serializzabili in JSON) passati per nome
+            sources: File letti dallo stadio (dimensione e mtime nel fingerprint)
+            modules: Moduli del pacchetto usati (contenuto nel fingerprint)
+            outputs: File prodotti; se uno manca lo stadio viene rieseguito
+            persist: Se False l'output non viene salvato e lo stadio viene
+                eseguito solo quando serve a uno stadio a valle
+            exclusive: Nome di un lock condiviso con altri stadi
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = dict(params or {})
+        self.sources = [Path(p) for p in sources]
+        self.modules = list(modules)
+        self.outputs = [Path(p) for p in outputs]
+        self.persist = persist
+        self.exclusive = exclusive
+    
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, deps={self.deps})"
+
+
+class Pipeline:
+    """Grafo di stadi con esecuzione incrementale e parallela"""
+    
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        Inizializza una pipeline vuota.
+        
+        Args:
+            cache_dir: Cartella dei checkpoint (default: config.PIPELINE_CACHE_DIR)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else config.PIPELINE_CACHE_DIR
+        self.stages: Dict[str, Stage] = {}
+        self._module_hashes: Dict[str, str] = {}
+        self._outputs: Dict[str, object] = {}
+        self._digests: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._exclusive: Dict[str, threading.Lock] = {}
+    
+    def add(self, stage: Stage) -> Stage:
+        """
+        Aggiunge uno stadio; le dipendenze devono essere già presenti, quindi
+        l'ordine di inserimento è topologico.
+        
+        Args:
+            stage: Stadio da aggiungere
+        
+        Returns:
+            Lo stadio aggiunto
+        """
+        if stage.name in self.stages:
+            raise ValueError(f"Stadio duplicato: {stage.name}")
+        missing = [dep for dep in stage.deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stadio {stage.name}: dipendenze sconosciute {missing}")
+        self.stages[stage.name] = stage
+        return stage
+    
+    def select(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Stadi da considerare: i target (nomi o pattern fnmatch, es.
+        '*/surface_performance') e tutti i loro antenati.
+        
+        Args:
+            targets: Nomi o pattern (default: tutti gli stadi)
+        
+        Returns:
+            Nomi in ordine topologico
+        """
+        if not targets:
+            return list(self.stages)
+        
+        wanted = set()
+        for pattern in targets:
+            matched = fnmatch.filter(self.stages, pattern)
+            if not matched:
+                raise ValueError(f"Nessuno stadio corrisponde a {pattern!r}")
+            wanted.update(matched)
+        
+        stack = list(wanted)
+        while stack:
+            for dep in self.stages[stack.pop()].deps:
+                if dep not in wanted:
+                    wanted.add(dep)
+                    stack.append(dep)
+        return [name for name in self.stages if name in wanted]
+    
+    # ------------------------------------------------------------------
+    # Fingerprint e checkpoint
+    # ------------------------------------------------------------------
+    
+    def _module_hash(self, module: str) -> str:
+        if module not in self._module_hashes:
+            path = _PACKAGE_DIR / f"{module}.py"
+            self._module_hashes[module] = hashlib.sha256(path.read_bytes()).hexdigest()
+        return self._module_hashes[module]
+    
+    def fingerprint(self, name: str) -> str:
+        """
+        Fingerprint di uno stadio (richiede i digest delle dipendenze).
+        
+        Args:
+            name: Nome dello stadio
+        
+        Returns:
+            sha256 esadecimale
+        """
+        stage = self.stages[name]
+        sources = []
+        for path in stage.sources:
+            stat = path.stat() if path.exists() else None
+            sources.append([str(path), stat and stat.st_size, stat and stat.st_mtime_ns])
+        payload = {
+            'stage': name,
+            'params': stage.params,
+            'sources': sources,
+            'modules': {m: self._module_hash(m) for m in ['pipeline', *stage.modules]},
+            'deps': [self._digests[dep] for dep in stage.deps],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def _paths(self, name: str):
+        slug = name.replace('/', '__')
+        return self.cache_dir / f"{slug}.pkl", self.cache_dir / f"{slug}.json"
+    
+    def _manifest(self, name: str) -> Optional[Dict]:
+        data_path, manifest_path = self._paths(name)
+        if not (data_path.exists() and manifest_path.exists()):
+            return None
+        try:
+            return json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
+    
+    def _checkpoint(self, name: str, data: bytes, fingerprint: str, digest: str, seconds: float):
+        """Salva output e manifest (rename atomici, manifest per ultimo)."""
+        data_path, manifest_path = self._paths(name)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for path, content in ((data_path, data), (manifest_path, json.dumps({
+            'stage': name, 'fingerprint': fingerprint, 'digest': digest,
+            'seconds': round(seconds, 3), 'saved': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }, indent=2).encode())):
+            tmp = path.with_name(path.name + '.tmp')
+            tmp.write_bytes(content)
+            tmp.replace(path)
+    
+    def _up_to_date(self, name: str, fingerprint: str) -> Optional[str]:
+        """Digest del checkpoint se valido per questo fingerprint, altrimenti None."""
+        manifest = self._manifest(name)
+        if manifest is None or manifest.get('fingerprint') != fingerprint:
+            return None
+        if not all(path.exists() for path in self.stages[name].outputs):
+            return None
+        return manifest.get('digest')
+    
+    def output(self, name: str):
+        """
+        Output di uno stadio: dalla memoria, dal checkpoint o, per gli stadi
+        non salvati, eseguendolo.
+        
+        Args:
+            name: Nome dello stadio
+        
+        Returns:
+            Output dello stadio
+        """
+        with self._locks.setdefault(name, threading.Lock()):
+            if name in self._outputs:
+                return self._outputs[name]
+            stage = self.stages[name]
+            if stage.persist:
+                data_path, _ = self._paths(name)
+                with open(data_path, 'rb') as f:
+                    value = pickle.load(f)
+            else:
+                value = stage.func(*[self.output(dep) for dep in stage.deps], **stage.params)
+            self._outputs[name] = value
+            return value
+    
+    # ------------------------------------------------------------------
+    # Esecuzione
+    # ------------------------------------------------------------------
+    
+    def _execute(self, name: str, force: bool, profiler=None) -> Dict:
+        """Esegue (o salta) uno stadio; ritorna lo stato per il report."""
+        stage = self.stages[name]
+        started = time.perf_counter()
+        fingerprint = self.fingerprint(name)
+        
+        if not stage.persist:
+            # Eseguito su richiesta: il fingerprint rappresenta l'output
+            self._digests[name] = fingerprint
+            return {'status': 'skipped', 'seconds': 0.0}
+        
+        digest = None if force else self._up_to_date(name, fingerprint)
+        if digest is not None:
+            self._digests[name] = digest
+            logger.info("⏭ %s: aggiornato", name)
+            return {'status': 'skipped', 'seconds': round(time.perf_counter() - started, 3)}
+        
+        inputs = [self.output(dep) for dep in stage.deps]
+        logger.info("▶ %s", name)
+        lock = self._exclusive.setdefault(stage.exclusive, threading.Lock()) if stage.exclusive else None
+        if lock is not None:
+            lock.acquire()
+        started = time.perf_counter()
+        try:
+            if profiler is not None and profiler.enabled:
+                rows_in = sum(len(v) for v in inputs if hasattr(v, 'columns'))
+                with profiler.stage(name, rows_in=rows_in or None) as record:
+                    _active.profiler = profiler
+                    try:
+                        value = stage.func(*inputs, **stage.params)
+                    finally:
+                        _active.profiler = None
+                    record['rows_out'] = len(value) if hasattr(value, 'columns') else None
+            else:
+                value = stage.func(*inputs, **stage.params)
+        finally:
+            if lock is not None:
+                lock.release()
+        
+        seconds = time.perf_counter() - started
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._digests[name] = _digest(value, data)
+        self._outputs[name] = value
+        if value is not None:
+            self._checkpoint(name, data, fingerprint, self._digests[name], seconds)
+        else:
+            logger.warning("⚠ %s: nessun risultato, verrà ritentato", name)
+        logger.info("✓ %s (%.2fs)", name, seconds)
+        return {'status': 'ran', 'seconds': round(seconds, 3)}
+    
+    def run(self, targets: Optional[Iterable[str]] = None, jobs: int = None,
+            force: Optional[Iterable[str]] = None, profiler=None) -> Dict[str, Dict]:
+        """
+        Esegue i target e i loro antenati, saltando gli stadi aggiornati.
+        
+        Args:
+            targets: Nomi o pattern degli stadi da produrre (default: tutti)
+            jobs: Thread per gli stadi indipendenti (default: config.PIPELINE_WORKERS)
+            force: Pattern degli stadi da rieseguire comunque ('*' = tutti)
+            profiler: PipelineProfiler opzionale (misure affidabili con jobs=1)
+        
+        Returns:
+            Dict stadio -> {'status': ran|skipped|failed|blocked, 'seconds', 'error'}
+        """
+        selected = self.select(targets)
+        forced = {name for pattern in (force or []) for name in fnmatch.filter(selected, pattern)}
+        jobs = max(1, jobs or config.PIPELINE_WORKERS)
+        self._outputs, self._digests = {}, {}
+        
+        # Consumatori rimasti per ogni stadio: output rilasciato dalla memoria a zero
+        consumers = {name: 0 for name in selected}
+        for name in selected:
+            for dep in self.stages[name].deps:
+                consumers[dep] += 1
+        
+        report: Dict[str, Dict] = {}
+        pending = list(selected)
+        running = {}
+        logger.info("Pipeline: %d stadi, %d thread", len(selected), jobs)
+        
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            while pending or running:
+                for name in list(pending):
+                    states = [report.get(dep, {}).get('status') for dep in self.stages[name].deps]
+                    if any(s in ('failed', 'blocked') for s in states):
+                        report[name] = {'status': 'blocked', 'seconds': 0.0}
+                        logger.warning("⚠ %s: bloccato da una dipendenza fallita", name)
+                    elif all(s in ('ran', 'skipped') for s in states):
+                        running[pool.submit(self._execute, name, name in forced, profiler)] = name
+                    else:
+                        continue
+                    pending.remove(name)
+                
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        report[name] = future.result()
+                    except Exception as e:
+                        logger.error("❌ %s: %s", name, e, exc_info=True)
+                        report[name] = {'status': 'failed', 'seconds': 0.0, 'error': str(e)}
+                    for dep in self.stages[name].deps:
+                        consumers[dep] -= 1
+                        if consumers[dep] == 0 and self.stages[dep].persist and self._outputs.get(dep) is not None:
+                            self._outputs.pop(dep)
+        
+        counts = {}
+        for state in report.values():
+            counts[state['status']] = counts.get(state['status'], 0) + 1
+        logger.info("Pipeline completata: %s",
+                    ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+        return report
+    
+    def plan(self, targets: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """
+        Stadi che verrebbero eseguiti, senza eseguire nulla. Uno stadio a
+        valle di uno da eseguire risulta da eseguire (il digest non è noto).
+        
+        Args:
+            targets: Nomi o pattern (default: tutti)
+        
+        Returns:
+            Dict stadio -> True se aggiornato
+        """
+        self._digests = {}
+        status = {}
+        for name in self.select(targets):
+            stage = self.stages[name]
+            if any(not status[dep] for dep in stage.deps):
+                status[name] = False
+                continue
+            fingerprint = self.fingerprint(name)
+            digest = fingerprint if not stage.persist else self._up_to_date(name, fingerprint)
+            status[name] = digest is not None
+            if digest is not None:
+                self._digests[name] = digest
+        return status
+
+
+# ----------------------------------------------------------------------
+# Stadi della pipeline ATP
+# ----------------------------------------------------------------------
+
+# Risultato di run_full_analysis -> metodo di ATPAnalyzer
+ANALYSES = {
+    'top_atp_days': 'analyze_top_atp_days',
+    'total_wins': 'analyze_total_wins',
+    'surface_performance': 'analyze_surface_performance',
+    'tournament_levels': 'analyze_tournament_levels',
+    'era_dominators': 'get_era_dominators',
+}
+
+# Grafico -> (metodo di ATPVisualizer, stadio di input, file)
+PLOTS = {
+    'top_atp_days': ('plot_top_atp_days', 'analysis/top_atp_days', config.RANKING_EVOLUTION_PNG.name),
+    'total_wins': ('plot_total_wins', 'analysis/total_wins', config.WINS_BY_PLAYER_PNG.name),
+    'surface_performance': ('plot_surface_performance', 'analysis/surface_performance',
+                            config.WINS_BY_SURFACE_PNG.name),
+    'matches_distribution': ('plot_matches_distribution', 'dataset', config.MATCH_DISTRIBUTION_PNG.name),
+    'win_rate_analysis': ('plot_win_rate_analysis', 'analysis/total_wins', config.WIN_RATE_ANALYSIS_PNG.name),
+}
+
+
+# Profiler dello stadio in esecuzione nel thread corrente (impostato da _execute)
+_active = threading.local()
+
+
+def _instrument(obj, methods: Optional[Iterable[str]] = None, rows_in: Optional[int] = None):
+    """Strumenta obj con il profiler dello stadio corrente, se attivo."""
+    profiler = getattr(_active, 'profiler', None)
+    if profiler is None:
+        return obj
+    return profiler.instrument(obj, methods=methods, rows_in=rows_in)
+
+
+def _download(year: int, raw_dir: str, base_url: str):
+    """Match grezzi di un anno: file locale se presente, altrimenti download."""
+    from .downloader import ATPDataDownloader
+    
+    downloader = ATPDataDownloader()
+    downloader.raw_data_dir = Path(raw_dir)
+    downloader.base_url = base_url
+    downloader = _instrument(downloader, methods=['load_local_csv', 'download_matches_year'])
+    csv_file = downloader.raw_data_dir / f"atp_matches_{year}.csv"
+    if csv_file.exists():
+        return downloader.load_local_csv(csv_file)
+    return downloader.download_matches_year(year)
+
+
+def _clean(raw):
+    """Cleaning di una partizione annuale (le operazioni sono locali alle righe)."""
+    from .cleaner import ATPDataCleaner
+    
+    if raw is None or raw.empty:
+        return None
+    cleaner = _instrument(ATPDataCleaner(), methods=['validate_columns', 'clean_data'], rows_in=len(raw))
+    if not cleaner.validate_columns(raw):
+        raise ValueError("Validazione colonne fallita")
+    return cleaner.clean_data(raw)
+
+
+def _dataset(*partitions):
+    """Unisce le partizioni pulite nell'ordine degli anni."""
+    import pandas as pd
+    from .cleaner import ATPDataCleaner
+    
+    frames = [df for df in partitions if df is not None]
+    if not frames:
+        raise ValueError("Nessun dato disponibile per gli anni richiesti")
+    df = pd.concat(frames, ignore_index=True)
+    
+    cleaner = _instrument(ATPDataCleaner(), methods=['generate_summary'], rows_in=len(df))
+    summary = cleaner.generate_summary(df)
+    logger.info("📊 SUMMARY DATASET PULITO:")
+    for key, value in summary.items():
+        logger.info("  - %s: %s", key, value)
+    return df
+
+
+def _export_csv(df, path: str) -> str:
+    """Scrive il dataset pulito in CSV."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+    logger.info("✓ Dataset pulito salvato: %s (%d record)", path, len(df))
+    return str(path)
+
+
+def _rankings(store: str):
+    """Classifiche settimanali (archivio locale o download), None se assenti."""
+    from .downloader import ATPDataDownloader
+    
+    rankings = ATPDataDownloader().get_rankings(use_local=True)
+    if rankings is None:
+        logger.warning("⚠ Classifiche non disponibili: giorni da n.1 stimati dai match")
+    return rankings
+
+
+def _aggregates(df):
+    """Aggregati per giocatore condivisi dalle analisi."""
+    from .aggregates import MatchAggregates
+    
+    return MatchAggregates.from_frame(df)
+
+
+def _analysis(aggregates, rankings, method: str):
+    """Una analisi di run_full_analysis sugli aggregati."""
+    from .analyzer import ATPAnalyzer
+    
+    analyzer = _instrument(ATPAnalyzer.from_aggregates(aggregates, rankings),
+                           methods=[method], rows_in=aggregates.n_matches)
+    return getattr(analyzer, method)()
+
+
+def _plot(data, method: str, output_dir: str, filename: str) -> Optional[str]:
+    """Un grafico; None se non è stato prodotto (es. dati vuoti)."""
+    from .visualizer import ATPVisualizer
+    
+    visualizer = _instrument(ATPVisualizer(Path(output_dir)), methods=[method])
+    getattr(visualizer, method)(data, filename=filename)
+    path = Path(output_dir) / filename
+    return str(path) if path.exists() else None
+
+
+def build_pipeline(years: Iterable[int] = None, cache_dir: Optional[Path] = None) -> Pipeline:
+    """
+    Grafo della pipeline ATP: download e cleaning per anno, dataset,
+    aggregati, un'analisi per risultato di run_full_analysis e un grafico
+    per immagine di generate_all_plots.
+    
+    Args:
+        years: Anni da includere (default: config.ANALYSIS_YEARS)
+        cache_dir: Cartella dei checkpoint (default: config.PIPELINE_CACHE_DIR)
+    
+    Returns:
+        Pipeline pronta per run()
+    """
+    if years is None:
+        years = config.ANALYSIS_YEARS
+    
+    pipeline = Pipeline(cache_dir)
+    for year in years:
+        raw_csv = config.RAW_DATA_DIR / f"atp_matches_{year}.csv"
+        pipeline.add(Stage(f"download/{year}", _download,
+                           params={'year': year, 'raw_dir': str(config.RAW_DATA_DIR),
+                                   'base_url': config.GITHUB_SACKMANN_URL},
+                           sources=[raw_csv], modules=['downloader']))
+        pipeline.add(Stage(f"clean/{year}", _clean, deps=[f"download/{year}"], modules=['cleaner']))
+    
+    pipeline.add(Stage('dataset', _dataset, deps=[f"clean/{year}" for year in years], modules=['cleaner']))
+    pipeline.add(Stage('export_csv', _export_csv, deps=['dataset'],
+                       params={'path': str(config.CLEAN_DATA_CSV)}, outputs=[config.CLEAN_DATA_CSV]))
+    pipeline.add(Stage('rankings', _rankings, params={'store': str(config.RANKINGS_STORE)},
+                       sources=[config.RANKINGS_STORE], modules=['downloader', 'rankings'], persist=False))
+    pipeline.add(Stage('aggregates', _aggregates, deps=['dataset'], modules=['aggregates']))
+    
+    for name, method in ANALYSES.items():
+        pipeline.add(Stage(f"analysis/{name}", _analysis, deps=['aggregates', 'rankings'],
+                           params={'method': method}, modules=['analyzer', 'aggregates', 'rankings']))
+    
+    for name, (method, source, filename) in PLOTS.items():
+        pipeline.add(Stage(f"plot/{name}", _plot, deps=[source],
+                           params={'method': method, 'output_dir': str(config.VISUALS_DIR), 'filename': filename},
+                           modules=['visualizer'], outputs=[config.VISUALS_DIR / filename], exclusive='pyplot'))
+    
+    return pipeline
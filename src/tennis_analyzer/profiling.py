@@ -0,0 +1,249 @@
+"""
+Profilo per stadio della pipeline: tempo, CPU, memoria e righe
+
+PipelineProfiler misura blocchi annidati (stadi della pipeline e singoli
+metodi di analyzer/visualizer strumentati) e scrive un report JSON: per ogni
+blocco tempo wall, tempo CPU del processo, picco di allocazione tracciato da
+tracemalloc rispetto all'ingresso e righe in ingresso/uscita. Opzionalmente
+salva un dump cProfile per ogni stadio di primo livello.
+
+Disabilitato, stage() non misura nulla e instrument() lascia gli oggetti
+invariati: l'overhead si riduce a un context manager per stadio. Le misure
+sono pensate per un'esecuzione sequenziale (il picco di tracemalloc è
+globale al processo).
+"""
+import contextlib
+import cProfile
+import functools
+import inspect
+import json
+import platform
+import re
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from . import config
+
+logger = setup_logger(__name__)
+
+
+def _rows(value) -> Optional[int]:
+    """Righe di un risultato tabellare (None per gli altri tipi)."""
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(value)
+    return None
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')
+
+
+class PipelineProfiler:
+    """Misure annidate per stadio con report JSON"""
+    
+    def __init__(self, enabled: bool = True, memory: bool = True,
+                 cprofile_dir: Optional[Path] = None):
+        """
+        Inizializza il profiler.
+        
+        Args:
+            enabled: Se False, nessuna misura (overhead trascurabile)
+            memory: Se True, traccia il picco di allocazione con tracemalloc
+            cprofile_dir: Cartella dei dump cProfile per stadio (opzionale)
+        """
+        self.enabled = enabled
+        self.memory = memory
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir is not None else None
+        self.records: List[Dict] = []
+        self._stack: List[Dict] = []
+        self._started_tracing = False
+        self._created = datetime.now()
+    
+    @contextlib.contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Misura un blocco; il record ottenuto accetta rows_out.
+        
+        Args:
+            name: Nome dello stadio o del metodo
+            rows_in: Righe in ingresso (opzionale)
+        
+        Returns:
+            Context manager che produce il record dello stadio
+        """
+        if not self.enabled:
+            yield {}
+            return
+        
+        parent = self._stack[-1] if self._stack else None
+        record = {
+            'name': name,
+            'path': f"{parent['path']}/{name}" if parent else name,
+            'depth': len(self._stack),
+            'rows_in': rows_in,
+            'rows_out': None,
+            'wall_s': None,
+            'cpu_s': None,
+            'peak_mb': None,
+            'error': None,
+        }
+        self.records.append(record)
+        
+        profile = None
+        if self.cprofile_dir is not None and parent is None:
+            profile = cProfile.Profile()
+        
+        frame = {'path': record['path'], 'peak': 0, 'base': 0}
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                # Il picco raggiunto finora appartiene al blocco padre
+                parent['peak'] = max(parent['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['base'] = current
+        self._stack.append(frame)
+        
+        cpu, wall = time.process_time(), time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profile is not None:
+                profile.disable()
+            record['wall_s'] = round(time.perf_counter() - wall, 6)
+            record['cpu_s'] = round(time.process_time() - cpu, 6)
+            self._stack.pop()
+            
+            if self.memory:
+                peak = max(tracemalloc.get_traced_memory()[1], frame['peak'])
+                record['peak_mb'] = round(max(0, peak - frame['base']) / 1024 ** 2, 3)
+                if parent is not None:
+                    parent['peak'] = max(parent['peak'], peak)
+                elif self._started_tracing:
+                    tracemalloc.stop()
+                    self._started_tracing = False
+            
+            if profile is not None:
+                self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+                index = sum(1 for r in self.records if r['depth'] == 0)
+                dump = self.cprofile_dir / f"{index:02d}_{_slug(name)}.prof"
+                profile.dump_stats(dump)
+                record['cprofile'] = str(dump)
+    
+    def instrument(self, obj, prefix: Optional[str] = None,
+                   methods: Optional[Iterable[str]] = None, rows_in: Optional[int] = None):
+        """
+        Sostituisce i metodi pubblici dell'istanza con versioni misurate.
+        
+        Le chiamate interne (es. run_full_analysis -> analyze_total_wins)
+        passano dall'istanza e risultano come blocchi annidati.
+        
+        Args:
+            obj: Istanza da strumentare (es. ATPAnalyzer, ATPVisualizer)
+            prefix: Prefisso dei nomi (default: nome della classe)
+            methods: Metodi da misurare (default: tutti i metodi pubblici)
+            rows_in: Righe in ingresso se la chiamata non riceve un DataFrame
+        
+        Returns:
+            La stessa istanza (invariata se il profiler è disabilitato)
+        """
+        if not self.enabled:
+            return obj
+        
+        cls = type(obj)
+        prefix = prefix or cls.__name__
+        if methods is None:
+            methods = [
+                name for name in dir(cls)
+                if not name.startswith('_')
+                and inspect.isfunction(inspect.getattr_static(cls, name))
+            ]
+        
+        for name in methods:
+            setattr(obj, name, self._wrap(f"{prefix}.{name}", getattr(obj, name), rows_in))
+        return obj
+    
+    def _wrap(self, name: str, method, rows_in: Optional[int]):
+        """Metodo legato misurato come stadio."""
+        @functools.wraps(method)
+        def measured(*args, **kwargs):
+            rows = next((len(arg) for arg in args if isinstance(arg, (pd.DataFrame, pd.Series))), rows_in)
+            with self.stage(name, rows_in=rows) as record:
+                result = method(*args, **kwargs)
+                record['rows_out'] = _rows(result)
+            return result
+        
+        return measured
+    
+    def report(self) -> Dict:
+        """
+        Report con ambiente, totali e record di tutti gli stadi.
+        
+        Returns:
+            Dict serializzabile in JSON
+        """
+        top = [record for record in self.records if record['depth'] == 0]
+        peaks = [record['peak_mb'] for record in top if record['peak_mb'] is not None]
+        return {
+            'created': self._created.isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'memory_traced': self.memory,
+            'total': {
+                'wall_s': round(sum(record['wall_s'] or 0 for record in top), 6),
+                'cpu_s': round(sum(record['cpu_s'] or 0 for record in top), 6),
+                'peak_mb': max(peaks) if peaks else None,
+            },
+            'stages': self.records,
+        }
+    
+    def write(self, path: Path = None) -> Path:
+        """
+        Scrive il report JSON.
+        
+        Args:
+            path: File di destinazione (default: config.PROFILE_REPORT)
+        
+        Returns:
+            Percorso del report
+        """
+        path = Path(path or config.PROFILE_REPORT)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        logger.info("✓ Report di profilo salvato: %s", path)
+        return path
+    
+    def log_summary(self, max_depth: int = 1):
+        """
+        Riepilogo a log degli stadi fino a una profondità.
+        
+        Args:
+            max_depth: Profondità massima mostrata (0 = solo stadi principali)
+        """
+        if not self.enabled:
+            return
+        logger.info("\n⏱ PROFILO PER STADIO:")
+        for record in self.records:
+            if record['depth'] > max_depth:
+                continue
+            peak = f"{record['peak_mb']:9.1f} MB" if record['peak_mb'] is not None else " " * 12
+            rows = f"{record['rows_in'] if record['rows_in'] is not None else '-'} → " \
+                   f"{record['rows_out'] if record['rows_out'] is not None else '-'}"
+            logger.info("  %s%-*s %8.3fs wall %8.3fs cpu %s  righe %s", '  ' * record['depth'],
+                        40 - 2 * record['depth'], record['name'], record['wall_s'], record['cpu_s'], peak, rows)
@@ -0,0 +1,197 @@
+"""
+Query sui match con pushdown di predicati e colonne verso i file su disco
+
+Le partizioni sono i CSV annuali scaricati (atp_matches_{anno}.csv): una
+query legge solo gli anni richiesti, solo le colonne necessarie (usecols)
+e filtra ogni blocco di righe (chunksize) appena letto, così in memoria
+restano solo i match selezionati. In assenza delle partizioni viene letto
+a blocchi il file consolidato (in data_dir o nella cartella processed
+accanto). Una query senza risultati ritorna un DataFrame vuoto con le
+colonne e i tipi di un risultato non vuoto.
+"""
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from .cleaner import ATPDataCleaner
+from . import config
+
+logger = setup_logger(__name__)
+
+
+CONSOLIDATED_CSV = "atp_matches_consolidated.csv"
+
+# Colonne grezze sempre lette: servono al cleaner e alle analisi
+REQUIRED_COLUMNS = [
+    'tourney_id', 'tourney_name', 'surface', 'tourney_level', 'tourney_date', 'match_num',
+    'winner_name', 'loser_name', 'winner_rank', 'loser_rank', 'winner_rank_points',
+    'loser_rank_points', 'round', 'minutes',
+]
+
+VALID_SURFACES = ['Hard', 'Clay', 'Grass', 'Carpet']
+
+
+def _as_set(values) -> Optional[set]:
+    """Valori di un filtro come insieme (None = nessun filtro)."""
+    if values is None:
+        return None
+    if isinstance(values, (str, int)):
+        return {values}
+    return set(values)
+
+
+class MatchQuery:
+    """Selezione di match (anni, superfici, livelli, giocatori, colonne) eseguita sul disco"""
+    
+    def __init__(self, years: Optional[Iterable[int]] = None, surfaces: Optional[Iterable[str]] = None,
+                 levels: Optional[Iterable[str]] = None, players: Optional[Iterable[str]] = None,
+                 columns: Optional[List[str]] = None, data_dir: Path = None,
+                 chunksize: int = config.QUERY_CHUNKSIZE):
+        """
+        Inizializza query (nessuna lettura fino a execute/iter_chunks).
+        
+        Args:
+            years: Stagioni (partizioni annuali) da leggere
+            surfaces: Superfici (Hard, Clay, Grass, Carpet, Unknown)
+            levels: Livelli torneo, come codice ('G') o nome ('Grand Slam')
+            players: Giocatori (vincitore o perdente), nomi come nel cleaner
+            columns: Colonne grezze aggiuntive da leggere (default: tutte)
+            data_dir: Cartella delle partizioni (default: config.RAW_DATA_DIR)
+            chunksize: Righe per blocco di lettura
+        """
+        self.years = _as_set(years)
+        self.surfaces = _as_set(surfaces)
+        self.levels = _as_set(levels)
+        self.players = _as_set(players)
+        self.columns = list(columns) if columns is not None else None
+        self.data_dir = Path(data_dir or config.RAW_DATA_DIR)
+        self.chunksize = chunksize
+        
+        # Livelli richiesti come codici tourney_level
+        self._level_codes = None
+        if self.levels is not None:
+            self._level_codes = {
+                code for code, name in config.TOURNEY_LEVELS.items()
+                if code in self.levels or name in self.levels
+            }
+        self._player_names = {name.strip().title() for name in self.players} if self.players else None
+    
+    def __repr__(self) -> str:
+        filters = {
+            key: sorted(value) for key, value in (
+                ('years', self.years), ('surfaces', self.surfaces),
+                ('levels', self.levels), ('players', self.players),
+            ) if value is not None
+        }
+        return f"MatchQuery({filters}, columns={self.columns})"
+    
+    def partitions(self) -> List[Path]:
+        """
+        File da leggere: partizioni annuali richieste o, se assenti, il consolidato.
+        
+        Returns:
+            Lista di percorsi esistenti
+        """
+        files = sorted(self.data_dir.glob('atp_matches_[0-9][0-9][0-9][0-9].csv'))
+        if files:
+            return [path for path in files if self.years is None or int(path.stem[-4:]) in self.years]
+        
+        # Consolidato accanto alle partizioni o in processed/ (layout di config)
+        for folder in (self.data_dir, self.data_dir.parent / config.PROCESSED_DATA_DIR.name):
+            consolidated = folder / CONSOLIDATED_CSV
+            if consolidated.exists():
+                return [consolidated]
+        return []
+    
+    def _wants_column(self, column: str) -> bool:
+        """Proiezione: colonna da leggere dal CSV."""
+        return self.columns is None or column in REQUIRED_COLUMNS or column in self.columns
+    
+    def _mask(self, chunk: pd.DataFrame, by_date: bool) -> np.ndarray:
+        """Predicati valutati su un blocco grezzo."""
+        mask = np.ones(len(chunk), dtype=bool)
+        
+        if by_date and self.years is not None:
+            years = pd.to_numeric(chunk['tourney_date'], errors='coerce') // 10000
+            mask &= years.isin(self.years).to_numpy()
+        if self.surfaces is not None:
+            surface = chunk['surface'].str.strip()
+            surface = surface.where(surface.isin(VALID_SURFACES), 'Unknown')
+            mask &= surface.isin(self.surfaces).to_numpy()
+        if self._level_codes is not None:
+            mask &= chunk['tourney_level'].isin(self._level_codes).to_numpy()
+        if self._player_names is not None:
+            mask &= (
+                chunk['winner_name'].str.strip().str.title().isin(self._player_names)
+                | chunk['loser_name'].str.strip().str.title().isin(self._player_names)
+            ).to_numpy()
+        
+        return mask
+    
+    def _empty(self, partitions: List[Path]) -> pd.DataFrame:
+        """Risultato grezzo vuoto con colonne e tipi dedotti dal primo blocco."""
+        if partitions:
+            return pd.read_csv(partitions[0], usecols=self._wants_column, nrows=self.chunksize).iloc[:0]
+        extra = [column for column in self.columns or [] if column not in REQUIRED_COLUMNS]
+        return pd.DataFrame(columns=REQUIRED_COLUMNS + extra)
+    
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Blocchi grezzi già filtrati, letti uno alla volta.
+        
+        Yields:
+            DataFrame grezzo (colonne proiettate, solo righe selezionate)
+        """
+        for path in self.partitions():
+            # Il consolidato contiene tutti gli anni: filtro per data
+            by_date = not path.stem[-4:].isdigit()
+            reader = pd.read_csv(path, usecols=self._wants_column, chunksize=self.chunksize)
+            for chunk in reader:
+                selected = chunk[self._mask(chunk, by_date)]
+                if not selected.empty:
+                    yield selected
+    
+    def execute(self, clean: bool = True) -> pd.DataFrame:
+        """
+        Esegue la query.
+        
+        Args:
+            clean: Se True, applica ATPDataCleaner.clean_data al risultato
+        
+        Returns:
+            DataFrame dei match selezionati
+        """
+        partitions = self.partitions()
+        if not partitions:
+            logger.warning("Nessuna partizione trovata in %s", self.data_dir)
+        
+        chunks = list(self.iter_chunks())
+        logger.info("✓ Query %s: %d match da %d file", self, sum(len(c) for c in chunks), len(partitions))
+        
+        # Nessun match: frame vuoto con lo schema del risultato (utilizzabile da ATPAnalyzer)
+        df = pd.concat(chunks, ignore_index=True) if chunks else self._empty(partitions)
+        return ATPDataCleaner().clean_data(df) if clean else df
+
+
+def matches(years: Optional[Iterable[int]] = None, surfaces: Optional[Iterable[str]] = None,
+            levels: Optional[Iterable[str]] = None, players: Optional[Iterable[str]] = None,
+            columns: Optional[List[str]] = None, **options) -> MatchQuery:
+    """
+    Costruisce una query sui match (eseguita da execute() o da ATPAnalyzer).
+    
+    Args:
+        years: Stagioni da leggere
+        surfaces: Superfici
+        levels: Livelli torneo (codici o nomi)
+        players: Giocatori
+        columns: Colonne grezze aggiuntive (default: tutte)
+        **options: data_dir, chunksize (vedi MatchQuery)
+    
+    Returns:
+        MatchQuery
+    """
+    return MatchQuery(years=years, surfaces=surfaces, levels=levels, players=players,
+                      columns=columns, **options)
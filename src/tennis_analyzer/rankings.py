@@ -0,0 +1,246 @@
+"""
+Archivio compatto delle classifiche ATP settimanali (atp_rankings_*.csv)
+
+Ogni riga è (data, posizione, giocatore, punti) in array a larghezza fissa;
+il tempo trascorso entro una soglia di classifica è calcolato con
+aritmetica di intervalli vettoriale: ogni classifica vale fino alla
+pubblicazione successiva.
+"""
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from . import config
+
+logger = setup_logger(__name__)
+
+
+def yyyymmdd_to_days(values: np.ndarray) -> np.ndarray:
+    """
+    Converte date intere YYYYMMDD in giorni dal 1970-01-01 (senza parsing stringhe).
+    
+    Args:
+        values: Array di interi YYYYMMDD
+    
+    Returns:
+        Array int32 di giorni
+    """
+    values = np.asarray(values, dtype=np.int64)
+    years = values // 10000 - 1970
+    months = values // 100 % 100 - 1
+    days = values % 100 - 1
+    
+    month_start = years.astype('datetime64[Y]').astype('datetime64[M]') + months
+    return (month_start.astype('datetime64[D]') + days).astype(np.int64).astype(np.int32)
+
+
+def _to_days(value) -> int:
+    """Data (stringa, Timestamp, date) in giorni dal 1970-01-01."""
+    return int(pd.Timestamp(value).value // (86_400 * 10**9))
+
+
+class RankingsStore:
+    """Classifiche ATP settimanali in array NumPy compatti"""
+    
+    def __init__(self, dates: np.ndarray, ranks: np.ndarray, players: np.ndarray,
+                 points: np.ndarray, player_ids: np.ndarray = None, player_names: np.ndarray = None):
+        """
+        Inizializza archivio (righe ordinate per data).
+        
+        Args:
+            dates: Data classifica in giorni dal 1970-01-01 (int32)
+            ranks: Posizione in classifica (int16)
+            players: ID giocatore Sackmann (int32)
+            points: Punti classifica (float32, NaN se assenti)
+            player_ids: ID del dizionario giocatori (opzionale)
+            player_names: Nomi corrispondenti a player_ids
+        """
+        order = np.argsort(dates, kind='stable')
+        self.dates = np.asarray(dates, dtype=np.int32)[order]
+        self.ranks = np.asarray(ranks, dtype=np.int16)[order]
+        self.players = np.asarray(players, dtype=np.int32)[order]
+        self.points = np.asarray(points, dtype=np.float32)[order]
+        
+        self.player_ids = np.asarray(player_ids if player_ids is not None else [], dtype=np.int32)
+        self.player_names = np.asarray(player_names if player_names is not None else [], dtype=str)
+        
+        self.snapshots, self._snapshot_of_row = np.unique(self.dates, return_inverse=True)
+    
+    def __len__(self) -> int:
+        return len(self.dates)
+    
+    @classmethod
+    def from_frames(cls, rankings: pd.DataFrame, players: pd.DataFrame = None) -> 'RankingsStore':
+        """
+        Costruisce archivio dai CSV Sackmann già caricati.
+        
+        Args:
+            rankings: DataFrame con ranking_date (YYYYMMDD), rank, player, points
+            players: DataFrame atp_players (player_id, name_first, name_last)
+        
+        Returns:
+            RankingsStore
+        """
+        rankings = rankings.dropna(subset=['ranking_date', 'rank', 'player'])
+        
+        player_ids, player_names = None, None
+        if players is not None and not players.empty:
+            names = (
+                players['name_first'].fillna('') + ' ' + players['name_last'].fillna('')
+            ).str.strip().str.title()
+            player_ids = players['player_id'].to_numpy()
+            player_names = names.to_numpy(dtype=str)
+        
+        return cls(
+            dates=yyyymmdd_to_days(rankings['ranking_date'].to_numpy()),
+            ranks=rankings['rank'].to_numpy(),
+            players=rankings['player'].to_numpy(),
+            points=pd.to_numeric(rankings['points'], errors='coerce').to_numpy(dtype=np.float32)
+            if 'points' in rankings.columns else np.full(len(rankings), np.nan, dtype=np.float32),
+            player_ids=player_ids,
+            player_names=player_names,
+        )
+    
+    def save(self, path: Path = None) -> Path:
+        """
+        Salva archivio in formato .npz (non compresso, caricamento rapido).
+        
+        Args:
+            path: File di destinazione (default: config.RANKINGS_STORE)
+        
+        Returns:
+            Percorso salvato
+        """
+        path = Path(path or config.RANKINGS_STORE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path, dates=self.dates, ranks=self.ranks, players=self.players, points=self.points,
+            player_ids=self.player_ids, player_names=self.player_names,
+        )
+        logger.info("✓ Classifiche salvate: %s (%d righe)", path, len(self))
+        return path
+    
+    @classmethod
+    def load(cls, path: Path = None) -> Optional['RankingsStore']:
+        """
+        Carica archivio salvato con save().
+        
+        Args:
+            path: File .npz (default: config.RANKINGS_STORE)
+        
+        Returns:
+            RankingsStore o None se il file non esiste
+        """
+        path = Path(path or config.RANKINGS_STORE)
+        if not path.exists():
+            logger.warning("File non trovato: %s", path)
+            return None
+        
+        with np.load(path) as data:
+            store = cls(**{key: data[key] for key in data.files})
+        logger.info("✓ Classifiche caricate: %d righe, %d settimane", len(store), len(store.snapshots))
+        return store
+    
+    def names_for(self, player_ids: np.ndarray) -> np.ndarray:
+        """Nomi (normalizzati come nel cleaner) per ID giocatore; ID se sconosciuto."""
+        player_ids = np.asarray(player_ids)
+        if len(self.player_ids) == 0:
+            return player_ids.astype(str)
+        
+        order = np.argsort(self.player_ids)
+        sorted_ids = self.player_ids[order]
+        pos = np.searchsorted(sorted_ids, player_ids).clip(max=len(sorted_ids) - 1)
+        found = sorted_ids[pos] == player_ids
+        return np.where(found, self.player_names[order][pos], player_ids.astype(str))
+    
+    def _snapshot_intervals(self, start=None, end=None, max_gap_days: int = None) -> np.ndarray:
+        """
+        Giorni di validità di ogni classifica, ritagliati sulla finestra [start, end].
+        
+        Una classifica vale dalla sua data alla successiva; l'ultima vale
+        una settimana.
+        """
+        begin = self.snapshots.astype(np.int64)
+        finish = np.append(begin[1:], begin[-1] + 7) if len(begin) else begin
+        
+        if max_gap_days is not None:
+            finish = np.minimum(finish, begin + max_gap_days)
+        if start is not None:
+            begin = np.maximum(begin, _to_days(start))
+        if end is not None:
+            finish = np.minimum(finish, _to_days(end) + 1)
+        
+        return np.clip(finish - begin, 0, None)
+    
+    def time_at_rank(self, max_rank: int = 1, start=None, end=None,
+                     max_gap_days: int = None) -> pd.DataFrame:
+        """
+        Giorni/settimane trascorsi da ogni giocatore entro la posizione max_rank.
+        
+        Args:
+            max_rank: Soglia di classifica (1 = n.1, 10 = top 10, ...)
+            start: Data iniziale inclusa (default: tutta la storia)
+            end: Data finale inclusa
+            max_gap_days: Validità massima di una classifica (per buchi nei dati)
+        
+        Returns:
+            DataFrame con player_id, player_name, days, weeks, first_date,
+            last_date ordinato per giorni decrescenti
+        """
+        columns = ['player_id', 'player_name', 'days', 'weeks', 'first_date', 'last_date']
+        if len(self) == 0:
+            return pd.DataFrame(columns=columns)
+        
+        durations = self._snapshot_intervals(start, end, max_gap_days)[self._snapshot_of_row]
+        mask = (self.ranks >= 1) & (self.ranks <= max_rank) & (durations > 0)
+        if not mask.any():
+            return pd.DataFrame(columns=columns)
+        
+        ids, codes = np.unique(self.players[mask], return_inverse=True)
+        days = np.bincount(codes, weights=durations[mask]).astype(np.int64)
+        
+        # Righe ordinate per data: prima/ultima occorrenza per giocatore
+        dates = self.dates[mask]
+        first = np.full(len(ids), np.iinfo(np.int32).max, dtype=np.int64)
+        last = np.full(len(ids), np.iinfo(np.int32).min, dtype=np.int64)
+        np.minimum.at(first, codes, dates)
+        np.maximum.at(last, codes, dates)
+        
+        result = pd.DataFrame({
+            'player_id': ids,
+            'player_name': self.names_for(ids),
+            'days': days,
+            'weeks': (days / 7).round(1),
+            'first_date': pd.to_datetime(first, unit='D'),
+            'last_date': pd.to_datetime(last, unit='D'),
+        })
+        return result.sort_values('days', ascending=False, ignore_index=True)
+    
+    def time_at_thresholds(self, thresholds: Iterable[int] = None, start=None, end=None,
+                           max_gap_days: int = None) -> pd.DataFrame:
+        """
+        Settimane entro più soglie di classifica (tabella wide per giocatore).
+        
+        Args:
+            thresholds: Soglie (default: config.RANKING_THRESHOLDS)
+            start: Data iniziale inclusa
+            end: Data finale inclusa
+            max_gap_days: Validità massima di una classifica
+        
+        Returns:
+            DataFrame con player_id, player_name e weeks_top{N} per ogni soglia
+        """
+        thresholds = sorted(thresholds or config.RANKING_THRESHOLDS)
+        
+        table = None
+        for threshold in thresholds:
+            part = self.time_at_rank(threshold, start, end, max_gap_days)
+            part = part[['player_id', 'player_name', 'weeks']].rename(columns={'weeks': f'weeks_top{threshold}'})
+            table = part if table is None else table.merge(part, on=['player_id', 'player_name'], how='outer')
+        
+        weeks_cols = [f'weeks_top{threshold}' for threshold in thresholds]
+        table[weeks_cols] = table[weeks_cols].fillna(0)
+        return table.sort_values(weeks_cols, ascending=False, ignore_index=True)
@@ -0,0 +1,334 @@
+"""
+Motore di rating Elo per giocatori ATP (globale e per superficie)
+
+I rating sono mantenuti in array NumPy indicizzati per codice giocatore.
+I match vengono elaborati in ordine cronologico a "ondate": ogni ondata
+contiene match senza giocatori in comune, aggiornati con una sola
+operazione vettoriale; l'ordine dei match di ciascun giocatore è
+rispettato, quindi il risultato coincide con l'elaborazione match per match.
+"""
+from typing import Callable, Dict, List, Optional, Union
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from .cleaner import chronological_order
+from .encoding import PlayerCodec
+from . import config
+
+logger = setup_logger(__name__)
+
+
+def fivethirtyeight_k(matches: np.ndarray) -> np.ndarray:
+    """
+    K-factor decrescente con l'esperienza (schema FiveThirtyEight).
+    
+    Args:
+        matches: Match già disputati dal giocatore
+    
+    Returns:
+        K-factor per ogni giocatore
+    """
+    return 250.0 / (matches + 5.0) ** 0.4
+
+
+K_SCHEDULES = {
+    'fivethirtyeight': fivethirtyeight_k,
+}
+
+
+def _resolve_k_factor(k_factor: Union[float, str, Callable]) -> Callable[[np.ndarray], np.ndarray]:
+    """Converte il parametro k_factor in funzione (match disputati -> K)."""
+    if callable(k_factor):
+        return k_factor
+    if isinstance(k_factor, str):
+        if k_factor not in K_SCHEDULES:
+            raise ValueError(f"K-factor sconosciuto: {k_factor} (ammessi: {list(K_SCHEDULES)})")
+        return K_SCHEDULES[k_factor]
+    
+    constant = float(k_factor)
+    return lambda matches: np.full(len(matches), constant)
+
+
+def _schedule_waves(winners: np.ndarray, losers: np.ndarray, n_players: int) -> np.ndarray:
+    """
+    Assegna ogni match alla prima ondata successiva a quelle dei suoi giocatori.
+    
+    Args:
+        winners: Codici vincitori (ordine cronologico)
+        losers: Codici perdenti (ordine cronologico)
+        n_players: Numero di codici giocatore
+    
+    Returns:
+        Array con l'ondata di ogni match
+    """
+    last_wave = [0] * n_players
+    waves = [0] * len(winners)
+    
+    for i, (winner, loser) in enumerate(zip(winners.tolist(), losers.tolist())):
+        wave = max(last_wave[winner], last_wave[loser]) + 1
+        last_wave[winner] = last_wave[loser] = wave
+        waves[i] = wave
+    
+    return np.asarray(waves, dtype=np.int64)
+
+
+class EloRatingEngine:
+    """Rating Elo globale e per superficie su array NumPy"""
+    
+    def __init__(self, k_factor: Union[float, str, Callable] = 'fivethirtyeight',
+                 initial_rating: float = config.ELO_INITIAL_RATING,
+                 surfaces: List[str] = None,
+                 level_weights: Optional[Dict[str, float]] = None):
+        """
+        Inizializza motore Elo.
+        
+        Args:
+            k_factor: K costante, nome di uno schema (K_SCHEDULES) o funzione
+                che riceve l'array dei match disputati e ritorna i K
+            initial_rating: Rating iniziale di ogni giocatore
+            surfaces: Superfici con rating dedicato (default: config.SURFACE_TYPES)
+            level_weights: Moltiplicatori del K per tourney_level_name
+                (es. {'Grand Slam': 1.1})
+        """
+        self.k_function = _resolve_k_factor(k_factor)
+        self.initial_rating = initial_rating
+        self.surfaces = list(surfaces or config.SURFACE_TYPES)
+        self.level_weights = dict(level_weights or {})
+        self.reset()
+    
+    def reset(self):
+        """Azzera rating, contatori e storico."""
+        self.codec = PlayerCodec()
+        # Riga 0: rating globale; righe 1..S: superfici; ultima riga: superficie sconosciuta
+        self._ratings = np.full((len(self.surfaces) + 2, 0), self.initial_rating)
+        self._matches = np.zeros((len(self.surfaces) + 2, 0), dtype=np.int64)
+        self._history: List[Dict[str, np.ndarray]] = []
+        self._history_frame: Optional[pd.DataFrame] = None
+        self.last_date = None
+    
+    def _ensure_capacity(self, n_players: int):
+        """Estende gli array (raddoppiando) per contenere n_players giocatori."""
+        capacity = self._ratings.shape[1]
+        if n_players <= capacity:
+            return
+        
+        new_capacity = max(n_players, 2 * capacity, 1024)
+        ratings = np.full((self._ratings.shape[0], new_capacity), self.initial_rating)
+        matches = np.zeros((self._matches.shape[0], new_capacity), dtype=np.int64)
+        ratings[:, :capacity] = self._ratings
+        matches[:, :capacity] = self._matches
+        self._ratings, self._matches = ratings, matches
+    
+    @property
+    def ratings(self) -> np.ndarray:
+        """Rating globali correnti, indicizzati per codice giocatore."""
+        return self._ratings[0, :len(self.codec)]
+    
+    @property
+    def surface_ratings(self) -> np.ndarray:
+        """Rating correnti per superficie (righe in ordine di self.surfaces)."""
+        return self._ratings[1:len(self.surfaces) + 1, :len(self.codec)]
+    
+    def expected_score(self, rating: np.ndarray, opponent_rating: np.ndarray) -> np.ndarray:
+        """Probabilità di vittoria attesa dato il rating dell'avversario."""
+        return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / config.ELO_SCALE))
+    
+    def process(self, matches: pd.DataFrame) -> pd.DataFrame:
+        """
+        Elabora nuovi match (in coda a quelli già elaborati) aggiornando i rating.
+        
+        Chiamate successive continuano dallo stato corrente, senza rielaborare
+        i match precedenti.
+        
+        Args:
+            matches: DataFrame pulito (winner_name, loser_name, tourney_date, surface)
+        
+        Returns:
+            DataFrame allineato a `matches` con i rating pre-match
+            (winner_elo, loser_elo, winner_surface_elo, loser_surface_elo)
+            e la probabilità di vittoria attesa del vincitore (winner_win_prob)
+        """
+        n = len(matches)
+        columns = ['winner_elo', 'loser_elo', 'winner_surface_elo', 'loser_surface_elo', 'winner_win_prob']
+        if n == 0:
+            return pd.DataFrame(columns=columns, index=matches.index, dtype=float)
+        
+        order = chronological_order(matches)
+        dates = matches['tourney_date'].to_numpy(dtype='datetime64[D]')[order]
+        if self.last_date is not None and dates[0] < self.last_date:
+            logger.warning("Match dal %s precedenti all'ultimo elaborato (%s): elaborati comunque in coda",
+                           dates[0], self.last_date)
+        
+        winners = self.codec.encode(matches['winner_name'].iloc[order])
+        losers = self.codec.encode(matches['loser_name'].iloc[order])
+        self._ensure_capacity(len(self.codec))
+        capacity = self._ratings.shape[1]
+        
+        surface_idx = pd.Index(self.surfaces).get_indexer(matches['surface'].iloc[order])
+        surface_row = np.where(surface_idx >= 0, surface_idx + 1, len(self.surfaces) + 1)
+        
+        weights = np.ones(n)
+        if self.level_weights and 'tourney_level_name' in matches.columns:
+            weights = matches['tourney_level_name'].iloc[order].map(self.level_weights).fillna(1.0).to_numpy()
+        
+        # Ogni match aggiorna due celle per giocatore: rating globale e di superficie
+        flat_ratings = self._ratings.reshape(-1)
+        flat_matches = self._matches.reshape(-1)
+        cells_w = np.stack([winners, surface_row * capacity + winners])
+        cells_l = np.stack([losers, surface_row * capacity + losers])
+        
+        pre_w = np.empty((2, n))
+        pre_l = np.empty((2, n))
+        post_w = np.empty((2, n))
+        post_l = np.empty((2, n))
+        
+        waves = _schedule_waves(winners, losers, len(self.codec))
+        wave_order = np.argsort(waves, kind='stable')
+        bounds = np.flatnonzero(np.diff(waves[wave_order])) + 1
+        
+        for idx in np.split(wave_order, bounds):
+            cw = cells_w[:, idx]
+            cl = cells_l[:, idx]
+            rw = flat_ratings[cw]
+            rl = flat_ratings[cl]
+            
+            surprise = 1.0 - self.expected_score(rw, rl)
+            kw = self.k_function(flat_matches[cw].ravel()).reshape(cw.shape) * weights[idx]
+            kl = self.k_function(flat_matches[cl].ravel()).reshape(cl.shape) * weights[idx]
+            
+            new_w = rw + kw * surprise
+            new_l = rl - kl * surprise
+            flat_ratings[cw] = new_w
+            flat_ratings[cl] = new_l
+            flat_matches[cw] += 1
+            flat_matches[cl] += 1
+            
+            pre_w[:, idx], pre_l[:, idx] = rw, rl
+            post_w[:, idx], post_l[:, idx] = new_w, new_l
+        
+        # Superficie sconosciuta: nessun rating di superficie
+        unknown = surface_idx < 0
+        for arr in (pre_w, pre_l, post_w, post_l):
+            arr[1, unknown] = np.nan
+        
+        self._history.append({
+            'date': dates,
+            'winner': winners,
+            'loser': losers,
+            'surface': surface_idx,
+            'winner_before': pre_w.T.copy(),
+            'loser_before': pre_l.T.copy(),
+            'winner_after': post_w.T.copy(),
+            'loser_after': post_l.T.copy(),
+        })
+        self._history_frame = None
+        self.last_date = dates.max() if self.last_date is None else max(self.last_date, dates.max())
+        
+        logger.info("✓ Elo aggiornato: %d match, %d giocatori", n, len(self.codec))
+        
+        # Riportare i risultati all'ordine originale
+        result = np.empty((n, len(columns)))
+        result[order] = np.column_stack([
+            pre_w[0], pre_l[0], pre_w[1], pre_l[1], self.expected_score(pre_w[0], pre_l[0])
+        ])
+        return pd.DataFrame(result, columns=columns, index=matches.index)
+    
+    def get_ratings(self, surface: str = None, min_matches: int = 0) -> pd.DataFrame:
+        """
+        Classifica Elo corrente.
+        
+        Args:
+            surface: Superficie (default: rating globale)
+            min_matches: Minimo match disputati (sulla superficie, se indicata)
+        
+        Returns:
+            DataFrame con player_name, elo, matches ordinato per elo
+        """
+        row = 0 if surface is None else self.surfaces.index(surface) + 1
+        n_players = len(self.codec)
+        
+        table = pd.DataFrame({
+            'player_name': self.codec.names,
+            'elo': self._ratings[row, :n_players],
+            'matches': self._matches[row, :n_players],
+        })
+        table = table[table['matches'] >= max(min_matches, 1)]
+        
+        return table.sort_values('elo', ascending=False, ignore_index=True)
+    
+    def _history_table(self) -> pd.DataFrame:
+        """Storico completo in forma tabellare (una riga per match)."""
+        if self._history_frame is None:
+            chunks = self._history
+            if not chunks:
+                return pd.DataFrame()
+            
+            stacked = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+            self._history_frame = pd.DataFrame({
+                'date': stacked['date'],
+                'winner': stacked['winner'],
+                'loser': stacked['loser'],
+                'surface': stacked['surface'],
+                'winner_before': stacked['winner_before'][:, 0],
+                'loser_before': stacked['loser_before'][:, 0],
+                'winner_after': stacked['winner_after'][:, 0],
+                'loser_after': stacked['loser_after'][:, 0],
+                'winner_surface_before': stacked['winner_before'][:, 1],
+                'loser_surface_before': stacked['loser_before'][:, 1],
+                'winner_surface_after': stacked['winner_after'][:, 1],
+                'loser_surface_after': stacked['loser_after'][:, 1],
+            })
+        return self._history_frame
+    
+    def player_history(self, player_name: str, surface: str = None) -> pd.DataFrame:
+        """
+        Evoluzione del rating di un giocatore, match per match.
+        
+        Args:
+            player_name: Nome giocatore
+            surface: Superficie (default: rating globale)
+        
+        Returns:
+            DataFrame con date, opponent, won, elo_before, elo_after
+        """
+        columns = ['date', 'opponent', 'won', 'elo_before', 'elo_after']
+        code = self.codec.lookup([player_name])[0]
+        history = self._history_table()
+        if code < 0 or history.empty:
+            return pd.DataFrame(columns=columns)
+        
+        suffix = ''
+        if surface is not None:
+            history = history[history['surface'] == self.surfaces.index(surface)]
+            suffix = '_surface'
+        
+        won = history['winner'].to_numpy() == code
+        rows = history[won | (history['loser'].to_numpy() == code)]
+        won = rows['winner'].to_numpy() == code
+        
+        return pd.DataFrame({
+            'date': rows['date'].to_numpy(),
+            'opponent': self.codec.decode(np.where(won, rows['loser'], rows['winner'])),
+            'won': won,
+            'elo_before': np.where(won, rows[f'winner{suffix}_before'], rows[f'loser{suffix}_before']),
+            'elo_after': np.where(won, rows[f'winner{suffix}_after'], rows[f'loser{suffix}_after']),
+        })
+    
+    def win_probability(self, player1: str, player2: str, surface: str = None) -> float:
+        """
+        Probabilità che player1 batta player2 secondo i rating correnti.
+        
+        Args:
+            player1: Nome primo giocatore
+            player2: Nome secondo giocatore
+            surface: Superficie (default: rating globale)
+        
+        Returns:
+            Probabilità di vittoria di player1
+        """
+        row = 0 if surface is None else self.surfaces.index(surface) + 1
+        codes = self.codec.lookup([player1, player2])
+        r1, r2 = (self._ratings[row, c] if c >= 0 else self.initial_rating for c in codes)
+        return float(self.expected_score(r1, r2))
@@ -0,0 +1,210 @@
+"""
+Statistiche al servizio e in risposta dalle colonne w_/l_ dei match
+
+Ogni match diventa due righe giocatore-match (vincitore e perdente) con le
+stesse colonne: statistiche di servizio del giocatore e, come risposta,
+quelle di servizio dell'avversario. Le percentuali aggregate sono rapporti
+tra somme, calcolati in un solo passaggio raggruppato.
+"""
+from typing import Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+import numpy as np
+
+from .bootstrap import bootstrap_ratio
+from .logger import setup_logger
+from . import config
+
+logger = setup_logger(__name__)
+
+
+# Contatori di servizio presenti come w_<nome> / l_<nome>
+SERVE_COUNTS = ['ace', 'df', 'svpt', '1stIn', '1stWon', '2ndWon', 'SvGms', 'bpSaved', 'bpFaced']
+
+# Contatori dell'avversario usati per le statistiche in risposta
+RETURN_COUNTS = ['svpt', '1stWon', '2ndWon', 'SvGms', 'bpSaved', 'bpFaced']
+
+# Percentuale -> (numeratore, denominatore) in funzione dei contatori
+RATIOS = {
+    'ace_pct': (lambda c: c['ace'], lambda c: c['svpt']),
+    'df_pct': (lambda c: c['df'], lambda c: c['svpt']),
+    'first_serve_pct': (lambda c: c['1stIn'], lambda c: c['svpt']),
+    'first_serve_won_pct': (lambda c: c['1stWon'], lambda c: c['1stIn']),
+    'second_serve_won_pct': (lambda c: c['2ndWon'], lambda c: c['svpt'] - c['1stIn']),
+    'bp_saved_pct': (lambda c: c['bpSaved'], lambda c: c['bpFaced']),
+    'hold_pct': (lambda c: c['SvGms'] - (c['bpFaced'] - c['bpSaved']), lambda c: c['SvGms']),
+    'return_points_won_pct': (
+        lambda c: c['ret_svpt'] - c['ret_1stWon'] - c['ret_2ndWon'], lambda c: c['ret_svpt']
+    ),
+    'bp_converted_pct': (lambda c: c['ret_bpFaced'] - c['ret_bpSaved'], lambda c: c['ret_bpFaced']),
+    'break_pct': (lambda c: c['ret_bpFaced'] - c['ret_bpSaved'], lambda c: c['ret_SvGms']),
+}
+
+GROUP_COLUMNS = {
+    'surface': 'surface',
+    'level': 'tourney_level_name',
+    'year': 'year',
+}
+
+
+def _ratio(numerator, denominator, dtype=np.float32) -> np.ndarray:
+    """Rapporto elemento per elemento (NaN dove il denominatore è nullo)."""
+    numerator = np.asarray(numerator, dtype=dtype)
+    denominator = np.asarray(denominator, dtype=dtype)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan).astype(dtype)
+
+
+class ServeStatsTable:
+    """Tabella colonnare giocatore-match con contatori e percentuali di servizio/risposta"""
+    
+    def __init__(self, df: pd.DataFrame):
+        """
+        Costruisce la tabella lunga (2 righe per match) dal dataset pulito.
+        
+        Args:
+            df: DataFrame pulito (righe senza statistiche restano, con NaN)
+        """
+        n = len(df)
+        self.n_matches = n
+        
+        def column(name: str) -> np.ndarray:
+            if name not in df.columns:
+                return np.full(n, np.nan, dtype=np.float32)
+            return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float32)
+        
+        def both(winner_col: str, loser_col: str) -> np.ndarray:
+            return np.concatenate([column(winner_col), column(loser_col)])
+        
+        players, self.player_names = pd.factorize(
+            pd.concat([df['winner_name'], df['loser_name']], ignore_index=True)
+        )
+        
+        table = {
+            'row': np.tile(np.arange(n, dtype=np.int64), 2),
+            'player': players.astype(np.int32),
+            'opponent': np.concatenate([players[n:], players[:n]]).astype(np.int32),
+            'won': np.repeat([True, False], n),
+            'opponent_rank': both('loser_rank', 'winner_rank'),
+        }
+        for col in ['surface', 'tourney_level_name', 'year']:
+            values = df[col].to_numpy()
+            table[col] = np.concatenate([values, values])
+        
+        # Servizio: colonne proprie; risposta: colonne di servizio dell'avversario
+        for stat in SERVE_COUNTS:
+            table[stat] = both(f'w_{stat}', f'l_{stat}')
+        for stat in RETURN_COUNTS:
+            table[f'ret_{stat}'] = both(f'l_{stat}', f'w_{stat}')
+        
+        self.matches = pd.DataFrame(table)
+        self.has_stats = ((self.matches['svpt'] > 0) & (self.matches['ret_svpt'] > 0)).to_numpy()
+        
+        # Percentuali per match precalcolate (float32)
+        for name, (numerator, denominator) in RATIOS.items():
+            self.matches[name] = _ratio(numerator(self.matches), denominator(self.matches))
+    
+    def __len__(self) -> int:
+        return len(self.matches)
+    
+    def filter_mask(self, surface: Optional[str] = None, year: Union[int, Tuple[int, int], None] = None,
+                    opponent_rank: Optional[Tuple[int, int]] = None, rows: Optional[slice] = None) -> np.ndarray:
+        """
+        Maschera booleana delle righe giocatore-match con statistiche e nei filtri.
+        
+        Args:
+            surface: Solo questa superficie
+            year: Anno o intervallo (primo, ultimo) inclusi
+            opponent_rank: Fascia di ranking dell'avversario (min, max) inclusa
+            rows: Slice posizionale dei match (finestra temporale)
+        
+        Returns:
+            Array booleano allineato a self.matches
+        """
+        mask = self.has_stats.copy()
+        matches = self.matches
+        
+        if surface is not None:
+            mask &= (matches['surface'] == surface).to_numpy()
+        if year is not None:
+            first, last = (year, year) if np.isscalar(year) else year
+            years = matches['year'].to_numpy()
+            mask &= (years >= first) & (years <= last)
+        if opponent_rank is not None:
+            low, high = opponent_rank
+            ranks = matches['opponent_rank'].to_numpy()
+            mask &= (ranks >= low) & (ranks <= high)
+        if rows is not None:
+            positions = matches['row'].to_numpy()
+            mask &= (positions >= rows.start) & (positions < rows.stop)
+        
+        return mask
+    
+    def aggregate(self, by: Union[str, List[str], None] = None, min_matches: int = 1,
+                  intervals: Iterable[str] = (), confidence: float = config.BOOTSTRAP_CONFIDENCE,
+                  n_resamples: int = config.BOOTSTRAP_RESAMPLES, seed: Optional[int] = None,
+                  n_jobs: int = 1, **filters) -> pd.DataFrame:
+        """
+        Percentuali di servizio e risposta per giocatore in un solo groupby.
+        
+        Args:
+            by: Raggruppamento aggiuntivo: 'surface', 'level', 'year' o lista
+            min_matches: Minimo match con statistiche per gruppo
+            intervals: Percentuali (chiavi di RATIOS) con intervallo bootstrap
+                {nome}_low / {nome}_high sui match del gruppo
+            confidence: Livello di confidenza degli intervalli
+            n_resamples: Repliche bootstrap
+            seed: Seed del bootstrap
+            n_jobs: Processi per il bootstrap
+            **filters: surface, year, opponent_rank, rows (vedi filter_mask)
+        
+        Returns:
+            DataFrame con player_name, colonne di raggruppamento, matches,
+            contatori sommati e percentuali (0-100)
+        """
+        by = [by] if isinstance(by, str) else list(by or [])
+        unknown = [key for key in by if key not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Raggruppamento non valido: {unknown} (ammessi: {list(GROUP_COLUMNS)})")
+        group_cols = [GROUP_COLUMNS[key] for key in by]
+        
+        counts = SERVE_COUNTS + [f'ret_{stat}' for stat in RETURN_COUNTS]
+        selected = self.matches.loc[self.filter_mask(**filters), ['player'] + group_cols + counts]
+        
+        grouped = selected.groupby(['player'] + group_cols, sort=False)
+        totals = grouped[counts].sum().astype(np.int64)
+        totals.insert(0, 'matches', grouped.size())
+        
+        for name, (numerator, denominator) in RATIOS.items():
+            totals[name] = (_ratio(numerator(totals), denominator(totals), np.float64) * 100).round(1)
+        
+        enough = (totals['matches'] >= max(min_matches, 1)).to_numpy()
+        
+        intervals = list(intervals)
+        if intervals and enough.any():
+            # Match dei gruppi mantenuti contigui (CSR), nell'ordine di totals
+            new_code = np.cumsum(enough) - 1
+            group_codes = grouped.ngroup().to_numpy()
+            rows = np.flatnonzero(enough[group_codes])
+            codes = new_code[group_codes[rows]]
+            order = rows[np.argsort(codes, kind='stable')]
+            offsets = np.zeros(int(enough.sum()) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes, minlength=len(offsets) - 1), out=offsets[1:])
+            
+            ordered = selected.iloc[order]
+            for name in intervals:
+                numerator, denominator = RATIOS[name]
+                interval = bootstrap_ratio(
+                    offsets, numerator(ordered).to_numpy(), denominator(ordered).to_numpy(),
+                    n_resamples=n_resamples, confidence=confidence, seed=seed, n_jobs=n_jobs,
+                )
+                for side in ('low', 'high'):
+                    values = np.full(len(totals), np.nan)
+                    values[enough] = (interval[side] * 100).round(1)
+                    totals[f'{name}_{side}'] = values
+        
+        totals = totals[enough]
+        totals = totals.reset_index()
+        totals.insert(0, 'player_name', np.asarray(self.player_names)[totals.pop('player').to_numpy()])
+        return totals
+
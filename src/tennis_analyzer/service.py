@@ -0,0 +1,442 @@
+"""
+Servizio HTTP locale di query sul dataset pulito
+
+Il dataset (clean_data.csv o un MatchStore) viene caricato una sola volta
+insieme agli indici; le richieste GET restituiscono in JSON le analisi di
+ATPAnalyzer, i profili dei giocatori e gli head-to-head. Le richieste sono
+servite in thread (ThreadingHTTPServer), le risposte finiscono in una cache
+LRU e un thread di controllo ricarica il dataset quando su disco compare
+una nuova versione: il nuovo analyzer viene preparato in background e
+sostituito in blocco, le richieste in corso terminano sul precedente.
+
+Endpoint:
+    GET  /health
+    GET  /analyses
+    GET  /analyses/<nome>?top_n=..&start=..&end=..
+    GET  /players/<nome>[/matches|/timeline]?start=..&end=..
+    GET  /h2h?player1=..&player2=..[&start=..&end=..]
+    POST /reload
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from .analyzer import BREAKDOWN_COLUMNS, ERA_PERIODS, ATPAnalyzer
+from .serve_stats import GROUP_COLUMNS, RATIOS
+from .store import SCHEMA_FILE, MatchStore
+from .upsets import UPSET_GROUPS
+from . import config
+
+logger = setup_logger(__name__)
+
+
+# Conversioni dei parametri: un ValueError diventa una risposta 400, prima
+# di eseguire l'analisi (gli errori durante l'analisi sono errori del server)
+
+def _names(allowed: Iterable[str]) -> Callable[[str], List[str]]:
+    """Lista separata da virgole di valori ammessi."""
+    def convert(value: str) -> List[str]:
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ValueError(f"{', '.join(unknown)} (ammessi: {', '.join(allowed)})")
+        return names
+    return convert
+
+
+def _choice(allowed: Iterable[str]) -> Callable[[str], str]:
+    """Un valore tra quelli ammessi."""
+    def convert(value: str) -> str:
+        if value not in allowed:
+            raise ValueError(f"{value} (ammessi: {', '.join(allowed)})")
+        return value
+    return convert
+
+
+def _positive(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise ValueError(f"{value} (atteso un intero >= 1)")
+    return number
+
+
+def _fraction(value: str) -> float:
+    number = float(value)
+    if not 0 < number < 1:
+        raise ValueError(f"{value} (atteso un valore tra 0 e 1)")
+    return number
+
+
+def _date(value: str) -> pd.Timestamp:
+    date = pd.Timestamp(value)
+    if pd.isna(date):
+        raise ValueError(f"{value} (attesa una data)")
+    return date
+
+
+_WINDOW = {'start': _date, 'end': _date}
+_CONFIDENCE = {'confidence': _fraction, 'seed': int}
+
+# Endpoint /analyses/<nome> -> (metodo di ATPAnalyzer, parametri ammessi e conversione)
+ANALYSES: Dict[str, Tuple[str, Dict[str, Callable]]] = {
+    'top_atp_days': ('analyze_top_atp_days', {'top_n': _positive, **_WINDOW}),
+    'total_wins': ('analyze_total_wins', {'top_n': _positive, **_CONFIDENCE, **_WINDOW}),
+    'surface_performance': ('analyze_surface_performance', {'top_n': _positive, **_CONFIDENCE, **_WINDOW}),
+    'tournament_levels': ('analyze_tournament_levels', dict(_WINDOW)),
+    'era_leaders': ('get_era_leaders', {'period': _choice(ERA_PERIODS), 'top_k': _positive,
+                                        'by': _names(list(BREAKDOWN_COLUMNS)), **_WINDOW}),
+    'era_dominators': ('get_era_dominators', dict(_WINDOW)),
+    'streaks': ('analyze_streaks', {'top_n': _positive, 'by': _names(list(BREAKDOWN_COLUMNS)), **_WINDOW}),
+    'serve_return': ('analyze_serve_return',
+                     {'top_n': _positive, 'sort_by': _choice(list(RATIOS)), 'by': _names(list(GROUP_COLUMNS)),
+                      'surface': str, 'year': int, **_WINDOW}),
+    'upsets': ('analyze_upsets', {'by': _names(list(UPSET_GROUPS)), **_WINDOW}),
+    'player_profiles': ('player_profiles', {'min_matches': int}),
+}
+
+
+class ServiceError(Exception):
+    """Errore di una richiesta, con lo status HTTP da restituire"""
+    
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def to_jsonable(value):
+    """
+    Converte i risultati delle analisi in tipi serializzabili in JSON.
+    
+    DataFrame -> lista di record (un indice con nome, es. gap_bucket della
+    griglia degli upset, diventa una colonna), Series -> dict, scalari
+    NumPy -> Python, date -> ISO 8601, NaN/NaT -> null.
+    """
+    if isinstance(value, pd.DataFrame):
+        if any(name is not None for name in value.index.names):
+            value = value.reset_index()
+        return json.loads(value.to_json(orient='records', date_format='iso'))
+    if isinstance(value, pd.Series):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return None if pd.isna(value) else value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    if value is pd.NaT or value is pd.NA:
+        return None
+    return value
+
+
+def dataset_version(path: Path) -> Optional[Tuple[int, int]]:
+    """Versione del dataset su disco (mtime e dimensione), None se assente."""
+    path = Path(path)
+    marker = path / SCHEMA_FILE if path.is_dir() else path
+    try:
+        stat = marker.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_analyzer(path: Path) -> ATPAnalyzer:
+    """
+    Analyzer sul dataset pulito con indici già costruiti.
+    
+    Args:
+        path: clean_data.csv oppure cartella di un MatchStore
+    
+    Returns:
+        ATPAnalyzer pronto a servire richieste concorrenti
+    """
+    path = Path(path)
+    if path.is_dir():
+        analyzer = ATPAnalyzer(MatchStore(path))
+    else:
+        analyzer = ATPAnalyzer(pd.read_csv(path, parse_dates=['tourney_date']))
+    
+    # Indici costruiti ora: le richieste concorrenti li trovano pronti
+    analyzer.player_index
+    analyzer.h2h_index
+    analyzer.aggregates
+    return analyzer
+
+
+class QueryService:
+    """Dataset caldo, cache delle risposte e ricarica a caldo"""
+    
+    def __init__(self, path: Path = None, cache_size: int = config.SERVICE_CACHE_SIZE,
+                 reload_interval: float = config.SERVICE_RELOAD_INTERVAL):
+        """
+        Carica il dataset (bloccante) e prepara la cache.
+        
+        Args:
+            path: clean_data.csv o cartella MatchStore (default: config.CLEAN_DATA_CSV)
+            cache_size: Risposte tenute in cache (0 = nessuna cache)
+            reload_interval: Secondi tra i controlli di una nuova versione (0 = mai)
+        """
+        self.path = Path(path or config.CLEAN_DATA_CSV)
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.hits = 0
+        self.misses = 0
+        self._cache: 'OrderedDict[Tuple, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._pending: Optional[Tuple[int, int]] = None
+        
+        self.version = dataset_version(self.path)
+        if self.version is None:
+            raise FileNotFoundError(f"Dataset non trovato: {self.path}")
+        self.analyzer = load_analyzer(self.path)
+        self.loaded_at = datetime.now()
+        logger.info("✓ Dataset caricato: %s (%d righe)", self.path, len(self.analyzer.df))
+    
+    # =====================================================
+    # RICARICA A CALDO
+    # =====================================================
+    
+    def start_watching(self):
+        """Avvia il thread che controlla periodicamente la versione su disco."""
+        if self.reload_interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name='dataset-watcher', daemon=True)
+        self._watcher.start()
+    
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+    
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.check_reload()
+            except Exception as e:
+                logger.error("❌ Ricarica fallita, resta la versione precedente: %s", e)
+    
+    def check_reload(self, force: bool = False) -> bool:
+        """
+        Ricarica il dataset se su disco c'è una nuova versione stabile.
+        
+        Una versione è stabile quando due controlli consecutivi la vedono
+        invariata (il file non è più in scrittura).
+        
+        Args:
+            force: Ricarica subito, anche senza cambi di versione
+        
+        Returns:
+            True se il dataset è stato sostituito
+        """
+        with self._reload_lock:
+            version = dataset_version(self.path)
+            if version is None or (version == self.version and not force):
+                self._pending = None
+                return False
+            if not force and version != self._pending:
+                self._pending = version
+                return False
+            
+            started = time.perf_counter()
+            analyzer = load_analyzer(self.path)
+            with self._lock:
+                self.analyzer, self.version = analyzer, version
+                self.loaded_at = datetime.now()
+                self._cache.clear()
+            self._pending = None
+            logger.info("✓ Dataset ricaricato: %d righe in %.2fs", len(analyzer.df), time.perf_counter() - started)
+            return True
+    
+    # =====================================================
+    # QUERY
+    # =====================================================
+    
+    def handle(self, path: str, query: Dict[str, List[str]]) -> Tuple[bytes, bool]:
+        """
+        Risposta JSON di una richiesta GET.
+        
+        Args:
+            path: Percorso della richiesta (es. /analyses/total_wins)
+            query: Parametri (parse_qs)
+        
+        Returns:
+            (corpo JSON, True se servito dalla cache)
+        """
+        if path.rstrip('/') == '/health':
+            return json.dumps(self.health()).encode('utf-8'), False
+        
+        key = (path, tuple(sorted((name, tuple(values)) for name, values in query.items())))
+        with self._lock:
+            analyzer, version = self.analyzer, self.version
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return body, True
+            self.misses += 1
+        
+        result = self._dispatch(analyzer, path, {name: values[-1] for name, values in query.items()})
+        body = json.dumps(to_jsonable(result), ensure_ascii=False).encode('utf-8')
+        
+        with self._lock:
+            # Risposte calcolate su una versione già sostituita non entrano in cache
+            if self.cache_size > 0 and version == self.version:
+                self._cache[key] = body
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return body, False
+    
+    def _dispatch(self, analyzer: ATPAnalyzer, path: str, params: Dict[str, str]):
+        parts = [unquote(part) for part in path.strip('/').split('/') if part]
+        
+        if parts == ['analyses']:
+            return {name: sorted(allowed) for name, (_, allowed) in ANALYSES.items()}
+        if len(parts) == 2 and parts[0] == 'analyses':
+            if parts[1] not in ANALYSES:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"Analisi sconosciuta: {parts[1]}")
+            method, allowed = ANALYSES[parts[1]]
+            return getattr(analyzer, method)(**_convert(params, allowed))
+        if len(parts) in (2, 3) and parts[0] == 'players':
+            player = self._known(analyzer, parts[1])
+            kwargs = _convert(params, _WINDOW)
+            view = parts[2] if len(parts) == 3 else 'profile'
+            if view == 'profile':
+                return analyzer.player_profile(player, **kwargs)
+            if view == 'matches':
+                return analyzer.player_matches(player, **kwargs)
+            if view == 'timeline':
+                return analyzer.player_timeline(player, **kwargs)
+        if parts == ['h2h']:
+            kwargs = _convert(params, {'player1': str, 'player2': str, **_WINDOW})
+            if 'player1' not in kwargs or 'player2' not in kwargs:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Parametri richiesti: player1, player2")
+            player1 = self._known(analyzer, kwargs.pop('player1'))
+            player2 = self._known(analyzer, kwargs.pop('player2'))
+            return {
+                **analyzer.head_to_head(player1, player2),
+                'matches': analyzer.head_to_head_matches(player1, player2, **kwargs),
+            }
+        
+        raise ServiceError(HTTPStatus.NOT_FOUND, f"Endpoint sconosciuto: {path}")
+    
+    @staticmethod
+    def _known(analyzer: ATPAnalyzer, player: str) -> str:
+        # head_to_head estende il dizionario dei nomi: solo giocatori già presenti
+        if analyzer.codec.lookup([player])[0] < 0:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Giocatore sconosciuto: {player}")
+        return player
+    
+    def health(self) -> Dict:
+        """Stato del servizio: versione caricata, righe e statistiche della cache."""
+        with self._lock:
+            return {
+                'status': 'ok',
+                'dataset': str(self.path),
+                'version': list(self.version),
+                'rows': len(self.analyzer.df),
+                'loaded_at': self.loaded_at.isoformat(timespec='seconds'),
+                'cache': {'size': len(self._cache), 'hits': self.hits, 'misses': self.misses},
+            }
+
+
+def _convert(params: Dict[str, str], allowed: Dict[str, Callable]) -> Dict:
+    """Parametri della query convertiti nei tipi attesi dal metodo."""
+    unknown = sorted(set(params) - set(allowed))
+    if unknown:
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"Parametri non ammessi: {', '.join(unknown)}")
+    converted = {}
+    for name, value in params.items():
+        try:
+            converted[name] = allowed[name](value)
+        except ValueError as e:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Parametro non valido: {name}={e}")
+    return converted
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Richieste HTTP -> QueryService (server.service)."""
+    
+    protocol_version = 'HTTP/1.1'
+    # Intestazioni e corpo sono due write: senza TCP_NODELAY, con keep-alive,
+    # Nagle e ACK ritardato aggiungono ~40 ms a ogni risposta
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        url = urlsplit(self.path)
+        started = time.perf_counter()
+        try:
+            body, cached = self.server.service.handle(url.path, parse_qs(url.query))
+        except ServiceError as e:
+            self._send(e.status, {'error': str(e)})
+            return
+        except Exception as e:
+            logger.error("❌ Errore su %s: %s", self.path, e, exc_info=True)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(e).__name__}: {e}"})
+            return
+        self._send(HTTPStatus.OK, body, cache='hit' if cached else 'miss',
+                   elapsed=time.perf_counter() - started)
+    
+    def do_POST(self):
+        if urlsplit(self.path).path.rstrip('/') != '/reload':
+            self._send(HTTPStatus.NOT_FOUND, {'error': f"Endpoint sconosciuto: {self.path}"})
+            return
+        try:
+            reloaded = self.server.service.check_reload(force=True)
+        except Exception as e:
+            logger.error("❌ Ricarica fallita: %s", e)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(e).__name__}: {e}"})
+            return
+        self._send(HTTPStatus.OK, {'reloaded': reloaded, **self.server.service.health()})
+    
+    def _send(self, status: HTTPStatus, payload: Union[bytes, Dict], cache: str = None,
+              elapsed: float = None):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if cache is not None:
+            self.send_header('X-Cache', cache)
+        if elapsed is not None:
+            self.send_header('X-Elapsed-Ms', f"{elapsed * 1000:.2f}")
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+
+def make_server(service: QueryService, host: str = config.SERVICE_HOST,
+                port: int = config.SERVICE_PORT) -> ThreadingHTTPServer:
+    """
+    Server HTTP multi-thread collegato al servizio (non ancora avviato).
+    
+    Args:
+        service: QueryService con il dataset caricato
+        host: Indirizzo di ascolto
+        port: Porta (0 = libera a caso)
+    
+    Returns:
+        ThreadingHTTPServer (serve_forever per avviarlo)
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
@@ -0,0 +1,227 @@
+"""
+Dataset pulito pubblicato in memoria condivisa per i processi worker
+
+Le colonne (encoding.encode_columns: array a larghezza fissa, stringhe come
+codici più un dizionario) vengono copiate una sola volta in un blocco
+multiprocessing.shared_memory. I worker si collegano per nome e ottengono
+viste NumPy/pandas in sola lettura sul blocco, senza copie né pickle del
+DataFrame. Il blocco viene chiuso quando l'ultimo riferimento del processo
+viene rilasciato e rimosso (unlink) quando lo rilascia il processo che l'ha
+pubblicato.
+"""
+import os
+import pickle
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from .encoding import decode_columns, encode_columns
+
+logger = setup_logger(__name__)
+
+
+# Intestazione del blocco: lunghezza dei metadati (pickle) e inizio dei dati allineati
+_HEADER = struct.Struct('<QQ')
+_ALIGNMENT = 64
+
+# Dataset collegati in questo processo (nome -> istanza), per il conteggio dei riferimenti
+_attached: Dict[str, 'SharedDataset'] = {}
+_lock = threading.Lock()
+# Serializza la sostituzione temporanea di resource_tracker.register (Python < 3.13)
+_tracker_lock = threading.Lock()
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class _Block(shared_memory.SharedMemory):
+    """SharedMemory che alla distruzione non segnala viste ancora esportate."""
+    
+    def __del__(self):
+        try:
+            self.close()
+        except (BufferError, OSError):
+            # Viste ancora vive (es. a fine processo): la mappatura si libera con l'ultima
+            pass
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    """
+    Collega un blocco esistente senza registrarlo nel resource_tracker.
+    
+    Prima di Python 3.13 ogni collegamento registra il blocco e il tracker lo
+    rimuove all'uscita del worker, cancellandolo anche per il processo che lo
+    ha pubblicato.
+    """
+    try:
+        return _Block(name=name, track=False)
+    except TypeError:
+        pass
+    
+    with _tracker_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return _Block(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedDataset:
+    """DataFrame a colonne in un blocco di memoria condivisa, collegabile per nome"""
+    
+    def __init__(self, block: shared_memory.SharedMemory, owner: bool):
+        """
+        Inizializza da un blocco già scritto (usare publish/attach).
+        
+        Args:
+            block: Blocco di memoria condivisa
+            owner: True nel processo che ha pubblicato il blocco (esegue l'unlink)
+        """
+        self._block = block
+        self.owner = owner
+        self._pid = os.getpid()
+        self._refs = 1
+        
+        meta_size, data_start = _HEADER.unpack_from(block.buf, 0)
+        meta = pickle.loads(bytes(block.buf[_HEADER.size:_HEADER.size + meta_size]))
+        self.schema: Dict[str, dict] = meta['schema']
+        self.n_rows: int = meta['n_rows']
+        
+        self.arrays: Dict[str, np.ndarray] = {}
+        for column, (offset, dtype) in meta['layout'].items():
+            if self.n_rows == 0:
+                view = np.empty(0, dtype=np.dtype(dtype))
+            else:
+                view = np.frombuffer(block.buf, dtype=np.dtype(dtype), count=self.n_rows,
+                                     offset=data_start + offset)
+            view.flags.writeable = False
+            self.arrays[column] = view
+    
+    @classmethod
+    def publish(cls, df: pd.DataFrame, name: Optional[str] = None) -> 'SharedDataset':
+        """
+        Copia le colonne di df in un nuovo blocco condiviso.
+        
+        Args:
+            df: DataFrame pulito (l'indice non viene conservato)
+            name: Nome del blocco (default: generato)
+        
+        Returns:
+            SharedDataset proprietario (rilasciarlo con release() o with)
+        """
+        arrays, schema = encode_columns(df)
+        
+        layout, offset = {}, 0
+        for column, values in arrays.items():
+            layout[column] = (offset, values.dtype.str)
+            offset = _aligned(offset + values.nbytes)
+        
+        # Offset relativi all'inizio dei dati, dopo intestazione e metadati
+        payload = pickle.dumps({'schema': schema, 'n_rows': len(df), 'layout': layout})
+        data_start = _aligned(_HEADER.size + len(payload))
+        
+        block = _Block(name=name, create=True, size=max(1, data_start + offset))
+        _HEADER.pack_into(block.buf, 0, len(payload), data_start)
+        block.buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+        for column, values in arrays.items():
+            start = data_start + layout[column][0]
+            block.buf[start:start + values.nbytes] = values.view(np.uint8).reshape(-1)
+        
+        dataset = cls(block, owner=True)
+        with _lock:
+            _attached[dataset.name] = dataset
+        logger.info("✓ Dataset condiviso %s: %d righe, %.1f MB", dataset.name, len(df), block.size / 1024 ** 2)
+        return dataset
+    
+    @classmethod
+    def attach(cls, name: str) -> 'SharedDataset':
+        """
+        Collega un blocco pubblicato (anche da un altro processo).
+        
+        Più collegamenti allo stesso nome nello stesso processo condividono la
+        mappatura e incrementano il conteggio dei riferimenti.
+        
+        Args:
+            name: Nome del blocco (SharedDataset.name)
+        
+        Returns:
+            SharedDataset (rilasciarlo con release() o with)
+        """
+        with _lock:
+            dataset = _attached.get(name)
+            # Il registro ereditato con fork appartiene al processo padre
+            if dataset is not None and dataset._pid == os.getpid():
+                dataset._refs += 1
+                return dataset
+            dataset = cls(_open_block(name), owner=False)
+            _attached[name] = dataset
+            return dataset
+    
+    @property
+    def name(self) -> str:
+        """Nome con cui i worker si collegano al blocco."""
+        return self._block.name
+    
+    def __len__(self) -> int:
+        return self.n_rows
+    
+    def __repr__(self) -> str:
+        return f"SharedDataset({self.name!r}, rows={self.n_rows}, refs={self._refs})"
+    
+    def __enter__(self) -> 'SharedDataset':
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+    
+    def __reduce__(self):
+        # Passato a un worker (es. ProcessPoolExecutor) viaggia solo il nome
+        return SharedDataset.attach, (self.name,)
+    
+    def frame(self, strings: str = 'category', columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        DataFrame in sola lettura sulle colonne condivise.
+        
+        Args:
+            strings: 'category' (codici condivisi, nessuna copia) o 'dense' (copia delle stringhe)
+            columns: Colonne da includere (default: tutte)
+        
+        Returns:
+            DataFrame le cui colonne sono viste sul blocco
+        """
+        if self._refs <= 0:
+            raise RuntimeError(f"Dataset condiviso {self.name} già rilasciato")
+        return decode_columns(self.arrays, self.schema, strings=strings, columns=columns)
+    
+    def release(self):
+        """
+        Rilascia un riferimento: all'ultimo chiude la mappatura e, nel processo
+        proprietario, rimuove il blocco. Le viste ancora in uso (DataFrame di
+        frame()) restano valide fino alla loro distruzione: rilasciarle prima
+        permette di chiudere subito la mappatura.
+        """
+        with _lock:
+            if self._refs <= 0:
+                return
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            _attached.pop(self.name, None)
+        
+        self.arrays = {}
+        try:
+            self._block.close()
+        except BufferError:
+            # Viste esterne ancora vive: la mappatura si libera con la loro distruzione
+            logger.debug("Dataset condiviso %s: viste ancora in uso alla chiusura", self.name)
+        if self.owner and self._pid == os.getpid():
+            self._block.unlink()
+            logger.info("✓ Dataset condiviso %s rimosso", self.name)
+
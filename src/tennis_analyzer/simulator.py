@@ -0,0 +1,178 @@
+"""
+Simulatore Monte Carlo di tabelloni a eliminazione diretta
+
+Le simulazioni sono righe di una matrice (simulazioni x posizioni del
+tabellone): ogni turno è una sola operazione vettoriale che confronta le
+posizioni adiacenti. I bye sono un giocatore fittizio che perde sempre.
+Le simulazioni sono divise in blocchi con seed derivati da un SeedSequence,
+eseguibili anche in processi separati.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from . import config
+
+logger = setup_logger(__name__)
+
+
+# Celle massime (simulazioni x posizioni) per blocco
+_SIMULATION_BLOCK_CELLS = 16_000_000
+
+
+def probabilities_from_strength(strength: np.ndarray) -> np.ndarray:
+    """
+    Matrice P[i, j] = s_i / (s_i + s_j) da una forza positiva (es. punti ATP).
+    
+    Args:
+        strength: Forza per giocatore (> 0)
+    
+    Returns:
+        Matrice N x N di probabilità di vittoria
+    """
+    strength = np.asarray(strength, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        matrix = strength[:, None] / (strength[:, None] + strength[None, :])
+    return np.nan_to_num(matrix, nan=0.5)
+
+
+def probabilities_from_ratings(ratings: np.ndarray, scale: float = config.ELO_SCALE) -> np.ndarray:
+    """
+    Matrice di probabilità Elo: 1 / (1 + 10^((r_j - r_i) / scale)).
+    
+    Args:
+        ratings: Rating per giocatore
+        scale: Scala Elo
+    
+    Returns:
+        Matrice N x N di probabilità di vittoria
+    """
+    ratings = np.asarray(ratings, dtype=np.float64)
+    return 1.0 / (1.0 + 10.0 ** ((ratings[None, :] - ratings[:, None]) / scale))
+
+
+def probabilities_from_win_rates(win_rates: np.ndarray) -> np.ndarray:
+    """
+    Matrice di probabilità dalle percentuali di vittoria (formula log5).
+    
+    Args:
+        win_rates: Win rate per giocatore in (0, 1)
+    
+    Returns:
+        Matrice N x N di probabilità di vittoria
+    """
+    a = np.clip(np.asarray(win_rates, dtype=np.float64), 1e-6, 1 - 1e-6)
+    pa, pb = a[:, None], a[None, :]
+    return (pa - pa * pb) / (pa + pb - 2 * pa * pb)
+
+
+def _simulate_block(matrix: np.ndarray, slots: np.ndarray, n_simulations: int,
+                    seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Simula un blocco di tabelloni.
+    
+    Returns:
+        Conteggi (giocatori + bye) x (turni + 1): volte in cui ogni giocatore
+        ha raggiunto ogni turno (colonna 0 = tabellone, ultima = titolo)
+    """
+    rng = np.random.default_rng(seed)
+    size = matrix.shape[0]
+    flat = matrix.ravel()
+    n_rounds = int(np.log2(len(slots)))
+    
+    reached = np.zeros((size, n_rounds + 1), dtype=np.int64)
+    reached[:, 0] = np.bincount(slots, minlength=size) * n_simulations
+    
+    current = np.broadcast_to(slots, (n_simulations, len(slots)))
+    for round_idx in range(1, n_rounds + 1):
+        top, bottom = current[:, 0::2], current[:, 1::2]
+        wins = rng.random(top.shape, dtype=np.float32) < flat[top * size + bottom]
+        current = np.where(wins, top, bottom)
+        reached[:, round_idx] = np.bincount(current.ravel(), minlength=size)
+    
+    return reached
+
+
+def round_names(draw_size: int) -> List[str]:
+    """Nomi dei turni di un tabellone (es. 32 -> R32, R16, QF, SF, F)."""
+    names = {8: 'QF', 4: 'SF', 2: 'F'}
+    sizes = [draw_size >> i for i in range(int(np.log2(draw_size)))]
+    return [names.get(size, f'R{size}') for size in sizes]
+
+
+class TournamentSimulator:
+    """Simulatore vettoriale di un tabellone con probabilità di vittoria a coppie"""
+    
+    def __init__(self, draw: Sequence[Optional[str]], probabilities: np.ndarray):
+        """
+        Inizializza simulatore.
+        
+        Args:
+            draw: Giocatori in ordine di tabellone (posizioni adiacenti si
+                affrontano al primo turno); None = bye. Lunghezza potenza di 2
+            probabilities: Matrice P[i, j] = probabilità che il giocatore i
+                batta j, con i giocatori nell'ordine di self.players
+        """
+        if len(draw) < 2 or len(draw) & (len(draw) - 1):
+            raise ValueError(f"Il tabellone deve avere una potenza di 2 posizioni (ricevute: {len(draw)})")
+        
+        self.players: List[str] = [player for player in draw if player is not None]
+        if len(set(self.players)) != len(self.players):
+            raise ValueError("Giocatore presente più volte nel tabellone")
+        
+        n = len(self.players)
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if probabilities.shape != (n, n):
+            raise ValueError(f"Matrice di probabilità {probabilities.shape}, attesa ({n}, {n})")
+        
+        # Indice n = bye: perde contro chiunque (e contro un altro bye)
+        matrix = np.zeros((n + 1, n + 1), dtype=np.float32)
+        matrix[:n, :n] = probabilities
+        matrix[:n, n] = 1.0
+        self.matrix = matrix
+        
+        positions = {player: i for i, player in enumerate(self.players)}
+        self.slots = np.array([positions[p] if p is not None else n for p in draw], dtype=np.int32)
+        self.n_rounds = int(np.log2(len(draw)))
+    
+    def run(self, n_simulations: int = 100_000, seed: Optional[int] = None, n_jobs: int = 1) -> pd.DataFrame:
+        """
+        Esegue le simulazioni.
+        
+        Args:
+            n_simulations: Numero di tabelloni simulati
+            seed: Seed per risultati riproducibili (indipendenti da n_jobs)
+            n_jobs: Processi per i blocchi di simulazioni
+        
+        Returns:
+            DataFrame per giocatore con la probabilità di raggiungere ogni
+            turno (reach_R64, ..., reach_SF, reach_F) e title_probability,
+            ordinato per probabilità di titolo
+        """
+        block = max(1, _SIMULATION_BLOCK_CELLS // len(self.slots))
+        sizes = [min(block, n_simulations - start) for start in range(0, n_simulations, block)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        
+        if n_jobs > 1 and len(sizes) > 1:
+            logger.info("Simulazione: %d tabelloni in %d blocchi su %d processi", n_simulations, len(sizes), n_jobs)
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                futures = [
+                    pool.submit(_simulate_block, self.matrix, self.slots, size, child)
+                    for size, child in zip(sizes, seeds)
+                ]
+                reached = sum(future.result() for future in futures)
+        else:
+            reached = sum(
+                _simulate_block(self.matrix, self.slots, size, child) for size, child in zip(sizes, seeds)
+            )
+        
+        probabilities = reached[:len(self.players), 1:] / n_simulations
+        result = pd.DataFrame(
+            probabilities[:, :-1], columns=[f'reach_{name}' for name in round_names(len(self.slots))[1:]]
+        )
+        result.insert(0, 'player_name', self.players)
+        result['title_probability'] = probabilities[:, -1]
+        return result.sort_values('title_probability', ascending=False, ignore_index=True)
@@ -0,0 +1,158 @@
+"""
+Archivio dei match su file .npy mappati in memoria
+
+Ogni colonna del dataset pulito è un file .npy a larghezza fissa (date come
+giorni int32, numeri nel loro dtype, stringhe come codici di un dizionario
+salvato in schema.json). L'apertura legge solo lo schema e mappa i file con
+mmap_mode: il sistema operativo carica soltanto le pagine delle colonne (e
+delle righe) che un'analisi tocca davvero.
+
+frame() espone le stringhe come Categorical sui codici mappati; i risultati
+di ATPAnalyzer riportano le etichette al tipo originale (str), come sul
+DataFrame letto dal CSV.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from .logger import setup_logger
+from .cleaner import chronological_order
+from .encoding import decode_columns, encode_columns
+from . import config
+
+logger = setup_logger(__name__)
+
+
+SCHEMA_FILE = 'schema.json'
+
+# Giorno mancante nelle colonne data int32
+_MISSING_DAY = np.iinfo(np.int32).min
+
+
+def _json_value(value):
+    """Valore del dizionario serializzabile in JSON (tipi NumPy -> Python)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class MatchStore:
+    """Dataset pulito come colonne .npy mappate in memoria"""
+    
+    def __init__(self, path: Path = None):
+        """
+        Apre un archivio scritto con MatchStore.write (nessun dato letto).
+        
+        Args:
+            path: Cartella dell'archivio (default: config.MATCH_STORE_DIR)
+        """
+        self.path = Path(path or config.MATCH_STORE_DIR)
+        with open(self.path / SCHEMA_FILE, encoding='utf-8') as f:
+            meta = json.load(f)
+        
+        self.n_rows: int = meta['n_rows']
+        self.schema: Dict[str, dict] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+        for column in meta['columns']:
+            spec = dict(column)
+            if spec['kind'] == 'dictionary':
+                spec['categories'] = np.array(spec['categories'], dtype=object)
+            name = spec.pop('name')
+            self.schema[name] = spec
+            # Vista ndarray sul memmap (pandas non conserva la sottoclasse)
+            self.arrays[name] = np.load(self.path / spec.pop('file'), mmap_mode='r').view(np.ndarray)
+    
+    @classmethod
+    def exists(cls, path: Path = None) -> bool:
+        """True se nella cartella c'è un archivio completo."""
+        return (Path(path or config.MATCH_STORE_DIR) / SCHEMA_FILE).exists()
+    
+    @classmethod
+    def write(cls, df: pd.DataFrame, path: Path = None) -> 'MatchStore':
+        """
+        Scrive il dataset pulito in ordine cronologico come colonne .npy.
+        
+        Args:
+            df: DataFrame pulito da cleaner
+            path: Cartella dell'archivio (default: config.MATCH_STORE_DIR)
+        
+        Returns:
+            MatchStore aperto sull'archivio scritto
+        """
+        path = Path(path or config.MATCH_STORE_DIR)
+        path.mkdir(parents=True, exist_ok=True)
+        # Schema rimosso per primo: un archivio senza schema non viene aperto
+        (path / SCHEMA_FILE).unlink(missing_ok=True)
+        for stale in path.glob('col_*.npy'):
+            stale.unlink()
+        
+        if not df.empty:
+            order = chronological_order(df)
+            if not np.array_equal(order, np.arange(len(df))):
+                df = df.take(order)
+        arrays, schema = encode_columns(df)
+        
+        columns = []
+        for i, (name, values) in enumerate(arrays.items()):
+            spec = {'name': name, 'file': f'col_{i:03d}.npy', **schema[name]}
+            if spec['kind'] == 'fixed' and np.dtype(spec['dtype']).kind == 'M':
+                # Date come giorni dall'epoca (int32), dtype originale nello schema
+                days = values.astype('datetime64[D]')
+                values = np.where(np.isnat(days), _MISSING_DAY, days.astype(np.int64)).astype(np.int32)
+                spec['kind'] = 'date'
+            if spec['kind'] == 'dictionary':
+                spec['categories'] = [_json_value(value) for value in spec['categories']]
+            np.save(path / spec['file'], values)
+            columns.append(spec)
+        
+        with open(path / SCHEMA_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'n_rows': len(df), 'columns': columns}, f, ensure_ascii=False)
+        
+        store = cls(path)
+        logger.info("✓ Archivio match scritto: %s (%d righe, %d colonne)", path, len(df), len(columns))
+        return store
+    
+    def __len__(self) -> int:
+        return self.n_rows
+    
+    def __repr__(self) -> str:
+        return f"MatchStore({str(self.path)!r}, rows={self.n_rows}, columns={len(self.schema)})"
+    
+    @property
+    def columns(self) -> List[str]:
+        """Colonne disponibili."""
+        return list(self.schema)
+    
+    @property
+    def nbytes(self) -> int:
+        """Dimensione su disco delle colonne."""
+        return sum(values.nbytes for values in self.arrays.values())
+    
+    def frame(self, columns: Optional[Iterable[str]] = None, strings: str = 'category') -> pd.DataFrame:
+        """
+        DataFrame sulle colonne mappate.
+        
+        Le colonne numeriche e i codici delle stringhe sono viste in sola
+        lettura sui file (letti solo alle pagine usate); le date vengono
+        convertite nel dtype originale.
+        
+        Args:
+            columns: Colonne da includere (default: tutte)
+            strings: 'category' (codici mappati) o 'dense' (stringhe in memoria)
+        
+        Returns:
+            DataFrame in ordine cronologico
+        """
+        columns = list(columns) if columns is not None else self.columns
+        arrays, schema = {}, {}
+        for name in columns:
+            spec, values = self.schema[name], self.arrays[name]
+            if spec['kind'] == 'date':
+                days = np.where(values == _MISSING_DAY, np.datetime64('NaT'), values.astype('datetime64[D]'))
+                arrays[name] = days.astype(spec['dtype'])
+                schema[name] = {'kind': 'fixed', 'dtype': spec['dtype']}
+            else:
+                arrays[name], schema[name] = values, spec
+        
+        return decode_columns(arrays, schema, strings=strings)
@@ -0,0 +1,127 @@
+"""
+Motore serie di vittorie (streak) con run-length encoding vettoriale
+
+Lavora sulle sequenze ordinate di match di ogni giocatore (indice CSR di
+indexes.PlayerMatchIndex): le serie sono i run di vittorie consecutive,
+individuati per tutti i giocatori insieme senza cicli Python.
+"""
+from typing import Dict, Optional
+
+import pandas as pd
+import numpy as np
+
+
+def compute_streaks(codes: np.ndarray, rows: np.ndarray, won: np.ndarray, dates: np.ndarray,
+                    groups: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Serie di vittorie più lunga e corrente per ogni (giocatore, gruppo).
+    
+    Le partecipazioni devono essere ordinate per (giocatore, riga), come
+    negli array di PlayerMatchIndex.
+    
+    Args:
+        codes: Codice giocatore di ogni partecipazione
+        rows: Posizione del match nel dataset (ordine cronologico)
+        won: True se la partecipazione è una vittoria
+        dates: Data (int64) di ogni posizione del dataset
+        groups: Categoria opzionale di ogni partecipazione (superficie, livello)
+    
+    Returns:
+        Dict di array allineati per chiave: player, group, longest,
+        longest_start, longest_end, current, current_start, current_end
+        (date in int64, valori minimi se la serie è vuota)
+    """
+    if groups is None:
+        groups = np.zeros(len(codes), dtype=np.int64)
+    elif len(groups):
+        # Sequenze per (giocatore, gruppo): ordinamento stabile, le righe restano cronologiche
+        order = np.argsort(codes.astype(np.int64) * (int(groups.max()) + 1) + groups, kind='stable')
+        codes, rows, won, groups = codes[order], rows[order], won[order], groups[order]
+    n = len(codes)
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return {key: empty for key in (
+            'player', 'group', 'longest', 'longest_start', 'longest_end',
+            'current', 'current_start', 'current_end'
+        )}
+    
+    new_key = np.empty(n, dtype=bool)
+    new_key[0] = True
+    new_key[1:] = (codes[1:] != codes[:-1]) | (groups[1:] != groups[:-1])
+    
+    # Run-length encoding: un run inizia a ogni nuova chiave o cambio di esito
+    run_start = new_key.copy()
+    run_start[1:] |= won[1:] != won[:-1]
+    starts = np.flatnonzero(run_start)
+    ends = np.append(starts[1:], n) - 1
+    lengths = ends - starts + 1
+    run_won = won[starts]
+    
+    key_starts = np.flatnonzero(new_key)
+    key_of_run = np.searchsorted(key_starts, starts, side='right') - 1
+    n_keys = len(key_starts)
+    run_dates_start = dates[rows[starts]]
+    run_dates_end = dates[rows[ends]]
+    
+    # Serie più lunga: run vinti per (chiave, lunghezza desc); a parità il primo
+    win_runs = np.flatnonzero(run_won)
+    best = win_runs[np.argsort(key_of_run[win_runs] * (n + 1) - lengths[win_runs], kind='stable')]
+    first_of_key = np.ones(len(best), dtype=bool)
+    first_of_key[1:] = key_of_run[best[1:]] != key_of_run[best[:-1]]
+    best = best[first_of_key]
+    
+    no_date = np.iinfo(np.int64).min
+    longest = np.zeros(n_keys, dtype=np.int64)
+    longest_start = np.full(n_keys, no_date, dtype=np.int64)
+    longest_end = np.full(n_keys, no_date, dtype=np.int64)
+    longest[key_of_run[best]] = lengths[best]
+    longest_start[key_of_run[best]] = run_dates_start[best]
+    longest_end[key_of_run[best]] = run_dates_end[best]
+    
+    # Serie corrente: ultimo run di ogni chiave, se vinto
+    last_run = np.append(np.flatnonzero(np.diff(key_of_run)), len(starts) - 1)
+    active = run_won[last_run]
+    current = np.where(active, lengths[last_run], 0)
+    current_start = np.where(active, run_dates_start[last_run], no_date)
+    current_end = np.where(active, run_dates_end[last_run], no_date)
+    
+    return {
+        'player': codes[key_starts],
+        'group': groups[key_starts],
+        'longest': longest,
+        'longest_start': longest_start,
+        'longest_end': longest_end,
+        'current': current,
+        'current_start': current_start,
+        'current_end': current_end,
+    }
+
+
+def streaks_frame(streaks: Dict[str, np.ndarray], player_names: np.ndarray,
+                  group_labels: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Converte l'output di compute_streaks in DataFrame leggibile.
+    
+    Args:
+        streaks: Output di compute_streaks
+        player_names: Nomi indicizzati per codice giocatore
+        group_labels: Etichette di gruppo (una riga per codice gruppo)
+    
+    Returns:
+        DataFrame con player_name, [breakdown], longest_streak, longest_start,
+        longest_end, current_streak, current_start, current_end
+    """
+    frame = pd.DataFrame({'player_name': np.asarray(player_names)[streaks['player']]})
+    
+    if group_labels is not None:
+        labels = group_labels.iloc[streaks['group']].reset_index(drop=True)
+        frame = pd.concat([frame, labels], axis=1)
+    
+    frame['longest_streak'] = streaks['longest']
+    frame['longest_start'] = streaks['longest_start'].astype('datetime64[ns]')
+    frame['longest_end'] = streaks['longest_end'].astype('datetime64[ns]')
+    frame['current_streak'] = streaks['current']
+    frame['current_start'] = streaks['current_start'].astype('datetime64[ns]')
+    frame['current_end'] = streaks['current_end'].astype('datetime64[ns]')
+    
+    return frame
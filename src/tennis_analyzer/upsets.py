@@ -0,0 +1,184 @@
+"""
+Analisi delle sorprese (upset) per distanza di ranking e ranking del favorito
+
+Ogni match con entrambi i ranking noti cade in una cella (gruppo, fascia di
+distanza, fascia del favorito) con fasce logaritmiche; partite e upset di
+tutte le celle si contano con un solo bincount sul codice di cella.
+"""
+from typing import List, Union
+
+import pandas as pd
+import numpy as np
+
+from . import config
+from .encoding import decode_labels
+
+
+# Dimensioni di raggruppamento ammesse -> colonna del dataset
+UPSET_GROUPS = {
+    'surface': 'surface',
+    'level': 'tourney_level_name',
+    'round': 'round',
+    'year': 'year',
+    'tournament': 'tourney_name',
+}
+
+
+def log_bins(max_value: float, base: float = 2.0, include_zero: bool = False) -> np.ndarray:
+    """
+    Estremi interi di fasce logaritmiche [1, 2, 4, 8, ...] che coprono max_value.
+    
+    Args:
+        max_value: Valore massimo da coprire
+        base: Rapporto tra estremi consecutivi
+        include_zero: Aggiunge la fascia dei valori nulli [0, 1)
+    
+    Returns:
+        Array int64 crescente di estremi (l'ultimo escluso)
+    """
+    n = int(np.ceil(np.log(max(max_value, 1) + 1) / np.log(base)))
+    edges = np.unique(np.floor(base ** np.arange(n + 1)).astype(np.int64))
+    return np.concatenate([[0], edges]) if include_zero else edges
+
+
+def bin_labels(edges: np.ndarray) -> List[str]:
+    """Etichette 'lo-hi' (estremi inclusi) delle fasce definite da edges."""
+    return [f"{lo}" if hi - lo == 1 else f"{lo}-{hi - 1}" for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+def _ranked_matches(df: pd.DataFrame) -> pd.DataFrame:
+    """Match con entrambi i ranking validi e colonne favorite_rank/upset_indicator."""
+    ranked = df[(df['winner_rank'] >= 1) & (df['loser_rank'] >= 1)]
+    if 'favorite_rank' not in ranked.columns or 'upset_indicator' not in ranked.columns:
+        ranked = ranked.assign(
+            favorite_rank=np.minimum(ranked['winner_rank'], ranked['loser_rank']),
+            upset_indicator=(ranked['loser_rank'] < ranked['winner_rank']).astype(int),
+        )
+    return ranked
+
+
+def _group_columns(by: Union[str, List[str], None]) -> List[str]:
+    """Colonne del dataset per le dimensioni di raggruppamento richieste."""
+    by = [by] if isinstance(by, str) else list(by or [])
+    unknown = [key for key in by if key not in UPSET_GROUPS]
+    if unknown:
+        raise ValueError(f"Raggruppamento non valido: {unknown} (ammessi: {list(UPSET_GROUPS)})")
+    return [UPSET_GROUPS[key] for key in by]
+
+
+def upset_table(df: pd.DataFrame, by: Union[str, List[str], None] = None, gap: bool = True,
+                favorite: bool = True, base: float = 2.0, min_matches: int = 1) -> pd.DataFrame:
+    """
+    Tassi di upset per (gruppo, fascia di distanza, fascia del favorito).
+    
+    Args:
+        df: DataFrame pulito
+        by: Dimensioni: 'surface', 'level', 'round', 'year', 'tournament' o lista
+        gap: Suddividere per distanza di ranking (fasce logaritmiche)
+        favorite: Suddividere per ranking del favorito (fasce logaritmiche)
+        base: Rapporto tra estremi consecutivi delle fasce
+        min_matches: Minimo match per cella
+    
+    Returns:
+        DataFrame con colonne di gruppo, gap_bucket, favorite_bucket,
+        matches, upsets, upset_rate (%) per le sole celle non vuote
+    """
+    group_cols = _group_columns(by)
+    ranked = _ranked_matches(df)
+    columns = group_cols + (['gap_bucket'] if gap else []) + (['favorite_bucket'] if favorite else []) \
+        + ['matches', 'upsets', 'upset_rate']
+    if ranked.empty:
+        return pd.DataFrame(columns=columns)
+    
+    winner_rank = ranked['winner_rank'].to_numpy(dtype=np.float64)
+    loser_rank = ranked['loser_rank'].to_numpy(dtype=np.float64)
+    gaps = np.abs(winner_rank - loser_rank)
+    favorites = ranked['favorite_rank'].to_numpy(dtype=np.float64)
+    upsets = ranked['upset_indicator'].to_numpy(dtype=np.int64)
+    
+    gap_edges = log_bins(gaps.max(), base, include_zero=True)
+    favorite_edges = log_bins(favorites.max(), base)
+    gap_codes = np.searchsorted(gap_edges, gaps, side='right') - 1 if gap else np.zeros(len(gaps), dtype=np.int64)
+    favorite_codes = np.searchsorted(favorite_edges, favorites, side='right') - 1 if favorite \
+        else np.zeros(len(favorites), dtype=np.int64)
+    n_gap = len(gap_edges) - 1 if gap else 1
+    n_favorite = len(favorite_edges) - 1 if favorite else 1
+    
+    if group_cols:
+        grouped = ranked.groupby(group_cols, sort=True)
+        group_codes = grouped.ngroup().to_numpy()
+        group_index = decode_labels(grouped.size().index.to_frame(index=False))
+        known = group_codes >= 0
+    else:
+        group_codes = np.zeros(len(ranked), dtype=np.int64)
+        group_index = None
+        known = np.ones(len(ranked), dtype=bool)
+    n_groups = int(group_codes.max()) + 1
+    
+    # Un solo passaggio: codice di cella (gruppo, distanza, favorito)
+    cells = (group_codes[known] * n_gap + gap_codes[known]) * n_favorite + favorite_codes[known]
+    size = n_groups * n_gap * n_favorite
+    matches = np.bincount(cells, minlength=size)
+    upset_counts = np.bincount(cells, weights=upsets[known], minlength=size).astype(np.int64)
+    
+    occupied = np.flatnonzero(matches >= max(min_matches, 1))
+    group_of_cell, rest = np.divmod(occupied, n_gap * n_favorite)
+    gap_of_cell, favorite_of_cell = np.divmod(rest, n_favorite)
+    
+    table = group_index.iloc[group_of_cell].reset_index(drop=True) if group_index is not None \
+        else pd.DataFrame(index=range(len(occupied)))
+    if gap:
+        table['gap_bucket'] = pd.Categorical.from_codes(gap_of_cell, bin_labels(gap_edges), ordered=True)
+    if favorite:
+        table['favorite_bucket'] = pd.Categorical.from_codes(favorite_of_cell, bin_labels(favorite_edges), ordered=True)
+    table['matches'] = matches[occupied]
+    table['upsets'] = upset_counts[occupied]
+    table['upset_rate'] = (table['upsets'] / table['matches'] * 100).round(1)
+    
+    if 'round' in group_cols:
+        # Turni in ordine di torneo invece che alfabetico (ordinamento stabile sui bucket)
+        table = table.sort_values(group_cols, kind='stable', key=lambda col: (
+            col.map(config.ROUND_ORDER).astype('float64').fillna(len(config.ROUND_ORDER)) if col.name == 'round' else col
+        ))
+    
+    return table[columns].reset_index(drop=True)
+
+
+def upset_grid(df: pd.DataFrame, base: float = 2.0, value: str = 'upset_rate') -> pd.DataFrame:
+    """
+    Griglia distanza di ranking x ranking del favorito (np.histogram2d).
+    
+    Args:
+        df: DataFrame pulito
+        base: Rapporto tra estremi consecutivi delle fasce
+        value: 'upset_rate' (%), 'matches' o 'upsets'
+    
+    Returns:
+        DataFrame con righe = fasce di distanza, colonne = fasce del favorito
+    """
+    ranked = _ranked_matches(df)
+    if ranked.empty:
+        return pd.DataFrame()
+    
+    gaps = (ranked['winner_rank'] - ranked['loser_rank']).abs().to_numpy(dtype=np.float64)
+    favorites = ranked['favorite_rank'].to_numpy(dtype=np.float64)
+    gap_edges = log_bins(gaps.max(), base, include_zero=True)
+    favorite_edges = log_bins(favorites.max(), base)
+    
+    bins = [gap_edges, favorite_edges]
+    matches, _, _ = np.histogram2d(gaps, favorites, bins=bins)
+    upsets, _, _ = np.histogram2d(gaps, favorites, bins=bins, weights=ranked['upset_indicator'].to_numpy())
+    
+    if value == 'matches':
+        grid = matches.astype(np.int64)
+    elif value == 'upsets':
+        grid = upsets.astype(np.int64)
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            grid = np.round(np.where(matches > 0, upsets / matches * 100, np.nan), 1)
+    
+    return pd.DataFrame(
+        grid,
+        index=pd.Index(bin_labels(gap_edges), name='gap_bucket'),
+        columns=pd.Index(bin_labels(favorite_edges), name='favorite_bucket'),
+    )
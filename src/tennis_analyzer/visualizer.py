@@ -1,10 +1,13 @@
 """
 Modulo per generazione visualizzazioni grafiche (Matplotlib + Seaborn)
+
+Matplotlib e seaborn vengono importati al primo grafico e lo stile è
+applicato con rc_context solo durante i metodi plot_*: importare il modulo
+non carica le librerie grafiche né modifica plt.rcParams globali.
 """
+import functools
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 
 from .logger import setup_logger
@@ -12,11 +15,37 @@ from . import config
 
 logger = setup_logger(__name__)
 
-# Configurare stile globale
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (14, 8)
-plt.rcParams['font.size'] = 10
-plt.rcParams['font.family'] = 'sans-serif'
+# Librerie grafiche e stile, caricati da _load_plotting al primo grafico
+plt = None
+sns = None
+_style = None
+
+
+def _load_plotting():
+    """Importa matplotlib/seaborn e prepara lo stile dei grafici (una volta)."""
+    global plt, sns, _style
+    if plt is None:
+        import matplotlib.pyplot as pyplot
+        import seaborn
+        
+        _style = {
+            **seaborn.axes_style("whitegrid"),
+            'figure.figsize': (14, 8),
+            'font.size': 10,
+            'font.family': 'sans-serif',
+        }
+        plt, sns = pyplot, seaborn
+
+
+def _plotting(method):
+    """Metodo plot_* eseguito con le librerie caricate e lo stile del progetto."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        _load_plotting()
+        with plt.rc_context(_style):
+            return method(*args, **kwargs)
+    
+    return wrapper
 
 
 class ATPVisualizer:
@@ -30,9 +59,14 @@ class ATPVisualizer:
             output_dir: Directory per salvare grafici
         """
         self.output_dir = output_dir or config.VISUALS_DIR
-        self.output_dir.mkdir(parents=True, exist_ok=True)
         self.logger = logger
     
+    def _output_path(self, filename: str) -> Path:
+        """Percorso del grafico (directory creata alla prima scrittura)."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        return self.output_dir / filename
+    
+    @_plotting
     def plot_top_atp_days(self, data: pd.DataFrame, filename: str = "01_top_atp_days.png"):
         """
         Grafico: Giocatori n.1 ATP per più giorni.
@@ -45,7 +79,7 @@ class ATPVisualizer:
             logger.warning("Dati vuoti per plot_top_atp_days")
             return
         
-        logger.info(f"Generando grafico: {filename}")
+        logger.info("Generando grafico: %s", filename)
         
         fig, ax = plt.subplots(figsize=(14, 8))
         
@@ -57,9 +91,11 @@ class ATPVisualizer:
         
         bars = ax.barh(data_plot['player_name'], data_plot['days_at_rank1'], color=colors)
         
-        # Aggiungere valore su barre
-        for i, (player, days) in enumerate(zip(data_plot['player_name'], data_plot['days_at_rank1'])):
-            ax.text(days + 10, i, f"{int(days)} days", va='center', fontsize=9, fontweight='bold')
+        # Aggiungere valore su barre (settimane esatte se da classifiche)
+        weeks = data_plot['weeks_at_rank1'] if 'weeks_at_rank1' in data_plot else [None] * len(data_plot)
+        for i, (days, wk) in enumerate(zip(data_plot['days_at_rank1'], weeks)):
+            label = f"{int(days)} days" if wk is None else f"{int(days)} days ({wk:.0f} wk)"
+            ax.text(days + 10, i, label, va='center', fontsize=9, fontweight='bold')
         
         ax.set_xlabel('Giorni come N.1 ATP', fontsize=12, fontweight='bold')
         ax.set_ylabel('Giocatore', fontsize=12, fontweight='bold')
@@ -67,11 +103,12 @@ class ATPVisualizer:
         ax.invert_yaxis()
         
         plt.tight_layout()
-        filepath = self.output_dir / filename
+        filepath = self._output_path(filename)
         plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        logger.info(f"✓ Salvato: {filepath}")
+        logger.info("✓ Salvato: %s", filepath)
         plt.close()
     
+    @_plotting
     def plot_total_wins(self, data: pd.DataFrame, filename: str = "02_total_wins.png"):
         """
         Grafico: Total wins per giocatore.
@@ -84,7 +121,7 @@ class ATPVisualizer:
             logger.warning("Dati vuoti per plot_total_wins")
             return
         
-        logger.info(f"Generando grafico: {filename}")
+        logger.info("Generando grafico: %s", filename)
         
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
         
@@ -119,11 +156,12 @@ class ATPVisualizer:
         ax2.grid(True, alpha=0.3)
         
         plt.tight_layout()
-        filepath = self.output_dir / filename
+        filepath = self._output_path(filename)
         plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        logger.info(f"✓ Salvato: {filepath}")
+        logger.info("✓ Salvato: %s", filepath)
         plt.close()
     
+    @_plotting
     def plot_surface_performance(self, data: pd.DataFrame, filename: str = "03_wins_by_surface.png"):
         """
         Grafico: Performance per superficie.
@@ -136,7 +174,7 @@ class ATPVisualizer:
             logger.warning("Dati vuoti per plot_surface_performance")
             return
         
-        logger.info(f"Generando grafico: {filename}")
+        logger.info("Generando grafico: %s", filename)
         
         fig, ax = plt.subplots(figsize=(14, 9))
         
@@ -165,11 +203,12 @@ class ATPVisualizer:
         ax.set_ylabel('Giocatore', fontsize=11, fontweight='bold')
         
         plt.tight_layout()
-        filepath = self.output_dir / filename
+        filepath = self._output_path(filename)
         plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        logger.info(f"✓ Salvato: {filepath}")
+        logger.info("✓ Salvato: %s", filepath)
         plt.close()
     
+    @_plotting
     def plot_matches_distribution(self, df: pd.DataFrame, filename: str = "04_matches_distribution.png"):
         """
         Grafico: Distribuzione match nel tempo.
@@ -178,7 +217,7 @@ class ATPVisualizer:
             df: Dataset pulito (raw)
             filename: Nome file output
         """
-        logger.info(f"Generando grafico: {filename}")
+        logger.info("Generando grafico: %s", filename)
         
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
         
@@ -198,11 +237,12 @@ class ATPVisualizer:
         ax2.set_title('Distribuzione Match per Superficie', fontsize=12, fontweight='bold')
         
         plt.tight_layout()
-        filepath = self.output_dir / filename
+        filepath = self._output_path(filename)
         plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        logger.info(f"✓ Salvato: {filepath}")
+        logger.info("✓ Salvato: %s", filepath)
         plt.close()
     
+    @_plotting
     def plot_win_rate_analysis(self, data: pd.DataFrame, filename: str = "05_win_rate_analysis.png"):
         """
         Grafico: Analisi win rate.
@@ -215,7 +255,7 @@ class ATPVisualizer:
             logger.warning("Dati vuoti per plot_win_rate_analysis")
             return
         
-        logger.info(f"Generando grafico: {filename}")
+        logger.info("Generando grafico: %s", filename)
         
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
         
@@ -245,9 +285,9 @@ class ATPVisualizer:
         ax2.grid(True, alpha=0.3, axis='y')
         
         plt.tight_layout()
-        filepath = self.output_dir / filename
+        filepath = self._output_path(filename)
         plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        logger.info(f"✓ Salvato: {filepath}")
+        logger.info("✓ Salvato: %s", filepath)
         plt.close()
     
     def generate_all_plots(self, df: pd.DataFrame, analysis_results: dict):
@@ -271,4 +311,4 @@ class ATPVisualizer:
         self.plot_win_rate_analysis(analysis_results['total_wins'])
         
         logger.info("\n✓ Tutti i grafici generati con successo!")
-        logger.info(f"  Salvati in: {self.output_dir}")
+        logger.info("  Salvati in: %s", self.output_dir)
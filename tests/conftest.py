@@ -0,0 +1,5 @@
+"""Configurazione pytest: src nel path come negli script della root."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -0,0 +1,46 @@
+"""Dati sintetici e confronti condivisi dai test."""
+import numpy as np
+import pandas as pd
+
+from tennis_analyzer.cleaner import ATPDataCleaner
+
+
+def raw_matches(n: int, seed: int, start_year: int, years: int) -> pd.DataFrame:
+    """Match grezzi sintetici nel formato di Jeff Sackmann (colonne essenziali)."""
+    rng = np.random.default_rng(seed)
+    names = np.array([f"player {i}" for i in range(40)])
+    winners = rng.integers(0, len(names), n)
+    losers = (winners + rng.integers(1, len(names), n)) % len(names)
+    tourneys = np.sort(rng.integers(0, max(n // 16, 1), n))
+    dates = pd.to_datetime([f"{start_year + t % years}-{1 + t % 12:02d}-{1 + t % 28:02d}" for t in tourneys])
+    return pd.DataFrame({
+        'tourney_id': [f"T{t}" for t in tourneys],
+        'tourney_name': [f"Torneo {t % 9}" for t in tourneys],
+        'surface': np.array(['Hard', 'Clay', 'Grass', 'Carpet'])[tourneys % 4],
+        'tourney_level': np.array(list('GMAD'))[tourneys % 4],
+        'tourney_date': dates.strftime('%Y%m%d').astype(int),
+        'match_num': np.arange(n),
+        'round': np.array(['R32', 'R16', 'QF', 'SF', 'F'])[np.arange(n) % 5],
+        'winner_name': names[winners],
+        'loser_name': names[losers],
+        'winner_rank': np.where(rng.random(n) < 0.1, 1, winners + 1).astype(float),
+        'loser_rank': (losers + 1).astype(float),
+        'winner_rank_points': 1000.0,
+        'loser_rank_points': 500.0,
+        'score': '6-4 6-4',
+        'minutes': rng.integers(60, 200, n).astype(float),
+    })
+
+
+def clean(raw: pd.DataFrame) -> pd.DataFrame:
+    return ATPDataCleaner().clean_data(raw).reset_index(drop=True)
+
+
+def assert_same_results(incremental: dict, full: dict):
+    assert incremental.keys() == full.keys()
+    for key, expected in full.items():
+        actual = incremental[key]
+        if isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True))
+        else:
+            assert actual == expected, key
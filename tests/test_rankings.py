@@ -0,0 +1,52 @@
+"""
+Tempo in classifica dalle classifiche settimanali, con buchi nei dati
+"""
+import pandas as pd
+
+from tennis_analyzer.analyzer import ATPAnalyzer
+from tennis_analyzer.rankings import RankingsStore
+
+from helpers import clean, raw_matches
+
+
+def _store(dates, players):
+    rankings = pd.DataFrame({'ranking_date': dates, 'rank': 1, 'player': players, 'points': 0.0})
+    names = pd.DataFrame({'player_id': [1, 2], 'name_first': ['Anna', 'Bruno'], 'name_last': ['Rossi', 'Verdi']})
+    return RankingsStore.from_frames(rankings, names)
+
+
+def test_time_at_rank_weekly_snapshots():
+    store = _store([20000103, 20000110, 20000117, 20000124], [1, 1, 2, 2])
+    days = store.time_at_rank(1).set_index('player_name')['days']
+    
+    assert days.to_dict() == {'Anna Rossi': 14, 'Bruno Verdi': 14}
+
+
+def test_time_at_rank_gap_is_capped_by_max_gap_days():
+    # Nessuna classifica tra il 10 gennaio e il 1 maggio
+    store = _store([19800103, 19800110, 19800501, 19800508], [1, 1, 2, 2])
+    
+    uncapped = store.time_at_rank(1).set_index('player_name')['days']
+    capped = store.time_at_rank(1, max_gap_days=14).set_index('player_name')['days']
+    
+    assert uncapped['Anna Rossi'] == 7 + (pd.Timestamp('1980-05-01') - pd.Timestamp('1980-01-10')).days
+    assert capped.to_dict() == {'Anna Rossi': 21, 'Bruno Verdi': 14}
+
+
+def test_time_at_rank_window_clips_intervals():
+    store = _store([20000103, 20000110, 20000117, 20000124], [1, 1, 2, 2])
+    days = store.time_at_rank(1, start='2000-01-12', end='2000-01-20').set_index('player_name')['days']
+    
+    assert days.to_dict() == {'Anna Rossi': 5, 'Bruno Verdi': 4}
+
+
+def test_top_atp_days_does_not_credit_gaps_to_last_number_one():
+    rankings = pd.DataFrame({'ranking_date': [19800103, 19800110, 19800501, 19800508],
+                             'rank': 1, 'player': [1, 1, 2, 2], 'points': 0.0})
+    names = pd.DataFrame({'player_id': [1, 2], 'name_first': ['Player', 'Player'], 'name_last': ['1', '2']})
+    analyzer = ATPAnalyzer(clean(raw_matches(200, seed=6, start_year=1980, years=1)),
+                           rankings=RankingsStore.from_frames(rankings, names))
+    
+    days = analyzer.analyze_top_atp_days().set_index('player_name')['days_at_rank1']
+    
+    assert days.to_dict() == {'Player 1': 21, 'Player 2': 14}
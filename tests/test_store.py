@@ -0,0 +1,33 @@
+"""
+Analisi su MatchStore (colonne .npy mappate) uguali al percorso su DataFrame, tipi inclusi
+"""
+import pandas as pd
+import pytest
+
+from tennis_analyzer.analyzer import ATPAnalyzer
+from tennis_analyzer.store import MatchStore
+
+from helpers import assert_same_results, clean, raw_matches
+
+
+@pytest.fixture
+def analyzers(tmp_path):
+    df = clean(raw_matches(800, seed=4, start_year=2010, years=4))
+    return ATPAnalyzer(df), ATPAnalyzer(MatchStore.write(df, tmp_path / 'store'))
+
+
+def test_store_full_analysis_matches_dataframe(analyzers):
+    dense, stored = analyzers
+    assert_same_results(stored.run_full_analysis(), dense.run_full_analysis())
+
+
+def test_store_results_have_plain_labels(analyzers):
+    dense, stored = analyzers
+    
+    for by in ('surface', 'round'):
+        pd.testing.assert_frame_equal(stored.analyze_upsets(by=[by])[by], dense.analyze_upsets(by=[by])[by])
+    pd.testing.assert_frame_equal(stored.get_era_leaders(by='surface'), dense.get_era_leaders(by='surface'))
+    
+    player = dense.df['winner_name'].iloc[0]
+    pd.testing.assert_frame_equal(stored.player_matches(player).reset_index(drop=True),
+                                  dense.player_matches(player).reset_index(drop=True))
@@ -0,0 +1,56 @@
+"""
+Equivalenza tra ATPAnalyzer.update() incrementale e ricalcolo completo
+"""
+import pandas as pd
+import pytest
+
+from tennis_analyzer.analyzer import ATPAnalyzer
+
+from helpers import assert_same_results, clean, raw_matches
+
+
+@pytest.fixture
+def batches():
+    first = clean(raw_matches(600, seed=1, start_year=2010, years=3))
+    second = clean(raw_matches(300, seed=2, start_year=2013, years=1))
+    # Match ripetuti dal primo blocco (dati già visti in un nuovo rilascio)
+    repeated = first.iloc[::7]
+    # Blocco con date precedenti all'ultimo match (arrivo fuori ordine)
+    late = clean(raw_matches(200, seed=3, start_year=2011, years=1))
+    empty = first.iloc[0:0]
+    return first, [second, repeated, empty, late]
+
+
+def test_update_matches_full_recompute(batches):
+    first, updates = batches
+    
+    incremental = ATPAnalyzer(first)
+    incremental.run_full_analysis()  # aggregati già calcolati prima degli update
+    for batch in updates:
+        incremental.update(batch)
+    
+    full = ATPAnalyzer(pd.concat([first, *updates], ignore_index=True))
+    
+    assert_same_results(incremental.run_full_analysis(), full.run_full_analysis())
+
+
+def test_update_windowed_analyses_match_full_recompute(batches):
+    first, updates = batches
+    
+    incremental = ATPAnalyzer(first)
+    for batch in updates:
+        incremental.update(batch)
+    full = ATPAnalyzer(pd.concat([first, *updates], ignore_index=True))
+    
+    window = {'start': '2011-01-01', 'end': '2012-12-31'}
+    assert_same_results(incremental.run_full_analysis(**window), full.run_full_analysis(**window))
+
+
+def test_update_with_empty_batch_is_noop(batches):
+    first, _ = batches
+    analyzer = ATPAnalyzer(first)
+    before = analyzer.run_full_analysis()
+    
+    analyzer.update(first.iloc[0:0])
+    
+    assert_same_results(analyzer.run_full_analysis(), before)